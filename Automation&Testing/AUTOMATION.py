@@ -1,20 +1,514 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+"""
+Parallel form tests against a local copy of Selenium's web-form page.
 
-driver = webdriver.Chrome()
-driver.maximize_window()
-driver.get("https://www.selenium.dev/selenium/web/web-form.html")
+FormServer serves site/ (web-form.html + submitted-form.html) on
+127.0.0.1, so no network is needed. Scenarios that need JavaScript or
+real widgets are marked needs_browser. They run on a BrowserPool of
+--workers headless browsers, started once in parallel. Each scenario
+borrows a session, which is reset (storage, cookies, about:blank)
+instead of relaunched, and every wait is an explicit WebDriverWait.
+All other scenarios take the HTTP fast path: a pooled requests session
+fetches the page, FormPage parses the form and fills it like a browser
+would, and the GET submission is checked. That verifies the query string
+only: the page's own script, widgets and rendering are exercised in the
+browser alone. Per-test and total wall times are printed at the end.
 
-# type a message
-driver.find_element(By.ID, "my-text-id").clear()
-driver.find_element(By.ID, "my-text-id").send_keys("I AM EXTRA COOOOL")
+    python AUTOMATION.py                          # HTTP where possible, 4 headless Chrome sessions for the rest
+    python AUTOMATION.py --mode browser           # everything in the browser
+    python AUTOMATION.py --mode http --repeat 100 # only the no-browser scenarios, no Selenium needed
+    python AUTOMATION.py --workers 8 --repeat 10 -k text
+    python AUTOMATION.py --browser firefox --headed
+    python AUTOMATION.py --url https://www.selenium.dev/selenium/web/web-form.html
+"""
 
-# click submit
-driver.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
+import argparse
+import contextlib
+import os
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from html.parser import HTMLParser
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urljoin, urlsplit
 
-# verify result text
-msg = driver.find_element(By.ID, "message").text
-assert "Received!" in msg
-print("Test passed:", msg)
+import requests
+from requests.adapters import HTTPAdapter
 
-driver.quit()
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import Select, WebDriverWait
+except ImportError:  # the HTTP fast path works without it
+    webdriver = None
+    WebDriverException = Exception
+
+SITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site")
+ARROW_RIGHT = "\ue014"  # selenium's Keys.ARROW_RIGHT, spelled out so the suite loads without selenium
+
+# steps are (action, target, value): "type" / "select" / "keys" / "js" target a field by
+# name, "click" targets an element id (the checkboxes share one name).
+# expect maps field name -> submitted value, a list for repeated names, or None for "not sent".
+# needs_browser: the scenario relies on key handling or script ("keys", "js"), so FormPage can't run it.
+Scenario = namedtuple("Scenario", "name steps expect needs_browser", defaults=(False,))
+Result = namedtuple("Result", "name mode ok seconds error")
+
+SCENARIOS = [
+    Scenario("text input", [("type", "my-text", "I AM EXTRA COOOOL")], {"my-text": "I AM EXTRA COOOOL"}),
+    Scenario("password", [("type", "my-password", "s3cr3t!")], {"my-password": "s3cr3t!"}),
+    Scenario("textarea multi-line", [("type", "my-textarea", "line one\nline two")],
+             {"my-textarea": "line one\r\nline two"}),  # browsers submit CRLF line breaks
+    Scenario("unicode text", [("type", "my-text", "Salām ünïcödé – ✓")], {"my-text": "Salām ünïcödé – ✓"}),
+    Scenario("long text", [("type", "my-textarea", "lorem ipsum " * 100)], {"my-textarea": "lorem ipsum " * 100}),
+    Scenario("select option", [("select", "my-select", "2")], {"my-select": "2"}),
+    Scenario("datalist", [("type", "my-datalist", "Seattle")], {"my-datalist": "Seattle"}),
+    Scenario("both checkboxes", [("click", "my-check-2", None)], {"my-check": ["on", "on"]}),
+    Scenario("no checkboxes", [("click", "my-check-1", None)], {"my-check": None}),
+    Scenario("second radio", [("click", "my-radio-2", None)], {"my-radio": "on"}),
+    Scenario("disabled and readonly", [], {"my-disabled": None, "my-readonly": "Readonly input"}),
+    Scenario("defaults", [], {"my-select": "Open this select menu", "my-range": "5", "my-colors": "#563d7c",
+                              "my-hidden": "", "my-check": "on", "my-text": ""}),
+    Scenario("range by keyboard", [("keys", "my-range", ARROW_RIGHT * 3)], {"my-range": "8"}, needs_browser=True),
+    Scenario("color picker", [("js", "my-colors", "#ff0000")], {"my-colors": "#ff0000"}, needs_browser=True),
+    Scenario("date picker", [("js", "my-date", "2025-09-01")], {"my-date": "2025-09-01"}, needs_browser=True),
+]
+
+
+class FormServer:
+    """Serves `folder` on 127.0.0.1 (free port by default); use as a context manager."""
+
+    def __init__(self, folder=SITE, port=0):
+        class Handler(SimpleHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def end_headers(self):
+                if self.close_connection:  # http.server doesn't say so, and clients would reuse the socket
+                    self.send_header("Connection", "close")
+                super().end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), partial(Handler, directory=folder))
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_driver(browser="chrome", headless=True, page_load_timeout=30):
+    if webdriver is None:
+        raise RuntimeError("selenium is not installed (pip install selenium)")
+    if browser == "firefox":
+        opts = webdriver.FirefoxOptions()
+        if headless:
+            opts.add_argument("-headless")
+        opts.page_load_strategy = "eager"  # DOM ready is enough; don't wait for images
+        driver = webdriver.Firefox(options=opts)
+        driver.set_window_size(1280, 900)
+    else:
+        opts = webdriver.ChromeOptions()
+        if headless:
+            opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1280,900")  # headless ignores maximize_window()
+        for flag in ("--disable-extensions", "--disable-gpu", "--disable-dev-shm-usage", "--no-first-run"):
+            opts.add_argument(flag)
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            opts.add_argument("--no-sandbox")  # Chrome refuses to start as root (containers, CI) otherwise
+        opts.page_load_strategy = "eager"
+        driver = webdriver.Chrome(options=opts)
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+class BrowserPool:
+    """
+    `size` warm browser sessions, started in parallel and lent to one test
+    at a time. Sessions are reset between tests rather than relaunched; a
+    session that has died is replaced. If the replacement fails to start,
+    its slot goes back empty and the next borrower tries again, so the pool
+    never shrinks. A borrow that waits more than `borrow_timeout` seconds fails.
+    """
+
+    def __init__(self, size, browser="chrome", headless=True, borrow_timeout=300.0):
+        self.size = size
+        self.factory = partial(make_driver, browser, headless)
+        self.borrow_timeout = borrow_timeout
+        self.launched = 0
+        self._idle = queue.Queue()  # drivers, or None for a slot whose browser must be (re)started
+        self._all = []
+        self._lock = threading.Lock()  # launched and _all change from the worker threads
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=size) as ex:
+            futures = [ex.submit(self.factory) for _ in range(size)]
+        errors = []
+        for f in futures:
+            try:
+                self._adopt(f.result())
+            except Exception as e:  # WebDriverException, or RuntimeError when selenium is missing
+                errors.append(e)
+        if errors:
+            self.close()
+            raise errors[0]
+        self.startup_seconds = time.perf_counter() - t0
+
+    def _adopt(self, driver):
+        self._track(driver)
+        self._idle.put(driver)
+
+    def _track(self, driver):
+        with self._lock:
+            self.launched += 1
+            self._all.append(driver)
+
+    @staticmethod
+    def reset(driver):
+        # storage belongs to the page's origin, so clear it before navigating away
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _discard(self, driver):
+        with self._lock, contextlib.suppress(ValueError):
+            self._all.remove(driver)
+        with contextlib.suppress(Exception):
+            driver.quit()
+
+    @contextlib.contextmanager
+    def session(self):
+        try:
+            driver = self._idle.get(timeout=self.borrow_timeout)
+        except queue.Empty:
+            raise RuntimeError(f"no browser session came free within {self.borrow_timeout:.0f}s") from None
+        try:
+            if driver is not None:
+                try:
+                    self.reset(driver)
+                except Exception:  # crashed or hung in the previous test: start a fresh one
+                    self._discard(driver)
+                    driver = None
+            if driver is None:
+                driver = self.factory()
+                self._track(driver)
+        except BaseException:
+            self._idle.put(None)  # keep the slot; the next borrower relaunches it
+            raise
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        for driver in drivers:
+            with contextlib.suppress(Exception):
+                driver.quit()
+
+
+def check_submission(scenario, url):
+    """Compare the query string the form was submitted with against scenario.expect."""
+    got = parse_qs(urlsplit(url).query, keep_blank_values=True)
+    for name, want in scenario.expect.items():
+        want = None if want is None else [want] if isinstance(want, str) else list(want)
+        if got.get(name) != want:
+            raise AssertionError(f"{name}: submitted {got.get(name)!r}, expected {want!r}")
+
+
+def run_in_browser(driver, scenario, form_url, timeout=10):
+    submit = (By.CSS_SELECTOR, "button[type='submit']")
+    wait = WebDriverWait(driver, timeout)
+    driver.get(form_url)
+    wait.until(EC.element_to_be_clickable(submit))
+    for action, target, value in scenario.steps:
+        if action == "click":
+            driver.find_element(By.ID, target).click()
+            continue
+        el = driver.find_element(By.NAME, target)
+        if action == "type":
+            el.clear()
+            el.send_keys(value)
+        elif action == "select":
+            Select(el).select_by_value(value)
+        elif action == "keys":
+            el.send_keys(value)
+        elif action == "js":  # widgets WebDriver can't type into (color, date pickers)
+            driver.execute_script(
+                "arguments[0].value = arguments[1];"
+                "arguments[0].dispatchEvent(new Event('input', {bubbles: true}));"
+                "arguments[0].dispatchEvent(new Event('change', {bubbles: true}));", el, value)
+        else:
+            raise ValueError(f"unknown step {action!r}")
+    driver.find_element(*submit).click()
+    wait.until(EC.text_to_be_present_in_element((By.ID, "message"), "Received!"))
+    check_submission(scenario, driver.current_url)
+    return driver.find_element(By.ID, "message").text
+
+
+class FormPage(HTMLParser):
+    """
+    The first <form> of a page as a browser would submit it: action,
+    method and controls in document order, plus the text of #message.
+    apply() performs the non-script steps and submission() returns the
+    successful controls. Disabled and unnamed fields are left out, as are
+    unchecked boxes and buttons (the suite's submit button has no name).
+    """
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.action, self.method, self.controls, self.message = None, "get", [], None
+        self._in_form, self._select, self._text, self._capture = False, None, None, None
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if a.get("id") == "message":
+            self._capture, self.message = tag, ""
+        if tag == "form" and self.action is None:
+            self.action, self.method, self._in_form = a.get("action") or "", (a.get("method") or "get").lower(), True
+        if not self._in_form or tag not in ("input", "textarea", "select", "option", "button"):
+            return
+        if tag == "option":
+            if self._select is not None:  # <datalist> options are suggestions, not values
+                self._text = {"value": a.get("value"), "selected": "selected" in a, "label": ""}
+                self._select["options"].append(self._text)
+            return
+        kind = tag if tag in ("textarea", "select") else (a.get("type") or ("submit" if tag == "button" else "text")).lower()
+        control = {"type": kind, "name": a.get("name"), "id": a.get("id"), "value": a.get("value"),
+                   "checked": "checked" in a, "disabled": "disabled" in a, "readonly": "readonly" in a, "options": []}
+        self.controls.append(control)
+        if tag == "select":
+            self._select = control
+        elif tag == "textarea":
+            control["value"], self._text = "", control
+
+    def handle_endtag(self, tag):
+        if tag == self._capture:
+            self._capture = None
+        if tag == "form":
+            self._in_form = False
+        elif tag == "select":
+            self._select = None
+        elif tag == "textarea" and self._text is not None:
+            self._text["value"] = self._text["value"].removeprefix("\n")  # as the HTML parser does
+            self._text = None
+        elif tag == "option":
+            self._text = None
+
+    def handle_data(self, data):
+        if self._capture:
+            self.message += data
+        if self._text is not None:
+            self._text["label" if "label" in self._text else "value"] += data
+
+    def _find(self, key, target):
+        for c in self.controls:
+            if c[key] == target:
+                return c
+        raise AssertionError(f"no form field with {key} {target!r}")
+
+    def apply(self, action, target, value):
+        if action == "click":
+            c = self._find("id", target)
+            if c["disabled"] or c["type"] not in ("checkbox", "radio"):
+                raise ValueError(f"clicking {target!r} needs a browser")
+            if c["type"] == "checkbox":
+                c["checked"] = not c["checked"]
+            else:
+                for other in self.controls:
+                    if other["type"] == "radio" and other["name"] == c["name"]:
+                        other["checked"] = other is c
+            return
+        c = self._find("name", target)
+        if action == "type":
+            if c["disabled"] or c["readonly"]:
+                raise AssertionError(f"{target} is not editable")
+            c["value"] = value
+        elif action == "select":
+            options = [o for o in c["options"] if self._option_value(o) == value]
+            if not options:
+                raise AssertionError(f"{target} has no option {value!r}")
+            for o in c["options"]:
+                o["selected"] = o is options[0]
+        else:
+            raise ValueError(f"step {action!r} needs a browser")
+
+    @staticmethod
+    def _option_value(option):
+        return option["value"] if option["value"] is not None else option["label"].strip()
+
+    def submission(self):
+        pairs = []
+        for c in self.controls:
+            kind = c["type"]
+            if not c["name"] or c["disabled"] or kind in ("submit", "button", "reset", "image"):
+                continue
+            if kind in ("checkbox", "radio"):
+                if c["checked"]:
+                    pairs.append((c["name"], c["value"] if c["value"] is not None else "on"))
+            elif kind == "select":
+                chosen = [o for o in c["options"] if o["selected"]][-1:] or c["options"][:1]
+                pairs.extend((c["name"], self._option_value(o)) for o in chosen)
+            elif kind == "textarea":  # browsers submit CRLF line breaks
+                pairs.append((c["name"], c["value"].replace("\r\n", "\n").replace("\n", "\r\n")))
+            elif kind == "file":
+                pairs.append((c["name"], ""))  # no file chosen
+            else:
+                pairs.append((c["name"], c["value"] or ""))
+        return pairs
+
+
+def make_http_session(pool_size=4):
+    """A requests session with room for `pool_size` keep-alive connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch(session, url, timeout, params=None):
+    r = session.get(url, params=params, timeout=timeout)
+    r.raise_for_status()
+    if "charset" not in r.headers.get("Content-Type", ""):
+        r.encoding = "utf-8"  # http.server sends no charset; requests would fall back to Latin-1
+    return r
+
+
+def run_over_http(session, scenario, form_url, timeout=10):
+    """
+    Fill the form with FormPage and submit it without a browser. The real
+    check is check_submission() on the query string. The "Received!" check
+    only confirms the target page loaded, since site/submitted-form.html
+    is static.
+    """
+    r = fetch(session, form_url, timeout)
+    page = FormPage(r.text)
+    if page.action is None or page.method != "get":
+        raise ValueError(f"{form_url} has no GET form to submit")
+    for step in scenario.steps:
+        page.apply(*step)
+    r = fetch(session, urljoin(r.url, page.action), timeout, params=page.submission())
+    message = FormPage(r.text).message
+    if "Received!" not in (message or ""):
+        raise AssertionError(f"#message is {message!r}, expected 'Received!'")
+    check_submission(scenario, r.url)
+    return message.strip()
+
+
+def plan_suite(scenarios, mode="auto"):
+    """[(scenario, "http" | "browser")], and the scenarios that can't run in this mode."""
+    if mode == "browser":
+        return [(s, "browser") for s in scenarios], []
+    plan = [(s, "browser" if s.needs_browser else "http") for s in scenarios]
+    if mode == "http" or webdriver is None:
+        return [p for p in plan if p[1] == "http"], [s for s, m in plan if m == "browser"]
+    return plan, []
+
+
+def run_suite(plan, form_url, timeout=10, pool=None, session=None, workers=4):
+    """Run a plan from plan_suite(); HTTP and browser scenarios proceed side by side."""
+    def one(scenario, mode):
+        t0 = time.perf_counter()
+        try:
+            if mode == "http":
+                run_over_http(session, scenario, form_url, timeout)
+            else:
+                with pool.session() as driver:
+                    run_in_browser(driver, scenario, form_url, timeout)
+            return Result(scenario.name, mode, True, time.perf_counter() - t0, "")
+        except Exception as e:  # assertion, wait timeout or browser error: report it, keep going
+            first_line = (str(e).strip().splitlines() or [""])[0]  # WebDriver errors carry a stack trace
+            return Result(scenario.name, mode, False, time.perf_counter() - t0, f"{type(e).__name__}: {first_line}")
+
+    with ThreadPoolExecutor(max_workers=workers) as fast, \
+            ThreadPoolExecutor(max_workers=pool.size if pool else 1) as slow:
+        futures = [(slow if mode == "browser" else fast).submit(one, s, mode) for s, mode in plan]
+        return [f.result() for f in futures]
+
+
+def select_scenarios(scenarios, keyword=None, repeat=1):
+    chosen = [s for s in scenarios if not keyword or keyword.lower() in s.name.lower()]
+    if repeat > 1:
+        chosen = [s._replace(name=f"{s.name} #{i + 1}") for i in range(repeat) for s in chosen]
+    return chosen
+
+
+def print_report(results, wall, pool=None, skipped=()):
+    for r in results:
+        print(f"{'PASS' if r.ok else 'FAIL'}  {r.seconds * 1e3:8.1f} ms  {r.mode:<7}  {r.name}")
+        if not r.ok:
+            print(f"      {r.error}")
+    for s in skipped:
+        print(f"SKIP               browser  {s.name}")
+    passed = sum(r.ok for r in results)
+    print(f"\n{passed}/{len(results)} passed" + (f", {len(skipped)} skipped (need a browser)" if skipped else "")
+          + f"; {wall:.2f}s wall, {len(results) / max(wall, 1e-9) * 60:,.0f} tests/min")
+    for mode in ("http", "browser"):
+        times = [r.seconds for r in results if r.mode == mode]
+        if times:
+            print(f"  {mode:<7} {len(times):5d} tests, {sum(times) / len(times) * 1e3:8.1f} ms/test")
+    if pool:
+        print(f"  {pool.launched} browser(s) started in {pool.startup_seconds:.1f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the web-form scenarios in parallel, over HTTP or in warm browsers")
+    ap.add_argument("--mode", choices=["auto", "browser", "http"], default="auto",
+                    help="auto: a browser only for scenarios that need one; http: skip those")
+    ap.add_argument("--workers", type=int, default=4, help="browser sessions (and HTTP threads) in parallel")
+    ap.add_argument("--browser", choices=["chrome", "firefox"], default="chrome")
+    ap.add_argument("--headed", action="store_true", help="show the browser windows")
+    ap.add_argument("--repeat", type=int, default=1, help="run the suite this many times")
+    ap.add_argument("-k", dest="keyword", help="only scenarios whose name contains this")
+    ap.add_argument("--timeout", type=float, default=10, help="seconds an explicit wait may take")
+    ap.add_argument("--url", help="form page to test instead of the bundled local copy")
+    args = ap.parse_args()
+
+    scenarios = select_scenarios(SCENARIOS, args.keyword, args.repeat)
+    if not scenarios:
+        raise SystemExit("No scenarios match")
+    if args.mode == "browser" and webdriver is None:
+        raise SystemExit("selenium is not installed (pip install selenium)")
+    plan, skipped = plan_suite(scenarios, args.mode)
+    if skipped and args.mode == "auto":
+        print(f"selenium is not installed: skipping {len(skipped)} scenario(s) that need a browser")
+    in_browser = sum(mode == "browser" for _, mode in plan)
+    pool = None
+    with contextlib.ExitStack() as stack:
+        form_url = args.url or stack.enter_context(FormServer()).base_url + "web-form.html"
+        session = stack.enter_context(make_http_session(args.workers))
+        if in_browser:
+            try:
+                pool = BrowserPool(min(args.workers, in_browser), args.browser, headless=not args.headed)
+            except (WebDriverException, RuntimeError) as e:
+                reason = f"{type(e).__name__}: {(str(e).strip().splitlines() or [''])[0]}"
+                if args.mode == "browser":
+                    raise SystemExit(f"Could not start {args.browser}: {reason}")
+                print(f"Could not start {args.browser} ({reason}); skipping {in_browser} scenario(s) that need it")
+                skipped += [s for s, mode in plan if mode == "browser"]
+                plan = [p for p in plan if p[1] == "http"]
+            else:
+                stack.callback(pool.close)
+        t0 = time.perf_counter()
+        results = run_suite(plan, form_url, args.timeout, pool, session, args.workers)
+        wall = time.perf_counter() - t0
+    print_report(results, wall, pool, skipped)
+    sys.exit(0 if all(r.ok for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: HTTP fast path vs warm browser pool on the same form scenarios.
+
+Serves the local form page and runs the scenarios that don't need a
+browser (--repeat times over) three ways:
+
+  * over HTTP with a pooled keep-alive session;
+  * over HTTP with a connection per request;
+  * in a BrowserPool of --workers headless browsers.
+
+It then runs the full suite in auto mode (HTTP where possible, browser
+for the rest). Throughput, per-test latency and pass counts are printed.
+The two paths don't verify the same thing: over HTTP only the submitted
+query string is checked, while the browser also runs the page's script
+and widgets, so the speed-up compares a narrower check with a full one.
+Browser runs are skipped, with the reason, when selenium or a browser
+isn't available.
+
+    python bench_automation.py --repeat 50 --workers 4 --browser chrome
+"""
+
+import argparse
+import time
+
+from AUTOMATION import SCENARIOS, BrowserPool, FormServer, make_http_session, plan_suite, run_suite, \
+    select_scenarios
+
+
+def summary(label, results, wall):
+    times = sorted(r.seconds for r in results)
+    pct = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1e3
+    passed = sum(r.ok for r in results)
+    print(f"{label:<26} {len(results):5d} tests  {wall:7.2f}s  {len(results) / wall * 60:>10,.0f} tests/min  "
+          f"p50 {pct(0.5):7.1f} ms  p95 {pct(0.95):7.1f} ms  {passed}/{len(results)} passed")
+    for r in results:
+        if not r.ok:
+            print(f"    FAIL {r.name}: {r.error}")
+            break
+    return len(results) / wall
+
+
+def timed(plan, form_url, **kw):
+    t0 = time.perf_counter()
+    results = run_suite(plan, form_url, **kw)
+    return results, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--browser", choices=["chrome", "firefox"], default="chrome")
+    args = ap.parse_args()
+
+    scenarios = select_scenarios(SCENARIOS, repeat=args.repeat)
+    http_plan, browser_only = plan_suite(scenarios, "http")
+    print(f"{len(SCENARIOS)} scenarios x {args.repeat}: {len(http_plan)} can skip the browser, "
+          f"{len(browser_only)} need one; {args.workers} workers")
+
+    with FormServer() as server, make_http_session(args.workers) as session:
+        url = server.base_url + "web-form.html"
+        http_rate = summary("http, keep-alive pool", *timed(http_plan, url, session=session, workers=args.workers))
+        with make_http_session(args.workers) as closing:
+            closing.headers["Connection"] = "close"
+            summary("http, connection per req", *timed(http_plan, url, session=closing, workers=args.workers))
+
+        try:
+            pool = BrowserPool(args.workers, args.browser)
+        except Exception as e:  # no selenium, no browser or no driver
+            print(f"browser runs skipped: {type(e).__name__}: {(str(e).strip().splitlines() or [''])[0]}")
+            return
+        try:
+            print(f"{pool.launched} {args.browser} session(s) started in {pool.startup_seconds:.1f}s")
+            browser_plan = [(s, "browser") for s, _ in http_plan]
+            browser_rate = summary("browser pool, same tests",
+                                   *timed(browser_plan, url, pool=pool, workers=args.workers))
+            auto_plan, _ = plan_suite(scenarios, "auto")
+            summary("auto, full suite", *timed(auto_plan, url, pool=pool, session=session, workers=args.workers))
+            print(f"HTTP fast path: {http_rate / browser_rate:,.0f}x the browser's throughput on the same scenarios "
+                  f"(query string checked only; the browser also runs the page)")
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: images/sec of the batched classifier by batch size and decode threads.
+
+Uses the images in --images (a folder) or generates --count random JPEGs,
+then reports wall time, images/sec and the time spent in each stage
+(decode, preprocess, infer).
+
+    python bench_classify.py --weights mobilenet_v2-b0353104.pth --count 256 --batch-sizes 1 8 32
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from classify_images import ClassifierEngine, StageTimes, expand_inputs, WEIGHTS_FILE
+
+
+def make_images(folder, count, size=(640, 480)):
+    from PIL import Image
+
+    rnd = random.Random(0)
+    paths = []
+    for i in range(count):
+        img = Image.effect_noise(size, rnd.randint(20, 80)).convert("RGB")
+        path = os.path.join(folder, f"img_{i:05d}.jpg")
+        img.save(path, "JPEG", quality=85)
+        paths.append(path)
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--weights", default=WEIGHTS_FILE)
+    ap.add_argument("--images", help="folder of images (default: generate)")
+    ap.add_argument("--count", type=int, default=256)
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    engine = ClassifierEngine(args.weights)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = expand_inputs([args.images]) if args.images else make_images(tmp, args.count)
+        engine.infer([engine.prepare(paths[0])])  # warm-up
+        for workers in args.workers:
+            for bs in args.batch_sizes:
+                times = StageTimes()
+                t0 = time.perf_counter()
+                for _ in engine.classify_paths(paths, bs, 5, workers, times):
+                    pass
+                summary = times.summary(time.perf_counter() - t0)
+                print(json.dumps({"batch_size": bs, "workers": workers, **summary}))
+
+
+if __name__ == "__main__":
+    main()
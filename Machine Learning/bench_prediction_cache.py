@@ -0,0 +1,48 @@
+"""
+Benchmark: cold run vs re-run of an unchanged folder with the prediction cache.
+
+    python bench_prediction_cache.py --weights mobilenet_v2-b0353104.pth --count 10000
+
+The second pass should only stat each file and look it up in the cache.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench_classify import make_images
+from classify_images import ClassifierEngine, StageTimes, expand_inputs, WEIGHTS_FILE
+from prediction_cache import PredictionCache
+
+
+def run(engine, paths, cache_path, weights, batch_size):
+    cache = PredictionCache(cache_path, weights)
+    times = StageTimes()
+    t0 = time.perf_counter()
+    for _ in engine.classify_paths(paths, batch_size, 5, None, times, cache):
+        pass
+    wall = time.perf_counter() - t0
+    cache.close()
+    return {"wall_s": round(wall, 2), "decoded": times.images, **cache.stats()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--weights", default=WEIGHTS_FILE)
+    ap.add_argument("--images", help="folder of images (default: generate)")
+    ap.add_argument("--count", type=int, default=10000)
+    ap.add_argument("--batch-size", type=int, default=32)
+    args = ap.parse_args()
+
+    engine = ClassifierEngine(args.weights)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = expand_inputs([args.images]) if args.images else make_images(tmp, args.count, (320, 240))
+        cache_path = os.path.join(tmp, "cache.sqlite3")
+        print(json.dumps({"pass": "cold", **run(engine, paths, cache_path, args.weights, args.batch_size)}))
+        print(json.dumps({"pass": "warm", **run(engine, paths, cache_path, args.weights, args.batch_size)}))
+
+
+if __name__ == "__main__":
+    main()
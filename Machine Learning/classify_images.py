@@ -1,34 +1,271 @@
-from imageai.Classification import ImageClassification
-import os
-import sys
-
-def main():
-    exec_path = os.getcwd()
-
-    # Path to model weights
-    weights_path = os.path.join(exec_path, "mobilenet_v2-b0353104.pth")
-    if not os.path.isfile(weights_path):
-        sys.exit("ERROR: mobilenet_v2-b0353104.pth not found in folder!")
-
-    # Initialize classifier
-    classifier = ImageClassification()
-    classifier.setModelTypeAsMobileNetV2()
-    classifier.setModelPath(weights_path)
-    classifier.loadModel()
-
-    # Images to classify
-    images = ["house.jpg", "godzilla.jpg", "giraffe.jpg"]
-
-    for img_name in images:
-        img_path = os.path.join(exec_path, img_name)
-        if not os.path.isfile(img_path):
-            print(f"SKIP: {img_name} not found.")
-            continue
-
-        print(f"\n----- Top-5 for {img_name} -----")
-        predictions, probabilities = classifier.classifyImage(img_path, result_count=5)
-        for label, prob in zip(predictions, probabilities):
-            print(f"{label:<25} : {prob:6.2f}%")
-
-if __name__ == "__main__":
-    main()
+"""
+Batched MobileNetV2 image classifier.
+
+Loads the MobileNetV2 weights once, decodes and preprocesses images on a
+thread pool, runs inference in batches and streams the top-k predictions
+as JSON-Lines (one object per image). Results are cached by image content
+and weights hash (see prediction_cache.py), so unchanged images are not
+even opened on the next run.
+
+    python classify_images.py photos/ "more/**/*.jpg" --batch-size 32 --top 5
+
+With no inputs it classifies house.jpg, godzilla.jpg and giraffe.jpg from
+the current folder. The weights file is the torchvision MobileNetV2 state
+dict (the same file imageai loads). Preprocessing is torchvision's
+Resize(256) + CenterCrop(224), but JPEGs are first decoded at reduced
+scale by libjpeg, so probabilities can differ slightly from imageai's and
+close top-k ranks may swap.
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prediction_cache import PredictionCache, hash_bytes
+
+WEIGHTS_FILE = "mobilenet_v2-b0353104.pth"
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".classify_cache.sqlite3")
+DEFAULT_IMAGES = ["house.jpg", "godzilla.jpg", "giraffe.jpg"]
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+INPUT_SIZE = 224
+RESIZE_SIZE = 256
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+
+
+def expand_inputs(inputs):
+    """Turn files, folders (searched recursively) and glob patterns into a list of image paths."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, dirnames, filenames in os.walk(item):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTS:
+                        paths.append(os.path.join(dirpath, name))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(p for p in sorted(glob.glob(item, recursive=True)) if os.path.isfile(p))
+        else:
+            paths.append(item)
+    return paths
+
+
+class StageTimes:
+    """Thread-safe running totals (seconds) per pipeline stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {"decode": 0.0, "preprocess": 0.0, "infer": 0.0}
+        self.images = 0
+        self.batches = 0
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.totals[stage] += seconds
+
+    def summary(self, wall):
+        per = {k: round(v, 3) for k, v in self.totals.items()}
+        return {
+            "images": self.images,
+            "batches": self.batches,
+            "wall_s": round(wall, 3),
+            "images_per_s": round(self.images / wall, 1) if wall else 0.0,
+            "stage_s": per,
+        }
+
+
+class ClassifierEngine:
+    """MobileNetV2 loaded once; classify any number of images in batches."""
+
+    def __init__(self, weights_path, threads=None):
+        import torch
+        from PIL import Image
+        from torchvision import models, transforms
+
+        self.torch = torch
+        self.Image = Image
+        if threads:
+            torch.set_num_threads(threads)
+        self.weights_path = weights_path
+        self.model = self._load(weights_path)
+        self.labels = models.MobileNet_V2_Weights.IMAGENET1K_V1.meta["categories"]
+        self.transform = transforms.Compose([
+            transforms.Resize(RESIZE_SIZE),
+            transforms.CenterCrop(INPUT_SIZE),
+            transforms.ToTensor(),
+            transforms.Normalize(MEAN, STD),
+        ])
+
+    def reload(self, weights_path=None):
+        """Load new weights next to the live model, then swap them in."""
+        path = weights_path or self.weights_path
+        model = self._load(path)
+        self.model, self.weights_path = model, path
+
+    def _load(self, weights_path):
+        from torchvision import models
+
+        model = models.mobilenet_v2(weights=None)
+        model.load_state_dict(self.torch.load(weights_path, map_location="cpu"))
+        model.eval()
+        return model
+
+    def decode(self, source):
+        """Open a path or file object as an RGB image; JPEGs are decoded at reduced size."""
+        img = self.Image.open(source)
+        # let libjpeg scale down while decoding; Resize() does the rest
+        img.draft("RGB", (RESIZE_SIZE, RESIZE_SIZE))
+        return img.convert("RGB")
+
+    def prepare(self, source, times=None):
+        """decode + preprocess -> CHW float tensor."""
+        t0 = time.perf_counter()
+        img = self.decode(source)
+        t1 = time.perf_counter()
+        tensor = self.transform(img)
+        t2 = time.perf_counter()
+        if times is not None:
+            times.add("decode", t1 - t0)
+            times.add("preprocess", t2 - t1)
+        return tensor
+
+    def infer(self, tensors, result_count=5, times=None):
+        """Run one batch; returns [(labels, probabilities_percent), ...]."""
+        t0 = time.perf_counter()
+        model = self.model  # a concurrent reload() must not change the model mid-batch
+        with self.torch.inference_mode():
+            probs = self.torch.softmax(model(self.torch.stack(tensors)), dim=1) * 100
+            top_p, top_i = probs.topk(result_count, dim=1)
+        if times is not None:
+            times.add("infer", time.perf_counter() - t0)
+        return [
+            ([self.labels[i] for i in idx], [round(float(p), 4) for p in ps])
+            for idx, ps in zip(top_i.tolist(), top_p.tolist())
+        ]
+
+    def classify_paths(self, paths, batch_size=16, result_count=5, workers=None, times=None,
+                       cache=None):
+        """
+        Yield one result dict per path, in input order. Decoding of the next
+        batch runs on the thread pool while the current batch is in inference,
+        and at most two batches of decoded images are held at once. With a
+        PredictionCache, hits on unchanged files are answered without opening
+        the image; other files are read once on a worker, which hashes and
+        decodes the same bytes.
+        """
+        workers = workers or os.cpu_count() or 1
+
+        def load(path, hashed):
+            try:
+                if not hashed:
+                    return self.prepare(path, times), None, None
+                st = os.stat(path)
+                with open(path, "rb") as f:
+                    data = f.read()
+                stamp = (st.st_size, st.st_mtime_ns, hash_bytes(data))
+                return self.prepare(io.BytesIO(data), times), None, stamp
+            except Exception as e:
+                return None, f"{type(e).__name__}: {e}", None
+
+        def submit(batch):
+            planned = []
+            for path in batch:
+                try:
+                    digest = cache.known_hash(path) if cache else None
+                except OSError:  # vanished or unreadable: the worker hits it again and reports this file
+                    digest = None
+                cached = cache.lookup(digest, result_count) if digest else None
+                future = None if cached is not None else pool.submit(load, path, cache is not None and digest is None)
+                planned.append((path, digest, cached, future))
+            return planned
+
+        def finish(path, digest, cached, future):
+            if future is None:
+                return path, digest, cached, (None, None)
+            tensor, err, stamp = future.result()
+            if stamp:  # hashed on the worker; the sqlite connection stays on this thread
+                size, mtime_ns, digest = stamp
+                cache.remember(path, size, mtime_ns, digest)
+                cached = cache.lookup(digest, result_count)  # same content under another path
+            return path, digest, cached, (tensor, err)
+
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = submit(batches[0]) if batches else []
+            for n in range(len(batches)):
+                planned = [finish(*p) for p in pending]
+                if n + 1 < len(batches):
+                    pending = submit(batches[n + 1])
+                todo = [t for _, _, c, (t, _) in planned if c is None and t is not None]
+                preds = iter(self.infer(todo, result_count, times) if todo else [])
+                for path, digest, cached, (tensor, err) in planned:
+                    if cached is not None:
+                        yield {"image": path, "predictions": cached}
+                        continue
+                    if tensor is None:
+                        yield {"image": path, "error": err}
+                        continue
+                    labels, probs = next(preds)
+                    result = [{"label": l, "probability": p} for l, p in zip(labels, probs)]
+                    if cache:
+                        cache.put(digest, result_count, result)
+                    yield {"image": path, "predictions": result}
+                if cache:
+                    cache.commit()
+                if times is not None:
+                    times.images += len(todo)
+                    times.batches += 1 if todo else 0
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Classify images with MobileNetV2 (batched, JSON-Lines output)")
+    ap.add_argument("inputs", nargs="*", help="image files, folders or glob patterns")
+    ap.add_argument("--weights", default=os.path.join(os.getcwd(), WEIGHTS_FILE))
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--top", type=int, default=5, help="predictions per image")
+    ap.add_argument("--workers", type=int, default=None, help="decode threads (default: CPU count)")
+    ap.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    ap.add_argument("--out", help="write JSON-Lines here instead of stdout")
+    ap.add_argument("--cache", default=CACHE_FILE, help="prediction cache database (default: next to this script)")
+    ap.add_argument("--no-cache", action="store_true", help="always recompute")
+    ap.add_argument("--cache-max-entries", type=int, default=1_000_000)
+    return ap
+
+
+def main():
+    args = build_parser().parse_args()
+    if not os.path.isfile(args.weights):
+        sys.exit(f"ERROR: {os.path.basename(args.weights)} not found in folder!")
+
+    paths = expand_inputs(args.inputs or DEFAULT_IMAGES)
+    for p in [p for p in paths if not os.path.isfile(p)]:
+        print(f"SKIP: {p} not found.", file=sys.stderr)
+    paths = [p for p in paths if os.path.isfile(p)]
+
+    engine = ClassifierEngine(args.weights, threads=args.threads)
+    cache = None if args.no_cache else PredictionCache(args.cache, args.weights, args.cache_max_entries)
+    times = StageTimes()
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    try:
+        for result in engine.classify_paths(paths, args.batch_size, args.top, args.workers, times, cache):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if cache:
+            cache.close()
+    summary = times.summary(time.perf_counter() - t0)
+    if cache:
+        summary["cache"] = cache.stats()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
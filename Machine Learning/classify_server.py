@@ -0,0 +1,286 @@
+"""
+Resident classification service.
+
+Keeps one warm ClassifierEngine and answers over HTTP (TCP or a Unix
+socket). Request handler threads decode and preprocess their own image,
+then hand the tensor to a single batcher thread that merges concurrent
+requests into micro-batches: a batch runs when it is full or when its
+oldest request has waited ``--max-wait-ms``.
+
+    python classify_server.py --port 8500 --max-batch 32 --max-wait-ms 5
+    curl --data-binary @giraffe.jpg "http://127.0.0.1:8500/classify?top=5"
+
+Endpoints:
+    POST /classify[?top=K]   body = image bytes -> {"predictions": [...]}
+                             400 bad image, 503 batch queue full, 504 timed out
+    POST /reload             reload the --weights file (also on SIGHUP), no downtime
+    GET  /stats              latency p50/p99, batch fill ratio, counters
+"""
+
+import argparse
+import io
+import json
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from classify_images import ClassifierEngine, WEIGHTS_FILE
+
+
+class BadImage(ValueError):
+    """The request body could not be decoded as an image."""
+
+
+class _Pending:
+    __slots__ = ("tensor", "top", "event", "result", "error")
+
+    def __init__(self, tensor, top):
+        self.tensor = tensor
+        self.top = top
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Merges concurrent infer requests into batches of up to ``max_batch``."""
+
+    def __init__(self, engine, max_batch=32, max_wait=0.005, max_queue=1024):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._q = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.batched_items = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def infer(self, tensor, top, timeout=30.0):
+        item = _Pending(tensor, top)
+        self._q.put_nowait(item)  # queue.Full when backed up: answer 503 now rather than queue more
+        if not item.event.wait(timeout):
+            raise TimeoutError("inference timed out")
+        if item.error:
+            raise item.error
+        return item.result
+
+    def _run(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            top = max(p.top for p in batch)
+            try:
+                results = self.engine.infer([p.tensor for p in batch], top)
+                for p, (labels, probs) in zip(batch, results):
+                    p.result = (labels[:p.top], probs[:p.top])
+            except Exception as e:
+                for p in batch:
+                    p.error = e
+            with self._lock:
+                self.batches += 1
+                self.batched_items += len(batch)
+            for p in batch:
+                p.event.set()
+
+    def fill_ratio(self):
+        with self._lock:
+            if not self.batches:
+                return 0.0
+            return self.batched_items / (self.batches * self.max_batch)
+
+
+class LatencyStats:
+    """Rolling window of request latencies (seconds)."""
+
+    def __init__(self, window=10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self._samples.append(seconds)
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, q):
+        with self._lock:
+            data = sorted(self._samples)
+        if not data:
+            return 0.0
+        return data[min(len(data) - 1, int(q / 100 * len(data)))]
+
+
+class ClassifyService:
+    def __init__(self, engine, max_batch=32, max_wait=0.005, max_top=10):
+        self.engine = engine
+        self.batcher = MicroBatcher(engine, max_batch, max_wait)
+        self.latency = LatencyStats()
+        self.max_top = max_top
+        self.reloads = 0
+        self._reload_lock = threading.Lock()
+
+    def classify(self, data, top):
+        try:
+            tensor = self.engine.prepare(io.BytesIO(data))
+        except Exception as e:
+            raise BadImage(f"{type(e).__name__}: {e}") from e
+        labels, probs = self.batcher.infer(tensor, min(max(1, top), self.max_top))
+        return [{"label": l, "probability": p} for l, p in zip(labels, probs)]
+
+    def reload(self):
+        """Reload the weights file the server was started with (torch.load unpickles, so never a client path)."""
+        with self._reload_lock:
+            self.engine.reload()
+            self.reloads += 1
+
+    def stats(self):
+        return {
+            "requests": self.latency.requests,
+            "errors": self.latency.errors,
+            "latency_p50_ms": round(self.latency.percentile(50) * 1000, 2),
+            "latency_p99_ms": round(self.latency.percentile(99) * 1000, 2),
+            "batches": self.batcher.batches,
+            "batched_items": self.batcher.batched_items,
+            "batch_fill_ratio": round(self.batcher.fill_ratio(), 3),
+            "max_batch": self.batcher.max_batch,
+            "reloads": self.reloads,
+            "weights": self.engine.weights_path,
+        }
+
+
+def make_handler(service, tcp=True):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for load generators
+        disable_nagle_algorithm = tcp  # headers and body go out in separate writes
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlsplit(self.path).path == "/stats":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if url.path == "/classify":
+                t0 = time.perf_counter()
+                try:
+                    top = int(params.get("top", ["5"])[0])
+                except ValueError:
+                    self._send(400, {"error": "top must be an integer"})
+                    return
+                try:
+                    preds = service.classify(data, top)
+                except Exception as e:
+                    service.latency.record(time.perf_counter() - t0, ok=False)
+                    if isinstance(e, BadImage):
+                        status = 400
+                    elif isinstance(e, queue.Full):  # batcher queue full: shed load
+                        status = 503
+                    elif isinstance(e, TimeoutError):
+                        status = 504
+                    else:
+                        status = 500
+                    self._send(status, {"error": f"{type(e).__name__}: {e}"})
+                    return
+                service.latency.record(time.perf_counter() - t0)
+                self._send(200, {"predictions": preds})
+            elif url.path == "/reload":
+                if params:
+                    self._send(400, {"error": "reload takes no parameters; replace the --weights file instead"})
+                    return
+                try:
+                    service.reload()
+                except Exception as e:
+                    self._send(500, {"error": f"{type(e).__name__}: {e}"})
+                    return
+                self._send(200, {"reloaded": service.engine.weights_path})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class ThreadingHTTPServerWithBacklog(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops connection bursts
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)  # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve MobileNetV2 classification with request micro-batching")
+    ap.add_argument("--weights", default=os.path.join(os.getcwd(), WEIGHTS_FILE))
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8500)
+    ap.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = ap.parse_args()
+    if not os.path.isfile(args.weights):
+        sys.exit(f"ERROR: {os.path.basename(args.weights)} not found in folder!")
+
+    service = ClassifyService(ClassifierEngine(args.weights, threads=args.threads),
+                              args.max_batch, args.max_wait_ms / 1000)
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        httpd = ThreadingUnixHTTPServer(args.unix, make_handler(service, tcp=False))
+        where = args.unix
+    else:
+        httpd = ThreadingHTTPServerWithBacklog((args.host, args.port), make_handler(service))
+        where = f"http://{args.host}:{args.port}"
+
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=service.reload).start())
+    print(f"Model loaded; serving on {where} (Ctrl+C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        print(json.dumps(service.stats()))
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
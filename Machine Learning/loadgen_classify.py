@@ -0,0 +1,126 @@
+"""
+Load generator for classify_server.py: throughput vs latency under concurrency.
+
+Each client thread keeps one keep-alive connection and posts images in a
+loop for --duration seconds. Prints one line per concurrency level with
+the failures split by kind (HTTP status, client timeout, connection error)
+and, from the server's /stats counters over the same interval, the
+average batch size and batch fill ratio the server actually ran.
+
+    python loadgen_classify.py giraffe.jpg --url http://127.0.0.1:8500 --concurrency 1 4 16 64
+    python loadgen_classify.py giraffe.jpg --unix /tmp/classify.sock
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix socket (classify_server.py --unix)."""
+
+    def __init__(self, path, timeout=60):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def connect(url, unix=None, timeout=60):
+    if unix:
+        return UnixHTTPConnection(unix, timeout)
+    parts = urlsplit(url)
+    return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+
+def client(url, unix, body, deadline, latencies, errors, lock):
+    conn = connect(url, unix)
+    local, failed = [], Counter()
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/classify?top=5", body, {"Content-Type": "application/octet-stream"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                failed[str(resp.status)] += 1  # 400 bad image, 503 queue full, 504 server timeout
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            failed["timeout" if isinstance(e, TimeoutError) else "connection"] += 1
+            conn.close()
+            conn = connect(url, unix)
+            continue
+        local.append(time.perf_counter() - t0)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors.update(failed)
+
+
+def pct(data, q):
+    return data[min(len(data) - 1, int(q / 100 * len(data)))] if data else 0.0
+
+
+def get_stats(url, unix=None):
+    conn = connect(url, unix, timeout=10)
+    conn.request("GET", "/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats
+
+
+def run(url, body, concurrency, duration, unix=None):
+    latencies, errors, lock = [], Counter(), threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(url, unix, body, deadline, latencies, errors, lock))
+               for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_kinds": dict(errors),
+        "rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(pct(latencies, 50) * 1000, 1),
+        "p99_ms": round(pct(latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("image")
+    ap.add_argument("--url", default="http://127.0.0.1:8500")
+    ap.add_argument("--unix", help="connect to this Unix socket instead of --url")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    args = ap.parse_args()
+
+    with open(args.image, "rb") as f:
+        body = f.read()
+    for c in args.concurrency:
+        before = get_stats(args.url, args.unix)
+        result = run(args.url, body, c, args.duration, args.unix)
+        after = get_stats(args.url, args.unix)
+        batches = after["batches"] - before["batches"]
+        items = after["batched_items"] - before["batched_items"]
+        result["avg_batch"] = round(items / batches, 1) if batches else 0.0
+        result["batch_fill"] = round(items / (batches * after["max_batch"]), 3) if batches else 0.0
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
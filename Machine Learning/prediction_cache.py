@@ -0,0 +1,167 @@
+"""
+Persistent cache of classification results.
+
+Results are keyed on (image content hash, weights file hash, result_count),
+so a changed image, a new ``mobilenet_v2-b0353104.pth`` or a different
+``--top`` all miss. Opening the cache with new weights drops every result
+computed with the old ones.
+
+Content hashes are themselves remembered per (path, size, mtime), so an
+unchanged file costs one ``os.stat`` and one indexed lookup; it is neither
+read nor decoded. A file that does need work is read once: the same bytes
+are hashed and decoded (see ``hash_bytes``). Both tables are size-bounded:
+predictions with least-recently-used eviction, remembered file hashes by
+dropping the ones no cached prediction uses, then the oldest.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    content_hash TEXT NOT NULL,
+    weights_hash TEXT NOT NULL,
+    result_count INTEGER NOT NULL,
+    result       TEXT NOT NULL,
+    last_used    REAL NOT NULL,
+    PRIMARY KEY (content_hash, weights_hash, result_count)
+);
+CREATE INDEX IF NOT EXISTS predictions_lru ON predictions (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path         TEXT PRIMARY KEY,
+    size         INTEGER NOT NULL,
+    mtime_ns     INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_bytes(data):
+    """Same digest as hash_file() for a file holding `data`."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, path, weights_path, max_entries=1_000_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._touched = []
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        self.weights_hash = self.content_hash(weights_path)
+        # results from any other weights file are stale now
+        self.conn.execute("DELETE FROM predictions WHERE weights_hash != ?", (self.weights_hash,))
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def known_hash(self, path):
+        """The remembered hash of `path` if its size and mtime haven't changed, else None. Never reads it."""
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    def remember(self, path, size, mtime_ns, digest):
+        """Record the hash of `path` as it was at (size, mtime_ns), e.g. after hashing it elsewhere."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            (path, size, mtime_ns, digest),
+        )
+        self._files += 1  # upper bound; recounted before evicting
+
+    def content_hash(self, path):
+        """Hash of the file's bytes, recomputed only when size or mtime changed."""
+        digest = self.known_hash(path)
+        if digest is None:
+            st = os.stat(path)
+            digest = hash_file(path)
+            self.remember(path, st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def lookup(self, digest, result_count):
+        """Cached result for a content hash, or None."""
+        row = self.conn.execute(
+            "SELECT result FROM predictions WHERE content_hash = ? AND weights_hash = ? AND result_count = ?",
+            (digest, self.weights_hash, result_count),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append((digest,))
+        return json.loads(row[0])
+
+    def get(self, path, result_count):
+        """(content_hash, cached result or None)."""
+        digest = self.content_hash(path)
+        return digest, self.lookup(digest, result_count)
+
+    def put(self, digest, result_count, result):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO predictions (content_hash, weights_hash, result_count, result, last_used)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (digest, self.weights_hash, result_count, json.dumps(result), time.time()),
+        )
+        self._count += 1  # upper bound; recounted before evicting
+
+    def commit(self):
+        """Write LRU timestamps for hits, evict past max_entries, commit."""
+        if self._touched:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE predictions SET last_used = ? WHERE content_hash = ? AND weights_hash = ?",
+                [(now, d, self.weights_hash) for (d,) in self._touched],
+            )
+            self._touched = []
+        if self._count > self.max_entries:
+            self._count = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            excess = self._count - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN"
+                    " (SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self.evicted += excess
+                self._count -= excess
+        if self._files > self.max_entries:
+            self._evict_files()
+        self.conn.commit()
+
+    def _evict_files(self):
+        # hashes no cached prediction needs go first, then the longest-unchanged paths
+        self.conn.execute(
+            "DELETE FROM files WHERE content_hash NOT IN (SELECT content_hash FROM predictions)"
+        )
+        self._files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        excess = self._files - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM files WHERE rowid IN (SELECT rowid FROM files ORDER BY rowid LIMIT ?)", (excess,)
+            )
+            self._files -= excess
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+    def close(self):
+        self.commit()
+        self.conn.close()
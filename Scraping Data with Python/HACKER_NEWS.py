@@ -6,36 +6,138 @@
 #   filters by minimum vote threshold, sorts by votes,
 #   and prints a neat list. Uses the updated `.titleline > a`
 #   selector (Hacker News changed from `.storylink`).
+#   Pages are fetched concurrently over one pooled
+#   keep-alive session, rate limited per host, and
+#   parsed by a pluggable backend (see PARSER).
 # ============================================
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-import json
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, Iterator, List, Dict, Optional
+from urllib.parse import urlsplit
+import hashlib
+import random
+import re
 import sys
+import threading
+import time
+
+from hn_export import TopK, open_exporter
+from hn_index import StoryIndex
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
 
 # --------- Simple Config (tweak these) ----------
 NUM_PAGES = 2          # how many HN pages to fetch (1..5 is sensible)
 MIN_VOTES = 100        # only include stories with at least this many points
-EXPORT_JSON = False    # set True to also save results to hn_top_stories.json
+EXPORT_PATH = None     # e.g. "hn_stories.jsonl" (.jsonl.gz, .jsonl.zst, .parquet, .arrow); written page by page
+TOP_K = None           # keep only the K best stories (bounded heap) instead of sorting everything
+CONCURRENCY = 4        # pages fetched at the same time (1 = one after another)
+MAX_RPS_PER_HOST = 4.0 # request starts per second per host (0 = unlimited)
+RETRIES = 3            # extra attempts for timeouts, 429 and 5xx responses
+PARSER = "stream"      # "stream" (single pass, stdlib), "lxml" or "bs4" (full tree)
+INDEX_DB = None        # e.g. "hn_index.sqlite3": persistent story index for incremental runs (opt-in)
 # ------------------------------------------------
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; HN-Scraper/1.0; +https://news.ycombinator.com/)"
 }
 BASE_URL = "https://news.ycombinator.com/news"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+COMMENTS_RE = re.compile(r"(\d+)\s*comments?$")
+
+class HostRateLimiter:
+    """Spaces out request starts so each host sees at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def make_session(pool_size: int = CONCURRENCY) -> requests.Session:
+    """A keep-alive session whose connection pool fits `pool_size` workers."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def page_url(page: int, base_url: str = BASE_URL) -> str:
+    return base_url if page == 1 else f"{base_url}?p={page}"
 
-def fetch_page(page: int = 1) -> Optional[BeautifulSoup]:
+def fetch_response(session: requests.Session, url: str, limiter: Optional[HostRateLimiter] = None,
+                   retries: int = RETRIES, headers: Optional[Dict] = None) -> requests.Response:
+    """GET `url` with retries and full-jitter exponential backoff."""
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.wait(url)
+        try:
+            resp = session.get(url, headers=headers, timeout=15)
+            if resp.status_code not in RETRY_STATUS:
+                resp.raise_for_status()
+                return resp
+            error = requests.HTTPError(f"{resp.status_code} for {url}", response=resp)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == retries:
+            raise error
+        time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+def fetch_html(session: requests.Session, url: str, limiter: Optional[HostRateLimiter] = None,
+               retries: int = RETRIES) -> str:
+    return fetch_response(session, url, limiter, retries).text
+
+def fetch_page(page: int = 1, session: Optional[requests.Session] = None,
+               limiter: Optional[HostRateLimiter] = None,
+               base_url: str = BASE_URL) -> Optional[BeautifulSoup]:
     """Fetch a Hacker News page and return a BeautifulSoup object."""
     try:
-        url = BASE_URL if page == 1 else f"{BASE_URL}?p={page}"
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-        resp.raise_for_status()
-        return BeautifulSoup(resp.text, "html.parser")
+        if session is None:
+            with make_session(1) as own:
+                html = fetch_html(own, page_url(page, base_url), limiter)
+        else:
+            html = fetch_html(session, page_url(page, base_url), limiter)
+        return BeautifulSoup(html, "html.parser")
     except Exception as e:
         print(f"[WARN] Failed to fetch page {page}: {e}", file=sys.stderr)
         return None
 
+def _text(strings) -> str:
+    """Same result as BeautifulSoup's get_text(strip=True)."""
+    return "".join(t.strip() for t in strings if t.strip())
+
+def _points(text: str) -> Optional[int]:
+    """'123 points' -> 123."""
+    try:
+        return int(text.split()[0])
+    except Exception:
+        return None
+
+def _comment_count(text: str) -> Optional[int]:
+    """'45 comments' -> 45, 'discuss' -> 0, anything else -> None."""
+    if text == "discuss":
+        return 0
+    m = COMMENTS_RE.match(text)
+    return int(m.group(1)) if m else None
+
 def parse_stories_from_soup(soup: BeautifulSoup) -> List[Dict]:
     """
     Robustly parse stories by walking each 'tr.athing' row (a single HN story row),
@@ -60,14 +162,158 @@ def parse_stories_from_soup(soup: BeautifulSoup) -> List[Dict]:
             continue
 
         # Extract numeric points like "123 points"
-        try:
-            points = int(score_el.get_text(strip=True).split()[0])
-        except Exception:
+        points = _points(score_el.get_text(strip=True))
+        if points is None:
             continue
 
-        results.append({"title": title, "link": link, "votes": points})
+        author_el = subtext_row.select_one(".hnuser")
+        comments = 0
+        for a in subtext_row.find_all("a"):
+            n = _comment_count(a.get_text(strip=True))
+            if n is not None:
+                comments = n
+
+        results.append({
+            "id": story_row.get("id", ""),
+            "title": title,
+            "link": link,
+            "votes": points,
+            "author": author_el.get_text(strip=True) if author_el else "",
+            "comments": comments,
+        })
+    return results
+
+def _xclass(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+def parse_stories_lxml(html: str) -> List[Dict]:
+    """Same output as parse_stories_from_soup, using lxml's C parser and XPath."""
+    results = []
+    doc = lxml_html.fromstring(html)
+    for story_row in doc.xpath(f"//tr[{_xclass('athing')}]"):
+        title_link = story_row.xpath(f".//*[{_xclass('titleline')}]/a")
+        if not title_link:
+            continue
+        title_link = title_link[0]
+        subtext_row = next(story_row.itersiblings("tr"), None)
+        if subtext_row is None:
+            continue
+        score_el = subtext_row.xpath(f".//*[{_xclass('score')}]")
+        if not score_el:
+            continue
+        points = _points(_text(score_el[0].itertext()))
+        if points is None:
+            continue
+        author_el = subtext_row.xpath(f".//*[{_xclass('hnuser')}]")
+        comments = 0
+        for a in subtext_row.iter("a"):
+            n = _comment_count(_text(a.itertext()))
+            if n is not None:
+                comments = n
+        results.append({
+            "id": story_row.get("id", ""),
+            "title": _text(title_link.itertext()),
+            "link": title_link.get("href", ""),
+            "votes": points,
+            "author": _text(author_el[0].itertext()) if author_el else "",
+            "comments": comments,
+        })
     return results
 
+class StoryStreamParser(HTMLParser):
+    """
+    Single-pass, tree-free story extractor. Tracks just enough state to know
+    whether it is inside a story row, its title link, or the subtext row that
+    follows it, and emits one dict per story when the subtext row closes.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results = []
+        self._story = None      # story being built
+        self._in_row = False    # inside the tr.athing row
+        self._in_sub = False    # inside the subtext row that follows it
+        self._in_titleline = False
+        self._capture = None    # (field, tag) whose text is being collected
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            classes = (dict(attrs).get("class") or "").split()
+            if "athing" in classes:
+                self._story = {"id": dict(attrs).get("id") or "", "title": None, "link": "",
+                               "votes": None, "author": "", "comments": 0}
+                self._in_row, self._in_sub = True, False
+            elif self._story is not None and not self._in_row and not self._in_sub:
+                self._in_sub = True
+            return
+        if self._story is None or self._capture:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        if self._in_row:
+            if "titleline" in classes:
+                self._in_titleline = True
+            elif tag == "a" and self._in_titleline and self._story["title"] is None:
+                self._story["link"] = dict(attrs).get("href") or ""
+                self._start("title", tag)
+        elif self._in_sub:
+            if "score" in classes:
+                self._start("score", tag)
+            elif "hnuser" in classes and not self._story["author"]:
+                self._start("author", tag)
+            elif tag == "a":
+                self._start("link_text", tag)
+
+    def _start(self, field, tag):
+        self._capture = (field, tag)
+        self._buf = []
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buf.append(data)
+
+    def handle_endtag(self, tag):
+        if self._capture and tag == self._capture[1]:
+            field, text = self._capture[0], _text(self._buf)
+            self._capture = None
+            if field == "score":
+                self._story["votes"] = _points(text)
+            elif field == "link_text":
+                n = _comment_count(text)
+                if n is not None:
+                    self._story["comments"] = n
+            else:
+                self._story[field] = text
+            return
+        if tag == "tr":
+            if self._in_row:
+                self._in_row = False
+                self._in_titleline = False
+                if self._story["title"] is None:
+                    self._story = None  # no .titleline > a: skip like the soup parser
+            elif self._in_sub:
+                story, self._story, self._in_sub = self._story, None, False
+                if story["votes"] is not None:
+                    self.results.append(story)
+
+def parse_stories_stream(html: str) -> List[Dict]:
+    parser = StoryStreamParser()
+    parser.feed(html)
+    parser.close()
+    return parser.results
+
+def parse_stories(html: str, backend: str = PARSER) -> List[Dict]:
+    """Parse a listing page with the chosen backend ("stream", "lxml" or "bs4")."""
+    if backend == "bs4":
+        return parse_stories_from_soup(BeautifulSoup(html, "html.parser"))
+    if backend == "lxml":
+        if lxml_html is None:
+            raise RuntimeError("lxml is not installed (pip install lxml)")
+        return parse_stories_lxml(html)
+    if backend == "stream":
+        return parse_stories_stream(html)
+    raise ValueError(f"Unknown parser backend {backend!r}")
+
 def dedupe_stories(stories: List[Dict]) -> List[Dict]:
     """Deduplicate by (title, link) combo while preserving highest vote entry."""
     seen = {}
@@ -77,15 +323,89 @@ def dedupe_stories(stories: List[Dict]) -> List[Dict]:
             seen[key] = s
     return list(seen.values())
 
-def collect_stories(num_pages: int) -> List[Dict]:
+def iter_pages(num_pages: int, concurrency: int = CONCURRENCY,
+               max_rps: float = MAX_RPS_PER_HOST, base_url: str = BASE_URL,
+               parser: str = PARSER) -> Iterator[List[Dict]]:
+    """Fetch and parse pages 1..num_pages concurrently; yields each page's stories in page order."""
+    concurrency = max(1, min(concurrency, num_pages))
+    session = make_session(concurrency)
+    limiter = HostRateLimiter(max_rps)
+
+    def work(page):
+        try:
+            html = fetch_html(session, page_url(page, base_url), limiter)
+        except Exception as e:
+            print(f"[WARN] Failed to fetch page {page}: {e}", file=sys.stderr)
+            return []
+        return parse_stories(html, parser)
+
+    with session, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # map() yields results in submission order, i.e. page order
+        yield from pool.map(work, range(1, num_pages + 1))
+
+def collect_stories(num_pages: int, **kwargs) -> List[Dict]:
     all_stories = []
-    for p in range(1, num_pages + 1):
-        soup = fetch_page(p)
-        if not soup:
-            continue
-        all_stories.extend(parse_stories_from_soup(soup))
+    for stories in iter_pages(num_pages, **kwargs):
+        all_stories.extend(stories)
     return all_stories
 
+def crawl_incremental(index: StoryIndex, num_pages: int, concurrency: int = CONCURRENCY,
+                      max_rps: float = MAX_RPS_PER_HOST, base_url: str = BASE_URL,
+                      parser: str = PARSER,
+                      on_page: Optional[Callable[[List[Dict]], None]] = None) -> Dict[str, float]:
+    """
+    Refresh `index` from pages 1..num_pages. Each page is fetched with the
+    validators from its last fetch (If-None-Match / If-Modified-Since); a 304
+    or a byte-identical body skips parsing and just marks its stories as seen.
+    `on_page`, if given, gets each page's stories in page order as soon as the
+    page is done (from the index for unchanged pages; failed pages are skipped).
+    Returns page counters (parsed, not_modified, unchanged, failed) and the
+    crawl timestamp as crawl_ts.
+    """
+    concurrency = max(1, min(concurrency, num_pages))
+    session = make_session(concurrency)
+    limiter = HostRateLimiter(max_rps)
+    ts = time.time()
+    urls = [page_url(p, base_url) for p in range(1, num_pages + 1)]
+    states = {url: index.page_state(url) for url in urls}  # sqlite stays on this thread
+
+    def work(url):
+        etag, last_modified, old_hash = states[url]
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            resp = fetch_response(session, url, limiter, headers=headers)
+        except Exception as e:
+            print(f"[WARN] Failed to fetch {url}: {e}", file=sys.stderr)
+            return "failed", None
+        if resp.status_code == 304:
+            return "not_modified", None
+        body_hash = hashlib.sha1(resp.content).hexdigest()
+        if body_hash == old_hash:
+            return "unchanged", None
+        return "parsed", (resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                          body_hash, parse_stories(resp.text, parser))
+
+    counts = {"parsed": 0, "not_modified": 0, "unchanged": 0, "failed": 0}
+    with session, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for page, (url, (status, result)) in enumerate(zip(urls, pool.map(work, urls))):
+            counts[status] += 1
+            if status == "parsed":
+                etag, last_modified, body_hash, stories = result
+                index.upsert_stories(stories, ts, rank_base=page * 1000)
+                index.save_page(url, etag, last_modified, body_hash, [s["id"] for s in stories], ts)
+            elif status != "failed":
+                index.touch_page(url, ts)
+                stories = index.page_stories(url) if on_page else []
+            if on_page and status != "failed":
+                on_page(stories)
+    index.commit()
+    counts["crawl_ts"] = ts
+    return counts
+
 def filter_and_sort(stories: List[Dict], min_votes: int) -> List[Dict]:
     filtered = [s for s in stories if s.get("votes", 0) >= min_votes]
     return sorted(filtered, key=lambda s: s["votes"], reverse=True)
@@ -112,17 +432,41 @@ def print_stories(stories: List[Dict]):
 
 def main():
     print_headline()
-    stories = collect_stories(NUM_PAGES)
-    stories = dedupe_stories(stories)
-    stories = filter_and_sort(stories, MIN_VOTES)
+    exporter = open_exporter(EXPORT_PATH) if EXPORT_PATH else None
+    try:
+        if INDEX_DB:
+            def export_page(page_stories):
+                exporter.write(s for s in page_stories if s["votes"] >= MIN_VOTES)
+
+            with StoryIndex(INDEX_DB) as index:
+                counts = crawl_incremental(index, NUM_PAGES, on_page=export_page if exporter else None)
+                # stories listed on this run's pages, deduped by item id
+                stories = index.top_stories(MIN_VOTES, seen_since=counts["crawl_ts"], limit=TOP_K)
+            print(f"(parsed {counts['parsed']}, not modified {counts['not_modified']}, "
+                  f"unchanged {counts['unchanged']}, failed {counts['failed']})", file=sys.stderr)
+        else:
+            top = TopK(TOP_K) if TOP_K else None
+            stories = []
+            for page_stories in iter_pages(NUM_PAGES):
+                page_stories = [s for s in page_stories if s["votes"] >= MIN_VOTES]
+                if exporter:
+                    exporter.write(page_stories)
+                if top:
+                    top.extend(page_stories)
+                else:
+                    stories.extend(page_stories)
+            if top:
+                stories = top.result()
+            else:
+                stories = filter_and_sort(dedupe_stories(stories), MIN_VOTES)
+    finally:
+        if exporter:
+            exporter.close()
 
     print_stories(stories)
 
-    if EXPORT_JSON:
-        out = "hn_top_stories.json"
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(stories, f, ensure_ascii=False, indent=2)
-        print(f"\nSaved {len(stories)} stories to {out}")
+    if exporter:
+        print(f"\nSaved {exporter.count} stories to {EXPORT_PATH}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,41 @@
+"""
+Benchmark: sequential vs concurrent page fetching against a local stub server.
+
+The stub adds a fixed delay per request to stand in for network latency,
+so the numbers show how wall time scales with the number of pages.
+
+    python bench_hn_fetch.py --latency 0.08 --pages 1 5 30 [--pages-dir saved/]
+"""
+
+import argparse
+import time
+
+import HACKER_NEWS as hn
+from hn_stub_server import StubServer
+
+
+def timed(num_pages, concurrency, base_url):
+    t0 = time.perf_counter()
+    stories = hn.collect_stories(num_pages, concurrency=concurrency, max_rps=0, base_url=base_url)
+    return time.perf_counter() - t0, len(stories)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--pages", type=int, nargs="+", default=[1, 5, 30])
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--latency", type=float, default=0.08)
+    ap.add_argument("--pages-dir")
+    args = ap.parse_args()
+
+    with StubServer(latency=args.latency, pages_dir=args.pages_dir) as srv:
+        print(f"{'pages':>5} {'sequential s':>13} {'concurrent s':>13} {'speedup':>8} {'stories':>8}")
+        for n in args.pages:
+            seq, count = timed(n, 1, srv.base_url)
+            par, count2 = timed(n, args.concurrency, srv.base_url)
+            assert count == count2, "concurrent run returned a different number of stories"
+            print(f"{n:>5} {seq:>13.3f} {par:>13.3f} {seq / par:>7.1f}x {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
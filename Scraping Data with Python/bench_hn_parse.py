@@ -0,0 +1,60 @@
+"""
+Microbenchmark: stories/sec for each HN parser backend.
+
+Parses a corpus of saved pages (``<dir>/*.html``) or synthetic pages, checks
+that every backend returns identical stories, then times each backend.
+
+    python bench_hn_parse.py [--pages-dir saved/] [--pages 30] [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import HACKER_NEWS as hn
+from hn_stub_server import make_page
+
+
+def load_corpus(pages_dir, pages):
+    if pages_dir:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                corpus.append(f.read())
+        return corpus
+    return [make_page(p) for p in range(1, pages + 1)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--pages-dir")
+    ap.add_argument("--pages", type=int, default=30, help="synthetic pages when no --pages-dir")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    corpus = load_corpus(args.pages_dir, args.pages)
+    if not corpus:
+        raise SystemExit(f"No .html pages found in {args.pages_dir}")
+    backends = ["bs4", "stream"] + (["lxml"] if hn.lxml_html is not None else [])
+
+    reference = [hn.parse_stories(html, "bs4") for html in corpus]
+    for backend in backends:
+        got = [hn.parse_stories(html, backend) for html in corpus]
+        assert got == reference, f"{backend} output differs from bs4"
+    total = sum(len(r) for r in reference)
+    print(f"{len(corpus)} pages, {total} stories, outputs identical across {', '.join(backends)}")
+
+    print(f"{'backend':<8} {'stories/s':>12} {'ms/page':>9}")
+    for backend in backends:
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for html in corpus:
+                hn.parse_stories(html, backend)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{backend:<8} {total / best:>12.0f} {best / len(corpus) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Streaming exporters for scraped stories.
+
+Each exporter takes one page's stories at a time via ``write()`` and puts
+them on disk right away, so a crash keeps everything up to the last page
+and memory doesn't grow with the crawl.
+
+- ``.jsonl`` / ``.jsonl.gz`` / ``.jsonl.zst`` : JSON-Lines, optionally
+  compressed (zstd needs the ``zstandard`` package).
+- ``.parquet`` / ``.arrow`` : columnar output, one row group / record batch
+  per page (needs ``pyarrow``).
+
+``TopK`` keeps only the K best stories in a bounded heap.
+"""
+
+import gzip
+import heapq
+import json
+from typing import Dict, Iterable, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FIELDS = (("id", "string"), ("title", "string"), ("link", "string"),
+          ("votes", "int64"), ("author", "string"), ("comments", "int64"))
+
+
+class JsonlExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._zstd = None
+        if path.endswith(".gz"):
+            self._f = gzip.open(path, "wt", encoding="utf-8")
+        elif path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstd export needs the zstandard package (pip install zstandard)")
+            self._raw = open(path, "wb")
+            self._zstd = zstandard.ZstdCompressor().stream_writer(self._raw)
+            self._f = None
+        else:
+            self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, stories: Iterable[Dict]):
+        data = "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in stories)
+        if self._zstd is not None:
+            self._zstd.write(data.encode("utf-8"))
+            self._zstd.flush()
+        else:
+            self._f.write(data)
+            self._f.flush()
+        self.count += data.count("\n")
+
+    def close(self):
+        if self._zstd is not None:
+            self._zstd.close()  # also closes the underlying file
+        else:
+            self._f.close()
+
+
+class ArrowExporter:
+    """Parquet (``.parquet``) or Arrow IPC file (``.arrow``) writer."""
+
+    def __init__(self, path: str):
+        if pa is None:
+            raise RuntimeError("Parquet/Arrow export needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.count = 0
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in FIELDS])
+        if path.endswith(".parquet"):
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, stories: Iterable[Dict]):
+        stories = list(stories)
+        if not stories:
+            return
+        table = pa.Table.from_pylist(stories, schema=self.schema)
+        self._writer.write_table(table)
+        self.count += len(stories)
+
+    def close(self):
+        self._writer.close()
+
+
+def open_exporter(path: str):
+    """Pick the exporter from the file extension."""
+    if path.endswith((".parquet", ".arrow")):
+        return ArrowExporter(path)
+    if path.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst")):
+        return JsonlExporter(path)
+    raise ValueError(f"Don't know how to export to {path!r} (use .jsonl[.gz|.zst], .parquet or .arrow)")
+
+
+class TopK:
+    """
+    The K highest-voted stories in O(K) memory and O(log K) per story.
+
+    Matches dedupe_stories() + filter_and_sort() cut to K: duplicates (same
+    title and link) keep their highest score and equal scores keep arrival
+    order. The one difference: a duplicate that first showed up below the
+    cut-off is ordered among equal scores by when its better copy arrived,
+    since remembering every first-seen position would cost O(N) memory.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []   # (votes, -seq, key, story): heap[0] is the entry to drop first
+        self._keys = {}   # key -> heap entry, for the stories currently kept
+        self._seq = 0
+
+    def _live(self, entry) -> bool:
+        # a duplicate's old entry stays in the heap until it surfaces (lazy deletion)
+        return self._keys.get(entry[2]) is entry
+
+    def add(self, story: Dict):
+        key = (story["title"], story["link"])
+        seq = self._seq
+        self._seq += 1
+        old = self._keys.get(key)
+        if old is not None:
+            if story["votes"] <= old[0]:
+                return
+            seq = -old[1]  # keep the first-seen position, like dedupe_stories()
+            del self._keys[key]
+            if len(self._heap) > 2 * self.k:  # too many stale entries: rebuild from the live ones
+                self._heap = list(self._keys.values())
+                heapq.heapify(self._heap)
+        heap = self._heap
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+        entry = (story["votes"], -seq, key, story)
+        if len(self._keys) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            dropped = heapq.heapreplace(heap, entry)
+            del self._keys[dropped[2]]
+        else:
+            return
+        self._keys[key] = entry
+
+    def extend(self, stories: Iterable[Dict]):
+        for s in stories:
+            self.add(s)
+
+    def result(self) -> List[Dict]:
+        return [e[3] for e in sorted(self._keys.values(), key=lambda e: (-e[0], -e[1]))]
@@ -0,0 +1,141 @@
+"""
+Persistent SQLite index of scraped Hacker News stories.
+
+- ``stories``  : one row per HN item id (latest title/link/votes/...).
+- ``votes``    : vote history, one row each time an item's score changes.
+- ``pages``    : per listing URL, the ETag / Last-Modified validators, a hash
+                 of the last body, and the item ids that were on it, so an
+                 unchanged page costs one (conditional) request and no parsing.
+
+Filtering and sorting run as indexed SQL queries instead of in-memory scans.
+"""
+
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id         TEXT PRIMARY KEY,
+    title      TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    author     TEXT NOT NULL DEFAULT '',
+    votes      INTEGER NOT NULL,
+    comments   INTEGER NOT NULL DEFAULT 0,
+    rank       INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stories_votes ON stories (votes DESC, rank);
+CREATE INDEX IF NOT EXISTS stories_last_seen ON stories (last_seen);
+CREATE TABLE IF NOT EXISTS votes (
+    id    TEXT NOT NULL,
+    ts    REAL NOT NULL,
+    votes INTEGER NOT NULL,
+    PRIMARY KEY (id, ts)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    body_hash     TEXT,
+    story_ids     TEXT NOT NULL DEFAULT '[]',
+    fetched_at    REAL NOT NULL
+);
+"""
+
+COLUMNS = ("id", "title", "link", "author", "votes", "comments")
+
+
+class StoryIndex:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ---- pages ----
+    def page_state(self, url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """(etag, last_modified, body_hash) from the last fetch of `url`."""
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body_hash FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return row if row else (None, None, None)
+
+    def save_page(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                  body_hash: str, story_ids: List[str], ts: float):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, body_hash, story_ids, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body_hash, json.dumps(story_ids), ts),
+        )
+
+    def touch_page(self, url: str, ts: float):
+        """Page didn't change: mark its stories as still listed."""
+        row = self.conn.execute("SELECT story_ids FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return
+        ids = json.loads(row[0])
+        self.conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (ts, url))
+        self.conn.executemany(
+            "UPDATE stories SET last_seen = ? WHERE id = ?", [(ts, i) for i in ids]
+        )
+
+    def page_stories(self, url: str) -> List[Dict]:
+        """The stories last listed on `url`, in listing order."""
+        row = self.conn.execute("SELECT story_ids FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return []
+        ids = json.loads(row[0])
+        found = {
+            r[0]: dict(zip(COLUMNS, r)) for r in self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM stories WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        } if ids else {}
+        return [found[i] for i in ids if i in found]
+
+    # ---- stories ----
+    def upsert_stories(self, stories: Iterable[Dict], ts: float, rank_base: int = 0):
+        """Insert or update stories and append a vote-history row when the score changed."""
+        for pos, s in enumerate(stories):
+            row = self.conn.execute("SELECT votes FROM stories WHERE id = ?", (s["id"],)).fetchone()
+            if row is None or row[0] != s["votes"]:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO votes (id, ts, votes) VALUES (?, ?, ?)",
+                    (s["id"], ts, s["votes"]),
+                )
+            self.conn.execute(
+                "INSERT INTO stories (id, title, link, author, votes, comments, rank, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET title = excluded.title, link = excluded.link,"
+                " author = excluded.author, votes = excluded.votes, comments = excluded.comments,"
+                " rank = excluded.rank, last_seen = excluded.last_seen",
+                (s["id"], s["title"], s["link"], s.get("author", ""), s["votes"],
+                 s.get("comments", 0), rank_base + pos, ts, ts),
+            )
+
+    def commit(self):
+        self.conn.commit()
+
+    def top_stories(self, min_votes: int, seen_since: float = 0.0,
+                    limit: Optional[int] = None) -> List[Dict]:
+        """Stories with at least `min_votes`, highest first (ties keep listing order)."""
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM stories"
+               " WHERE votes >= ? AND last_seen >= ? ORDER BY votes DESC, rank")
+        params = [min_votes, seen_since]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+    def vote_history(self, story_id: str) -> List[Tuple[float, int]]:
+        return self.conn.execute(
+            "SELECT ts, votes FROM votes WHERE id = ? ORDER BY ts", (story_id,)
+        ).fetchall()
@@ -0,0 +1,150 @@
+"""
+Local stand-in for news.ycombinator.com used by the benchmarks.
+
+Serves /news and /news?p=N from saved pages (``<dir>/news_<N>.html``) when
+a folder is given, otherwise from synthetic pages that use the same markup
+as the real site. An optional per-request delay imitates network latency.
+Responses carry an ETag, and a matching If-None-Match gets a 304.
+
+    python hn_stub_server.py --port 8765 --latency 0.08 [--pages-dir saved/]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STORIES_PER_PAGE = 30
+
+
+def make_page(page: int, per_page: int = STORIES_PER_PAGE, seed: int = 0) -> str:
+    """Build one synthetic HN listing page (deterministic for page/seed)."""
+    rnd = random.Random(seed * 100003 + page)
+    rows = []
+    for i in range(per_page):
+        rank = (page - 1) * per_page + i + 1
+        item_id = 40000000 + rank * 7 + seed
+        title = f"Story {rank}: {rnd.choice(['Show HN', 'Ask HN', 'Rust', 'Python', 'SQLite'])} &amp; friends"
+        link = f"https://example{rank % 17}.com/post/{item_id}"
+        rows.append(
+            f"<tr class='athing submission' id='{item_id}'>\n"
+            f"      <td align=\"right\" valign=\"top\" class=\"title\"><span class=\"rank\">{rank}.</span></td>"
+            f"<td valign=\"top\" class=\"votelinks\"><center><a id='up_{item_id}' href='vote?id={item_id}&amp;how=up&amp;goto=news'>"
+            f"<div class='votearrow' title='upvote'></div></a></center></td>"
+            f"<td class=\"title\"><span class=\"titleline\"><a href=\"{link}\">{title}</a>"
+            f"<span class=\"sitebit comhead\"> (<a href=\"from?site=example{rank % 17}.com\"><span class=\"sitestr\">example{rank % 17}.com</span></a>)</span></span></td></tr>"
+        )
+        if rank % 13 == 0:
+            # job posting: no score, no author, no comments
+            rows.append(
+                "<tr><td colspan=\"2\"></td><td class=\"subtext\">"
+                f"<span class=\"age\" title=\"2025-01-01T00:00:00\"><a href=\"item?id={item_id}\">2 hours ago</a></span>"
+                f" | <a href=\"hide?id={item_id}&amp;goto=news\">hide</a></td></tr>"
+            )
+        else:
+            points = rnd.randint(1, 900)
+            comments = rnd.randint(0, 400)
+            user = f"user{rnd.randint(1, 5000)}"
+            ctext = "discuss" if comments == 0 else f"{comments}&nbsp;comment{'s' if comments != 1 else ''}"
+            rows.append(
+                "<tr><td colspan=\"2\"></td><td class=\"subtext\"><span class=\"subline\">\n"
+                f"          <span class=\"score\" id=\"score_{item_id}\">{points} point{'s' if points != 1 else ''}</span>"
+                f" by <a href=\"user?id={user}\" class=\"hnuser\">{user}</a>"
+                f" <span class=\"age\" title=\"2025-01-01T00:00:00\"><a href=\"item?id={item_id}\">3 hours ago</a></span>"
+                f" <span id=\"unv_{item_id}\"></span> | <a href=\"hide?id={item_id}&amp;goto=news\">hide</a>"
+                f" | <a href=\"item?id={item_id}\">{ctext}</a>        </span>\n"
+                "              </td></tr>"
+            )
+        rows.append("<tr class=\"spacer\" style=\"height:5px\"></tr>")
+    return (
+        "<html lang=\"en\" op=\"news\"><head><title>Hacker News</title></head><body>"
+        "<center><table id=\"hnmain\" border=\"0\" cellpadding=\"0\" cellspacing=\"0\" width=\"85%\">"
+        "<tr><td><table border=\"0\" cellpadding=\"0\" cellspacing=\"0\" class=\"itemlist\">\n"
+        + "\n".join(rows)
+        + f"\n<tr class=\"morespace\" style=\"height:10px\"></tr><tr><td colspan=\"2\"></td>"
+        f"<td class=\"title\"><a href=\"?p={page + 1}\" class=\"morelink\" rel=\"next\">More</a></td></tr>"
+        "</table></td></tr></table></center></body></html>"
+    )
+
+
+def load_page(page: int, pages_dir=None) -> str:
+    if pages_dir:
+        path = os.path.join(pages_dir, f"news_{page}.html")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+    return make_page(page)
+
+
+class StubServer:
+    """Threaded stub server; use as a context manager, ``base_url`` points at /news."""
+
+    def __init__(self, port=0, latency=0.0, pages_dir=None):
+        stub = self
+        self.latency = latency
+        self.pages_dir = pages_dir
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != "/news":
+                    self.send_error(404)
+                    return
+                page = int(parse_qs(url.query).get("p", ["1"])[0])
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = load_page(page, stub.pages_dir).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/news"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve saved or synthetic HN pages locally")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds of delay per request")
+    ap.add_argument("--pages-dir", help="folder with news_<N>.html files")
+    args = ap.parse_args()
+    with StubServer(args.port, args.latency, args.pages_dir) as srv:
+        print(f"Serving on {srv.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
-import smtplib
+import sys
 from email.message import EmailMessage
 
+from bulk_mailer import connect, smtp_settings_from_env
+
+# SMTP_USER / SMTP_PASSWORD (use an App Password) come from the environment
+settings = smtp_settings_from_env()
+if not settings["password"]:
+    sys.exit("ERROR: set SMTP_USER and SMTP_PASSWORD in the environment")
+
 # Read HTML content from index.html
 with open("index.html", "r", encoding="utf-8") as f:
     html_content = f.read()
@@ -14,9 +21,6 @@ email["Subject"] = "🎉 You Won 1 Million Dollars!"
 email.add_alternative(html_content, subtype="html")
 
 # Send the email
-with smtplib.SMTP(host="smtp.gmail.com", port=587) as smtp:
-    smtp.ehlo()
-    smtp.starttls()
-    smtp.login("abdulwassay1005@gmail.com", "gyum ccoq mrbk ggsi")  # Use App Password
+with connect(settings) as smtp:
     smtp.send_message(email)
     print("HTML Email sent successfully ✅")
@@ -1,6 +1,13 @@
-import smtplib
+import sys
 from email.message import EmailMessage
 
+from bulk_mailer import connect, smtp_settings_from_env
+
+# SMTP_USER / SMTP_PASSWORD (an app password, not your normal one) come from the environment
+settings = smtp_settings_from_env()
+if not settings["password"]:
+    sys.exit("ERROR: set SMTP_USER and SMTP_PASSWORD in the environment")
+
 email = EmailMessage()
 email['from'] = 'Chanayaka'
 email['to'] = 'receiver@example.com'
@@ -8,9 +15,6 @@ email['subject'] = 'Test Email from Python!'
 
 email.set_content('Hello, this is a test email from Python!')
 
-with smtplib.SMTP(host='smtp.gmail.com', port=587) as smtp:
-    smtp.ehlo()
-    smtp.starttls()
-    smtp.login('abdulwassay1005@gmail.com', 'gyum ccoq mrbk ggsi')  # Not your normal password
+with connect(settings) as smtp:
     smtp.send_message(email)
     print('Email sent successfully!')
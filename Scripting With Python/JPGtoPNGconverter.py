@@ -1,22 +1,282 @@
-import os
-from PIL import Image, UnidentifiedImageError
-
-# Use current folder (".") since images and script are in the same place
-source_folder = "."
-dest_folder = "converted"
-
-# Make destination folder if needed
-os.makedirs(dest_folder, exist_ok=True)
-
-# Convert all JPG/JPEG files in the same folder
-for filename in os.listdir(source_folder):
-    name, ext = os.path.splitext(filename)
-    if ext.lower() in [".jpg", ".jpeg"]:
-        try:
-            img = Image.open(os.path.join(source_folder, filename))
-            img.save(os.path.join(dest_folder, f"{name}.png"), "PNG")
-            print(f"Converted: {filename} -> {name}.png")
-        except UnidentifiedImageError:
-            print(f"Skipping (not a valid image): {filename}")
-
-print("✅ All JPG images converted to PNG successfully!")
+"""
+Bulk JPG -> PNG converter (and multi-format transcoder).
+
+Walks the source folder (recursively with -r) using os.scandir, converts
+every .jpg/.jpeg on a process pool, and mirrors the folder layout under the
+destination. Outputs that are already up to date are skipped, either by
+mtime (default) or by a content hash stored inside the PNG.
+
+Each source image is decoded once. With --formats and --thumbs, that one
+decoded image is encoded to every format and shrunk step by step into a
+thumbnail pyramid, and every output is listed in manifest.jsonl (one
+line per source; a rerun replaces the line of every source it converts).
+
+    python JPGtoPNGconverter.py                      # ./*.jpg -> ./converted/*.png
+    python JPGtoPNGconverter.py photos out -r --max-size 1024 --compress-level 3
+    python JPGtoPNGconverter.py photos out -r --formats png webp avif --thumbs 1024 512 128
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from PIL import Image, UnidentifiedImageError
+from PIL.PngImagePlugin import PngInfo
+
+try:
+    import pillow_avif  # noqa: F401  (registers AVIF on older Pillow)
+except ImportError:
+    pass
+
+JPG_EXTS = {".jpg", ".jpeg"}
+HASH_KEY = "source-blake2b"  # PNG text chunk used by --skip hash
+FORMATS = {"png": "PNG", "webp": "WEBP", "avif": "AVIF"}
+
+
+def scan(source, dest, recursive):
+    """Yield (src, dst_base) pairs, dst_base without extension; never descends into dest."""
+    dest_real = os.path.realpath(dest)
+    stack = [source]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive and os.path.realpath(entry.path) != dest_real:
+                    stack.append(entry.path)
+                continue
+            name, ext = os.path.splitext(entry.name)
+            if ext.lower() in JPG_EXTS and entry.is_file():
+                rel = os.path.relpath(os.path.join(folder, name), source)
+                yield entry.path, os.path.join(dest, rel)
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def available_formats(formats):
+    """Drop formats this Pillow build can't write (AVIF needs libavif or pillow-avif-plugin)."""
+    Image.init()
+    usable = [f for f in formats if FORMATS[f] in Image.SAVE]
+    for f in formats:
+        if f not in usable:
+            print(f"[WARN] {f} output not supported by this Pillow build, skipping", file=sys.stderr)
+    return usable
+
+
+def plan_outputs(dst_base, formats, thumbs):
+    """[(path, format, max_side or None)] for the full-size image and each thumbnail size."""
+    outputs = [(f"{dst_base}.{fmt}", fmt, None) for fmt in formats]
+    for size in sorted(set(thumbs), reverse=True):
+        outputs += [(f"{dst_base}_{size}.{fmt}", fmt, size) for fmt in formats]
+    return outputs
+
+
+def up_to_date(src, dst, mode, src_hash=None):
+    """`src_hash` is file_hash(src), passed in so one source is hashed once for all its outputs."""
+    if mode == "none" or not os.path.exists(dst):
+        return False
+    if mode == "mtime" or not dst.endswith(".png"):
+        return os.stat(dst).st_mtime_ns >= os.stat(src).st_mtime_ns
+    try:
+        with Image.open(dst) as png:  # text chunks come before the pixel data
+            return png.info.get(HASH_KEY) == (src_hash or file_hash(src))
+    except (OSError, UnidentifiedImageError):
+        return False
+
+
+def encode(img, path, fmt, opts, src_hash):
+    """Save one output through a .part file so a crash never leaves a truncated image."""
+    tmp = path + ".part"
+    if fmt == "png":
+        info = PngInfo()
+        if src_hash:
+            info.add_text(HASH_KEY, src_hash)
+        img.save(tmp, "PNG", compress_level=opts["compress_level"], optimize=opts["optimize"], pnginfo=info)
+    elif fmt == "webp":
+        img.save(tmp, "WEBP", quality=opts["quality"], method=4)
+    else:
+        img.save(tmp, FORMATS[fmt], quality=opts["quality"])
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def describe(path, fmt):
+    """Manifest entry for an output already on disk (reads only the image header)."""
+    with Image.open(path) as img:
+        width, height = img.size
+    return {"path": path, "format": fmt, "width": width, "height": height, "bytes": os.path.getsize(path)}
+
+
+def convert_one(src, dst_base, opts):
+    """
+    Runs in a worker process: decode `src` once and write every planned output.
+    Returns (status, src, outputs, bytes_in, seconds, detail); outputs is a list
+    of {"path", "format", "width", "height", "bytes"} for every planned output,
+    the ones just written and the ones that were already up to date, so the
+    manifest line replacing this source's old one still lists all of them. For
+    "converted", detail is the list of paths actually written.
+    """
+    t0 = time.perf_counter()
+    planned = plan_outputs(dst_base, opts["formats"], opts["thumbs"])
+    try:
+        src_hash = file_hash(src) if opts["skip"] == "hash" else None
+        todo, kept = [], {}
+        for path, fmt, side in planned:
+            if up_to_date(src, path, opts["skip"], src_hash):
+                try:
+                    kept[path] = describe(path, fmt)
+                    continue
+                except (OSError, UnidentifiedImageError):
+                    pass  # unreadable: write it again
+            todo.append((path, fmt, side))
+        if not todo:
+            return "skipped", src, [], 0, 0.0, "up to date"
+        size = os.path.getsize(src)
+        written = {}
+        os.makedirs(os.path.dirname(dst_base) or ".", exist_ok=True)
+        with Image.open(src) as img:
+            if opts["max_size"]:
+                box = (opts["max_size"], opts["max_size"])
+                img.draft(img.mode, box)  # JPEG decodes at 1/2, 1/4 or 1/8 scale
+                img.thumbnail(box)
+            if img.mode not in ("RGB", "RGBA", "L", "LA", "P", "I", "1"):
+                img = img.convert("RGB")  # PNG/WebP can't store CMYK/YCbCr
+            img.load()
+            # largest size first, so each thumbnail shrinks the previous level
+            level, level_size = img, None
+            for path, fmt, side in todo:
+                if side != level_size:
+                    level_size = side
+                    if side and max(level.size) > side:
+                        level = level.copy()
+                        level.thumbnail((side, side), Image.LANCZOS)
+                nbytes = encode(level, path, fmt, opts, src_hash)
+                written[path] = {"path": path, "format": fmt, "width": level.width,
+                                 "height": level.height, "bytes": nbytes}
+        outputs = [written.get(path) or kept[path] for path, _, _ in planned]
+        return "converted", src, outputs, size, time.perf_counter() - t0, list(written)
+    except UnidentifiedImageError:
+        return "invalid", src, [], 0, 0.0, "not a valid image"
+    except OSError as e:
+        return "failed", src, [], 0, 0.0, str(e)
+    except Exception as e:  # decompression bomb, corrupt data (ValueError, SyntaxError...): fail this file only
+        return "failed", src, [], 0, 0.0, f"{type(e).__name__}: {e}"
+
+
+def compact_manifest(path):
+    """Keep only the newest line for each source, in first-seen order."""
+    latest = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                key = json.loads(line)["source"]
+            except (ValueError, KeyError):
+                continue  # torn last line after a crash
+            latest[key] = line if line.endswith("\n") else line + "\n"
+    tmp = path + ".part"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(latest.values())
+    os.replace(tmp, path)
+
+
+def convert_all(source, dest, recursive=False, workers=None, skip="mtime", max_size=None,
+                compress_level=6, optimize=False, quiet=False, formats=("png",), thumbs=(),
+                quality=80, manifest=None):
+    opts = {"skip": skip, "max_size": max_size, "compress_level": compress_level, "optimize": optimize,
+            "formats": available_formats(list(formats)), "thumbs": list(thumbs), "quality": quality}
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4  # bounds memory no matter how many files there are
+    counts = {"converted": 0, "skipped": 0, "invalid": 0, "failed": 0}
+    bytes_in = 0
+    t0 = time.perf_counter()
+
+    def report(result):
+        nonlocal bytes_in
+        status, src, outputs, size, secs, detail = result
+        counts[status] += 1
+        bytes_in += size
+        if status == "converted":
+            if manifest_file:
+                manifest_file.write(json.dumps({"source": src, "outputs": outputs}) + "\n")
+            if not quiet:
+                rate = size / secs / 1e6 if secs else 0.0
+                names = ", ".join(os.path.basename(path) for path in detail)  # only the files written
+                print(f"Converted: {src} -> {names} ({secs * 1000:.0f} ms, {rate:.1f} MB/s)")
+        elif status == "invalid":
+            print(f"Skipping (not a valid image): {src}")
+        elif status == "failed":
+            print(f"FAILED: {src}: {detail}", file=sys.stderr)
+
+    os.makedirs(dest, exist_ok=True)
+    manifest_file = open(manifest, "a", encoding="utf-8") if manifest else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for src, dst in scan(source, dest, recursive):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in done:
+                    report(f.result())
+            in_flight.add(pool.submit(convert_one, src, dst, opts))
+        for f in in_flight:
+            report(f.result())
+    if manifest_file:
+        manifest_file.close()
+        compact_manifest(manifest)  # lines were appended as files finished; drop the superseded ones
+
+    wall = time.perf_counter() - t0
+    counts["seconds"] = wall
+    counts["mb_in"] = bytes_in / 1e6
+    return counts
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Convert JPG/JPEG images to PNG (or other formats) in parallel")
+    ap.add_argument("source", nargs="?", default=".", help="folder with JPG images (default: .)")
+    ap.add_argument("dest", nargs="?", default="converted", help="output folder (default: converted)")
+    ap.add_argument("-r", "--recursive", action="store_true", help="include subfolders")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--skip", choices=["mtime", "hash", "none"], default="mtime",
+                    help="how to detect outputs that are already up to date")
+    ap.add_argument("--max-size", type=int, default=None,
+                    help="downscale so neither side exceeds this many pixels")
+    ap.add_argument("--compress-level", type=int, choices=range(10), default=6, metavar="0-9")
+    ap.add_argument("--optimize", action="store_true", help="smaller PNGs, much slower")
+    ap.add_argument("--formats", nargs="+", choices=sorted(FORMATS), default=["png"],
+                    help="output formats, all encoded from one decode")
+    ap.add_argument("--thumbs", nargs="+", type=int, default=[], metavar="PX",
+                    help="also write thumbnails no larger than these sizes (name_<PX>.<fmt>)")
+    ap.add_argument("--quality", type=int, default=80, help="WebP/AVIF quality")
+    ap.add_argument("--manifest", default=None,
+                    help="one JSON line per converted image, updated on rerun (default: "
+                         "<dest>/manifest.jsonl when --formats/--thumbs are used)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no per-file lines")
+    return ap
+
+
+def main():
+    args = build_parser().parse_args()
+    manifest = args.manifest
+    if manifest is None and (args.thumbs or args.formats != ["png"]):
+        manifest = os.path.join(args.dest, "manifest.jsonl")
+    c = convert_all(args.source, args.dest, args.recursive, args.workers, args.skip,
+                    args.max_size, args.compress_level, args.optimize, args.quiet,
+                    args.formats, args.thumbs, args.quality, manifest)
+    secs = c["seconds"] or 1e-9
+    print(f"✅ {c['converted']} converted, {c['skipped']} up to date, "
+          f"{c['invalid']} invalid, {c['failed']} failed in {secs:.1f}s "
+          f"({c['converted'] / secs:.1f} files/s, {c['mb_in'] / secs:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,278 @@
-from PyPDF2 import PdfMerger
-
-# Create a PdfMerger object
-merger = PdfMerger()
-
-# List of PDF files to merge (in order)
-pdf_files = ["dummy1.pdf", "twopager.pdf", "water.pdf"]
-
-# Loop through all files and append them
-for pdf in pdf_files:
-    merger.append(pdf)
-
-# Write the merged PDF to a new file
-merger.write("superpdf.pdf")
-merger.close()
-
-print("PDFs merged successfully into 'superpdf.pdf'")
+"""
+Streaming PDF merger.
+
+Copies each source's page objects straight into the output file as it
+goes, so memory stays at roughly one source document no matter how many
+inputs there are. Only one source file is open at a time. Objects that
+come out byte-identical after renumbering, such as the same font program
+or logo image used by many inputs, are written once and shared. Each
+source can get its own bookmark in the outline.
+
+    python PDFMerger.py                                  # old behaviour: 3 files -> superpdf.pdf
+    python PDFMerger.py -o all.pdf --glob "reports/**/*.pdf" --outline
+    python PDFMerger.py -o all.pdf --manifest files.txt  # one path per line, optional TAB + title
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import os
+import sys
+import time
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, StreamObject,
+                            create_string_object)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_FILES = ["dummy1.pdf", "twopager.pdf", "water.pdf"]
+CATALOG_ID, PAGES_ID = 1, 2
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != "darwin" else rss / 1024 / 1024  # KB on Linux, bytes on macOS
+
+
+def serialize(obj, out, ref, skip=()):
+    """Write `obj` as PDF syntax, mapping every IndirectObject through ref() -> new id."""
+    if isinstance(obj, IndirectObject):
+        out.write(b"%d 0 R" % ref(obj))
+    elif isinstance(obj, StreamObject):
+        data = obj._data
+        serialize_dict(obj, out, ref, skip=("/Length",), extra=b"/Length %d" % len(data))
+        out.write(b"\nstream\n")
+        out.write(data)
+        out.write(b"\nendstream")
+    elif isinstance(obj, DictionaryObject):
+        serialize_dict(obj, out, ref, skip)
+    elif isinstance(obj, ArrayObject):
+        out.write(b"[")
+        for item in obj:
+            out.write(b" ")
+            serialize(item, out, ref)
+        out.write(b" ]")
+    else:
+        obj.write_to_stream(out, None)
+
+
+def serialize_dict(obj, out, ref, skip=(), extra=b""):
+    out.write(b"<<")
+    for key, value in obj.items():
+        if key in skip:
+            continue
+        out.write(b"\n")
+        key.write_to_stream(out, None)
+        out.write(b" ")
+        serialize(value, out, ref)
+    if extra:
+        out.write(b"\n" + extra)
+    out.write(b"\n>>")
+
+
+class StreamingMerger:
+    def __init__(self, out_path, dedupe=True):
+        self.out_path = out_path
+        self.dedupe = dedupe
+        self._f = open(out_path, "wb")
+        self._f.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self._offsets = {}
+        self._next_id = 3  # 1 = catalog, 2 = page tree
+        self._seen = {}    # sha1 of serialized object -> new id
+        self.page_ids = []
+        self.outline = []  # (title, first page id)
+        self.sources = 0
+        self.objects = 0
+        self.deduped = 0
+        self.bytes_saved = 0
+
+    def _alloc(self):
+        oid = self._next_id
+        self._next_id += 1
+        return oid
+
+    def _write_obj(self, oid, body):
+        self._offsets[oid] = self._f.tell()
+        self._f.write(b"%d 0 obj\n" % oid)
+        self._f.write(body)
+        self._f.write(b"\nendobj\n")
+        self.objects += 1
+
+    def add(self, path, title=None):
+        """
+        Append every page of `path`. Returns the number of pages added.
+        If reading the source fails partway, everything it wrote is rolled back
+        before the error is re-raised, so the output stays consistent.
+        """
+        mark = (self._f.tell(), self._next_id, len(self._seen), self.objects, self.deduped, self.bytes_saved)
+        try:
+            page_ids = self._add(path)
+        except BaseException:
+            self._rollback(*mark)
+            raise
+        self.page_ids.extend(page_ids)
+        if title is not None and page_ids:
+            self.outline.append((title, page_ids[0]))
+        self.sources += 1
+        return len(page_ids)
+
+    def _rollback(self, pos, next_id, seen, objects, deduped, bytes_saved):
+        self._f.seek(pos)
+        self._f.truncate()
+        for oid in range(next_id, self._next_id):
+            self._offsets.pop(oid, None)
+        for digest in list(self._seen)[seen:]:  # dicts keep insertion order
+            del self._seen[digest]
+        self._next_id = next_id
+        self.objects, self.deduped, self.bytes_saved = objects, deduped, bytes_saved
+
+    def _add(self, path):
+        with open(path, "rb") as fh:
+            reader = PdfReader(fh)
+            if reader.is_encrypted:
+                reader.decrypt("")
+            pages = list(reader.pages)
+            id_map = {}          # source object number -> output object number
+            in_progress = set()  # objects being serialized (to break reference cycles)
+            reserved = set()     # objects whose id was handed out early because of a cycle
+            page_ids = []
+            for page in pages:
+                oid = self._alloc()
+                id_map[page.indirect_reference.idnum] = oid
+                page_ids.append(oid)
+
+            def ref(ind):
+                key = ind.idnum
+                if key in id_map:
+                    return id_map[key]
+                if key in in_progress:
+                    id_map[key] = self._alloc()
+                    reserved.add(key)
+                    return id_map[key]
+                in_progress.add(key)
+                buf = io.BytesIO()
+                serialize(ind.get_object(), buf, ref)
+                body = buf.getvalue()
+                in_progress.discard(key)
+                if key in reserved:
+                    self._write_obj(id_map[key], body)
+                    return id_map[key]
+                digest = hashlib.sha1(body).digest() if self.dedupe else None
+                if digest in self._seen:
+                    id_map[key] = self._seen[digest]
+                    self.deduped += 1
+                    self.bytes_saved += len(body)
+                    return id_map[key]
+                oid = self._alloc()
+                self._write_obj(oid, body)
+                id_map[key] = oid
+                if digest is not None:
+                    self._seen[digest] = oid
+                return oid
+
+            for page, oid in zip(pages, page_ids):
+                buf = io.BytesIO()
+                # the page keeps inherited MediaBox/Resources (PdfReader flattens them)
+                serialize_dict(page, buf, ref, skip=("/Parent",), extra=b"/Parent %d 0 R" % PAGES_ID)
+                self._write_obj(oid, buf.getvalue())
+        return page_ids
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % p for p in self.page_ids)
+        self._write_obj(PAGES_ID, b"<< /Type /Pages /Count %d /Kids [ %s ] >>" % (len(self.page_ids), kids))
+        catalog = b"<< /Type /Catalog /Pages %d 0 R" % PAGES_ID
+        if self.outline:
+            catalog += b" /Outlines %d 0 R /PageMode /UseOutlines" % self._write_outline()
+        self._write_obj(CATALOG_ID, catalog + b" >>")
+
+        xref_at = self._f.tell()
+        size = self._next_id
+        self._f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for oid in range(1, size):
+            self._f.write(b"%010d 00000 n \n" % self._offsets[oid])
+        self._f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                      % (size, CATALOG_ID, xref_at))
+        self._f.close()
+
+    def _write_outline(self):
+        root = self._alloc()
+        ids = [self._alloc() for _ in self.outline]
+        for i, ((title, page_id), oid) in enumerate(zip(self.outline, ids)):
+            buf = io.BytesIO()
+            buf.write(b"<< /Title ")
+            create_string_object(title).write_to_stream(buf, None)
+            buf.write(b" /Parent %d 0 R /Dest [ %d 0 R /Fit ]" % (root, page_id))
+            if i > 0:
+                buf.write(b" /Prev %d 0 R" % ids[i - 1])
+            if i + 1 < len(ids):
+                buf.write(b" /Next %d 0 R" % ids[i + 1])
+            buf.write(b" >>")
+            self._write_obj(oid, buf.getvalue())
+        self._write_obj(root, b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>"
+                        % (ids[0], ids[-1], len(ids)))
+        return root
+
+
+def collect_inputs(paths, patterns, manifest):
+    """[(path, title)] from positional paths, glob patterns and a manifest file, in that order."""
+    items = [(p, None) for p in paths]
+    for pattern in patterns:
+        items += [(p, None) for p in sorted(glob.glob(pattern, recursive=True))]
+    if manifest:
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                path, _, title = line.partition("\t")
+                items.append((path, title or None))
+    return items
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Merge many PDFs into one with bounded memory")
+    ap.add_argument("inputs", nargs="*", help="PDF files, in order")
+    ap.add_argument("-o", "--output", default="superpdf.pdf")
+    ap.add_argument("--glob", action="append", default=[], help="add files matching this pattern (sorted)")
+    ap.add_argument("--manifest", help="text file with one PDF path per line (optional TAB + bookmark title)")
+    ap.add_argument("--outline", action="store_true", help="add a bookmark per source file")
+    ap.add_argument("--no-dedupe", action="store_true", help="don't share identical objects")
+    args = ap.parse_args()
+
+    items = collect_inputs(args.inputs, args.glob, args.manifest)
+    if not items:
+        items = [(p, None) for p in DEFAULT_FILES]
+
+    merger = StreamingMerger(args.output, dedupe=not args.no_dedupe)
+    t0 = time.perf_counter()
+    for path, title in items:
+        if args.outline and title is None:
+            title = os.path.splitext(os.path.basename(path))[0]
+        try:
+            merger.add(path, title)
+        except Exception as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+    merger.close()
+    secs = time.perf_counter() - t0
+    if not merger.sources:
+        os.remove(args.output)
+        sys.exit("ERROR: no input PDF could be read")
+
+    pages = len(merger.page_ids)
+    rss = peak_rss_mb()
+    print(f"PDFs merged successfully into '{args.output}'")
+    print(f"{merger.sources} files, {pages} pages in {secs:.2f}s ({pages / (secs or 1e-9):.0f} pages/s), "
+          f"{merger.deduped} shared objects ({merger.bytes_saved / 1e6:.1f} MB saved), "
+          f"output {os.path.getsize(args.output) / 1e6:.1f} MB"
+          + (f", peak RSS {rss:.0f} MB" if rss is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
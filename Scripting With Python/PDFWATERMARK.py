@@ -1,26 +1,239 @@
-from PyPDF2 import PdfReader, PdfWriter
-
-# Input files
-input_pdf = "superpdf.pdf"        # The main PDF
-watermark_pdf = "water.pdf"       # The watermark PDF (should contain 1 page)
-
-# Output file
-output_pdf = "watermarked_output.pdf"
-
-# Create reader and writer objects
-reader = PdfReader(input_pdf)
-writer = PdfWriter()
-
-# Load the watermark page
-watermark = PdfReader(watermark_pdf).pages[0]
-
-# Apply watermark to each page
-for page in reader.pages:
-    page.merge_page(watermark)   # Overlay watermark on the page
-    writer.add_page(page)
-
-# Save the result
-with open(output_pdf, "wb") as output_file:
-    writer.write(output_file)
-
-print(f"✅ Watermark added successfully! Saved as {output_pdf}")
+"""
+Batch PDF watermarking.
+
+The watermark page becomes one Form XObject per output file. Each stamped
+page references it with a short "/Wm0 Do" operator instead of receiving a
+merged copy of the watermark's content stream, so output size and CPU time
+barely depend on how complex the watermark is. Files are processed on a
+process pool. Optional per-page text can be stamped too, with placeholders
+{page}, {pages}, {recipient} and {file}.
+
+    python PDFWATERMARK.py                                  # old behaviour: superpdf.pdf + water.pdf
+    python PDFWATERMARK.py -w water.pdf --out-dir stamped reports/*.pdf --pages 2-
+    python PDFWATERMARK.py -w water.pdf --out-dir out a.pdf --recipients names.txt \\
+        --text "Confidential - {recipient} - page {page}/{pages}"
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, IndirectObject,
+                            NameObject)
+
+XOBJECT_NAME = "/Wm"   # resource names are /Wm0, /Wm1, ... whichever the page doesn't use yet
+FONT_NAME = "/WmF"
+
+
+def parse_ranges(spec, page_count):
+    """'1-3,7,10-' -> set of 0-based page indexes (1-based and inclusive in the spec)."""
+    if not spec:
+        return set(range(page_count))
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        m = re.fullmatch(r"(\d*)\s*-\s*(\d*)", part)
+        if m:
+            start = int(m.group(1) or 1)
+            end = int(m.group(2) or page_count)
+        elif part.isdigit():
+            start = end = int(part)
+        else:
+            raise ValueError(f"bad page range: {part!r}")
+        pages.update(range(max(start, 1) - 1, min(end, page_count)))
+    return pages
+
+
+def pdf_text(text):
+    """Escape a str for a PDF literal string (Helvetica uses WinAnsi, so latin-1 it is)."""
+    raw = text.encode("latin-1", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def add_stream(writer, data, extra=None):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    if extra:
+        stream.update(extra)
+    return writer._add_object(stream)
+
+
+def watermark_xobject(writer, wm_page):
+    """Copy the watermark page into `writer` once, as a Form XObject."""
+    box = wm_page.mediabox
+    contents = wm_page.get_contents()
+    resources = wm_page.get("/Resources")
+    resources = resources.get_object().clone(writer) if resources is not None else DictionaryObject()
+    return add_stream(writer, contents.get_data() if contents is not None else b"", {
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject(FloatObject(v) for v in (box.left, box.bottom, box.right, box.top)),
+        NameObject("/Resources"): resources,
+    })
+
+
+def add_resource(page, category, prefix, ref):
+    """
+    Register `ref` in the page's resources under the first free name
+    prefix0, prefix1, ... and return that name. Names the page already uses
+    for something else are never overwritten; a name that already points
+    at `ref` (resources shared between pages) is reused.
+    """
+    resources = page.get("/Resources")
+    if resources is None:
+        resources = DictionaryObject()
+        page[NameObject("/Resources")] = resources
+    resources = resources.get_object()
+    group = resources.get(category)
+    if group is None:
+        group = DictionaryObject()
+        resources[NameObject(category)] = group
+    group = group.get_object()
+    n = 0
+    while True:
+        name = NameObject(f"{prefix}{n}")
+        current = group.get(name)
+        if current is None:
+            group[name] = ref
+            return name
+        if isinstance(current, IndirectObject) and current.idnum == ref.idnum:
+            return name
+        n += 1
+
+
+def watermark_file(src, dst, watermark, pages_spec=None, text=None, recipient="", font_size=10,
+                   under=False):
+    """Stamp `src` into `dst`. Returns (pages stamped, total pages, output bytes)."""
+    reader = PdfReader(src)
+    wm_reader = PdfReader(watermark)
+    writer = PdfWriter()
+    xobj = watermark_xobject(writer, wm_reader.pages[0])
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"), NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+    })) if text else None
+    # q/Q around the original content so its graphics state can't leak into the stamp
+    save = add_stream(writer, b"q\n")
+    restore = add_stream(writer, b"\nQ\n")
+    shared_stamps = {}  # XObject name -> "q /<name> Do Q" stream, normally just /Wm0
+
+    total = len(reader.pages)
+    selected = parse_ranges(pages_spec, total)
+    name = os.path.basename(src)
+    for i, page in enumerate(reader.pages):
+        page = writer.add_page(page)
+        if i not in selected:
+            continue
+        xname = add_resource(page, "/XObject", XOBJECT_NAME, xobj).encode("ascii")
+        if text:
+            fname = add_resource(page, "/Font", FONT_NAME, font).encode("ascii")
+            line = text.format(page=i + 1, pages=total, recipient=recipient, file=name)
+            x, y = float(page.mediabox.left) + 36, float(page.mediabox.bottom) + 20
+            stamp = add_stream(writer, b"q %s Do Q\nBT %s %d Tf %.2f %.2f Td %s Tj ET\n"
+                               % (xname, fname, font_size, x, y, pdf_text(line)))
+        else:
+            if xname not in shared_stamps:
+                shared_stamps[xname] = add_stream(writer, b"q %s Do Q\n" % xname)
+            stamp = shared_stamps[xname]
+        original = page.get("/Contents")
+        if original is None:
+            existing = []
+        elif isinstance(original.get_object(), ArrayObject):
+            existing = list(original.get_object())
+        else:
+            existing = [page.raw_get("/Contents")]
+        parts = [stamp, save, *existing, restore] if under else [save, *existing, restore, stamp]
+        page[NameObject("/Contents")] = ArrayObject(parts)
+
+    tmp = dst + ".part"
+    with open(tmp, "wb") as f:
+        writer.write(f)
+    os.replace(tmp, dst)
+    return len(selected), total, os.path.getsize(dst)
+
+
+def _job(args):
+    src, dst, watermark, pages_spec, text, recipient, font_size, under = args
+    t0 = time.perf_counter()
+    try:
+        stamped, total, size = watermark_file(src, dst, watermark, pages_spec, text, recipient, font_size, under)
+    except Exception as e:
+        return src, dst, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0
+    return src, dst, (stamped, total, size), "", time.perf_counter() - t0
+
+
+def slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") or "recipient"
+
+
+def plan_jobs(inputs, out_dir, output, recipients):
+    """[(src, dst, recipient)]: one output per input, or per (input, recipient)."""
+    jobs = []
+    for src in inputs:
+        stem = os.path.splitext(os.path.basename(src))[0]
+        for recipient in recipients or [""]:
+            if output and len(inputs) == 1 and not recipients:
+                dst = output
+            else:
+                suffix = f"_{slug(recipient)}" if recipient else "_watermarked"
+                dst = os.path.join(out_dir, stem + suffix + ".pdf")
+            jobs.append((src, dst, recipient))
+    return jobs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Watermark many PDFs in parallel")
+    ap.add_argument("inputs", nargs="*", help="PDF files or glob patterns (default: superpdf.pdf)")
+    ap.add_argument("-w", "--watermark", default="water.pdf", help="PDF whose first page is the watermark")
+    ap.add_argument("-o", "--output", default=None,
+                    help="output file when there is a single input and no --recipients")
+    ap.add_argument("--out-dir", default=".", help="folder for outputs in batch mode")
+    ap.add_argument("--pages", default=None, help="pages to stamp, e.g. 1-3,7,10- (default: all)")
+    ap.add_argument("--text", default=None, help="per-page text; {page} {pages} {recipient} {file}")
+    ap.add_argument("--recipient", default="", help="value for {recipient}")
+    ap.add_argument("--recipients", default=None, help="file with one recipient per line; one copy each")
+    ap.add_argument("--font-size", type=int, default=10)
+    ap.add_argument("--under", action="store_true", help="draw the watermark beneath the page content")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = ap.parse_args()
+
+    inputs = []
+    for pattern in args.inputs or ["superpdf.pdf"]:
+        inputs += sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+    recipients = None
+    if args.recipients:
+        with open(args.recipients, "r", encoding="utf-8") as f:
+            recipients = [line.strip() for line in f if line.strip()]
+    if args.output and (len(inputs) > 1 or recipients):
+        ap.error("-o/--output needs exactly one input and no --recipients; use --out-dir for batches")
+    output = args.output or (None if args.inputs else "watermarked_output.pdf")
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = [(src, dst, args.watermark, args.pages, args.text, recipient or args.recipient, args.font_size, args.under)
+            for src, dst, recipient in plan_jobs(inputs, args.out_dir, output, recipients)]
+
+    t0 = time.perf_counter()
+    pages = failed = 0
+    workers = 1 if len(jobs) == 1 else args.workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for src, dst, result, error, secs in pool.map(_job, jobs, chunksize=4):
+            if result is None:
+                failed += 1
+                print(f"FAILED: {src}: {error}", file=sys.stderr)
+                continue
+            stamped, total, size = result
+            pages += total
+            print(f"✅ {src} -> {dst} ({stamped}/{total} pages stamped, {size / 1e6:.2f} MB, {secs * 1000:.0f} ms)")
+    wall = time.perf_counter() - t0
+    print(f"{len(jobs) - failed} files, {pages} pages in {wall:.2f}s ({pages / (wall or 1e-9):.0f} pages/s)"
+          + (f", {failed} failed" if failed else ""))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: pooled bulk sending vs one SMTP session per message.
+
+Runs a local aiosmtpd server (pip install aiosmtpd) that adds --handshake-ms
+to every EHLO (standing in for STARTTLS + login round trips) and
+--data-ms to every message, then sends --count messages both ways.
+--drop-every N makes the server answer 421 and hang up every N messages,
+to exercise reconnects.
+
+    python bench_bulk_mailer.py --count 2000 --connections 1 4 8 --handshake-ms 30
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from email.message import EmailMessage
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    raise SystemExit("This benchmark needs aiosmtpd: pip install aiosmtpd")
+
+from bulk_mailer import BulkSender, SMTPConnectionPool, SendJournal, connect
+
+HOST, PORT = "127.0.0.1", 8025
+
+
+class CountingHandler:
+    def __init__(self, handshake, data, drop_every):
+        self.handshake = handshake
+        self.data = data
+        self.drop_every = drop_every
+        self.received = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.data)
+        with self._lock:
+            self.received += 1
+            n = self.received
+        if self.drop_every and n % self.drop_every == 0:
+            server.transport.close()
+            return "421 closing connection"
+        return "250 OK"
+
+
+def make_messages(count):
+    for i in range(count):
+        msg = EmailMessage()
+        msg["From"] = "bench@example.com"
+        msg["To"] = f"user{i}@example{i % 10}.com"
+        msg["Subject"] = f"Message {i}"
+        msg.set_content("Hello from the benchmark.\n" * 20)
+        yield f"user{i}", msg
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=1000)
+    ap.add_argument("--connections", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--handshake-ms", type=float, default=30.0)
+    ap.add_argument("--data-ms", type=float, default=1.0)
+    ap.add_argument("--drop-every", type=int, default=0)
+    args = ap.parse_args()
+
+    handler = CountingHandler(args.handshake_ms / 1000, args.data_ms / 1000, 0)
+    controller = Controller(handler, hostname=HOST, port=PORT)
+    controller.start()
+    settings = {"host": HOST, "port": PORT, "tls": "none", "user": "", "password": ""}
+    try:
+        naive_count = min(args.count, 200)
+        t0 = time.perf_counter()
+        for _, msg in make_messages(naive_count):
+            with connect(settings) as smtp:
+                smtp.send_message(msg)
+        secs = time.perf_counter() - t0
+        print(f"{'per-message':<16} {naive_count:6d} msgs  {secs:6.2f}s  {naive_count / secs:8.1f} msg/s")
+
+        handler.drop_every = args.drop_every  # only the pooled sender knows how to recover
+
+        for n in args.connections:
+            with tempfile.TemporaryDirectory() as tmp:
+                before = handler.received
+                pool = SMTPConnectionPool(settings, size=n, max_messages=1000)
+                journal = SendJournal(os.path.join(tmp, "journal.jsonl"))
+                stats = BulkSender(pool, journal, quiet=True, backoff=0.01).send_all(make_messages(args.count))
+                pool.close()
+                journal.close()
+                secs = stats["seconds"]
+                print(f"{f'pool x{n}':<16} {stats['sent']:6d} msgs  {secs:6.2f}s  {stats['sent'] / secs:8.1f} msg/s  "
+                      f"{stats['connections_opened']} connections, {stats['retries']} retries, "
+                      f"{stats['failed']} failed, server got {handler.received - before}")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
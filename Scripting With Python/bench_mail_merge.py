@@ -0,0 +1,108 @@
+"""
+Benchmark: compiled mail merge vs preparing every message from scratch.
+
+Generates --count recipient rows, an HTML template with a <style> block
+and an inline logo, then builds every message two ways: the naive loop
+(re-read the template, re-inline the CSS, re-read and re-encode the
+image for each recipient) and MailMerge (all of that once per worker).
+With --send the MailMerge output is also delivered to a local aiosmtpd
+server through the pooled sender.
+
+    python bench_mail_merge.py --count 20000 --workers 0 4 --send
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from mail_merge import Campaign, MailMerge, read_rows
+
+TEMPLATE = """<html><head><style>
+body { font-family: Arial, sans-serif; background: #f4f4f4 }
+h1 { color: #1a73e8; font-size: 22px }
+.card { background: #ffffff; padding: 16px; border-radius: 6px }
+p { line-height: 1.5 }
+a:hover { text-decoration: underline }
+</style></head><body>
+<div class="card"><img src="logo.png" alt="logo"><h1>Hello {{ name }}!</h1>
+<p>Your code is <b>{{ code }}</b>. It expires in {{ days }} days.</p>
+<p>Thanks for being with us since {{ since }}.</p></div></body></html>
+"""
+
+
+def make_campaign(folder, count):
+    with open(os.path.join(folder, "logo.png"), "wb") as f:
+        f.write(os.urandom(40_000))
+    with open(os.path.join(folder, "template.html"), "w", encoding="utf-8") as f:
+        f.write(TEMPLATE)
+    with open(os.path.join(folder, "rows.jsonl"), "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"email": f"user{i}@example{i % 50}.com", "name": f"User {i}",
+                                "code": f"C{i:06d}", "days": 7 + i % 30, "since": 2000 + i % 25}) + "\n")
+
+
+def naive(folder, spec):
+    """What calling a one-off send script per recipient costs: nothing is reused."""
+    t0 = time.perf_counter()
+    n = 0
+    for row in read_rows(os.path.join(folder, "rows.jsonl")):
+        with open(os.path.join(folder, "template.html"), "r", encoding="utf-8") as f:
+            html = f.read()
+        campaign = Campaign(**dict(spec, html=html))
+        campaign.build(row, campaign.render(row))
+        n += 1
+    return n, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=20000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    ap.add_argument("--send", action="store_true", help="also deliver to a local aiosmtpd server")
+    ap.add_argument("--connections", type=int, default=4)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_campaign(tmp, args.count)
+        spec = {"html": TEMPLATE, "subject": "Your code, {{ name }}", "sender": "News <news@example.com>",
+                "base_dir": tmp}
+        rows_path = os.path.join(tmp, "rows.jsonl")
+
+        n, secs = naive(tmp, spec)
+        print(f"{'naive':<12} {n:7d} msgs  {secs:6.2f}s  {n / secs:8.0f} msg/s")
+        for workers in args.workers:
+            merge = MailMerge(spec, workers)
+            t0 = time.perf_counter()
+            size = sum(len(msg.data) for _, msg in merge.messages(read_rows(rows_path)))
+            secs = time.perf_counter() - t0
+            s = merge.stats
+            print(f"{f'merge j={workers}':<12} {s['rendered']:7d} msgs  {secs:6.2f}s  {s['rendered'] / secs:8.0f} msg/s  "
+                  f"render {s['render_seconds']:.2f}s  MIME {s['mime_seconds']:.2f}s  {size / 1e6:.0f} MB")
+
+        if args.send:
+            from bench_bulk_mailer import HOST, PORT, Controller, CountingHandler
+            from bulk_mailer import BulkSender, SMTPConnectionPool
+
+            handler = CountingHandler(0.0, 0.0, 0)
+            controller = Controller(handler, hostname=HOST, port=PORT)
+            controller.start()
+            try:
+                settings = {"host": HOST, "port": PORT, "tls": "none", "user": "", "password": ""}
+                pool = SMTPConnectionPool(settings, size=args.connections, max_messages=1000)
+                merge = MailMerge(spec, args.workers[-1])
+                t0 = time.perf_counter()
+                send = BulkSender(pool, quiet=True).send_all(merge.messages(read_rows(rows_path)))
+                secs = time.perf_counter() - t0
+                pool.close()
+                s = merge.stats
+                print(f"{'merge+send':<12} {send['sent']:7d} msgs  {secs:6.2f}s  {send['sent'] / secs:8.0f} msg/s  "
+                      f"render {s['render_seconds']:.2f}s  MIME {s['mime_seconds']:.2f}s  "
+                      f"send {send['send_seconds']:.2f}s  server got {handler.received}")
+            finally:
+                controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: segmented outbox log vs rewriting outbox.json on every post.
+
+The old post() loads the whole {"posts": [...]} file and writes it back,
+so one post costs O(outbox). This times a single old-style post at a few
+outbox sizes. It then fills the segmented outbox to --count posts with
+post_many() batches of --batch, and times a single post, tail, stats,
+a full read-back and compaction at that size.
+
+    python bench_outbox.py --count 1000000 --batch 5 --old-sizes 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from main_single import MockTwitter, ensure_paths
+
+
+def old_post(path, text):
+    """MockTwitter.post() before the segment log."""
+    item = {"id": f"p{int(datetime.now(tz=timezone.utc).timestamp())}", "user": "SimpleBot", "text": text,
+            "timestamp": datetime.now(tz=timezone.utc).isoformat(), "meta": {"type": "auto-reply"}}
+    with open(path, "r+", encoding="utf-8") as f:
+        box = json.load(f)
+        box["posts"].append(item)
+        f.seek(0); json.dump(box, f, indent=2); f.truncate()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=5, help="posts per post_many() call (a reply batch)")
+    ap.add_argument("--old-sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    ap.add_argument("--segment-mb", type=int, default=64)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        post = {"id": "p0", "user": "SimpleBot", "text": "@someone Python is love — keep coding!",
+                "timestamp": datetime.now(tz=timezone.utc).isoformat(), "meta": {"type": "auto-reply"}}
+        for size in args.old_sizes:
+            path = os.path.join(tmp, "outbox.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"posts": [post] * size}, f, indent=2)
+            t0 = time.perf_counter()
+            old_post(path, "one more")
+            print(f"old outbox.json   {size:>9,} posts: one post {(time.perf_counter() - t0) * 1e3:9.1f} ms")
+            os.remove(path)
+
+        ensure_paths(tmp)
+        tw = MockTwitter(tmp)
+        tw.outbox.max_bytes = args.segment_mb << 20
+        batch = [(f"@user{i} Python is love — keep coding!", {"type": "auto-reply"}) for i in range(args.batch)]
+        t0 = time.perf_counter()
+        for _ in range(args.count // args.batch):
+            tw.post_many(batch)
+        secs = time.perf_counter() - t0
+        n = args.count // args.batch * args.batch
+        print(f"segment log       {n:>9,} posts in batches of {args.batch}: {secs:.1f}s "
+              f"({n / secs:,.0f} posts/s, {secs / (n / args.batch) * 1e6:.0f} µs per batch)")
+
+        t0 = time.perf_counter()
+        tw.post("one more")
+        print(f"segment log       {n + 1:>9,} posts: one post {(time.perf_counter() - t0) * 1e3:9.3f} ms")
+        tw.outbox.close()
+
+        box = tw.outbox
+        for name, fn in (("tail 20", lambda: box.tail(20)), ("stats", box.stats),
+                         ("read back", lambda: sum(1 for _ in box)), ("compact", box.compact)):
+            t0 = time.perf_counter()
+            result = fn()
+            secs = time.perf_counter() - t0
+            shown = len(result) if isinstance(result, list) else result
+            print(f"{name:<17} {secs * 1e3:10.1f} ms  {shown}")
+        ids = [p["id"] for p in box]
+        print(f"ids unique: {len(set(ids)) == len(ids)}, increasing: "
+              f"{all(int(a[1:]) < int(b[1:]) for a, b in zip(ids, ids[1:]))}")
+
+
+if __name__ == "__main__":
+    main()
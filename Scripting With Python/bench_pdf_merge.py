@@ -0,0 +1,107 @@
+"""
+Benchmark: streaming merge (PDFMerger.py) vs PyPDF2's PdfMerger.
+
+Generates --count small PDFs that all use the same font and the same logo
+image, then merges them both ways. Each merge runs in its own process so
+the peak RSS figures are separate.
+
+    python bench_pdf_merge.py --count 1000 --pages 3
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from PDFMerger import StreamingMerger, peak_rss_mb
+
+LOGO_SIDE = 200  # 200x200 RGB = 120 KB per copy
+
+
+def make_pdfs(folder, count, pages):
+    logo = bytes((x * 7 + y * 3) % 256 for y in range(LOGO_SIDE) for x in range(LOGO_SIDE * 3))
+    for i in range(count):
+        w = PdfWriter()
+        font = w._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica")}))
+        img = DecodedStreamObject()
+        img.set_data(logo)
+        img.update({NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Image"),
+                    NameObject("/Width"): NumberObject(LOGO_SIDE), NameObject("/Height"): NumberObject(LOGO_SIDE),
+                    NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+                    NameObject("/BitsPerComponent"): NumberObject(8)})
+        img = w._add_object(img)
+        for p in range(pages):
+            w.add_blank_page(612, 792)
+            page = w.pages[-1]  # add_blank_page returns the page before it is copied in
+            content = DecodedStreamObject()
+            content.set_data(b"BT /F1 24 Tf 72 720 Td (Document %d page %d) Tj ET q 100 0 0 100 72 560 cm /Im0 Do Q"
+                             % (i, p + 1))
+            page[NameObject("/Resources")] = DictionaryObject({
+                NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+                NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): img})})
+            page[NameObject("/Contents")] = w._add_object(content)
+        with open(os.path.join(folder, f"doc_{i:05d}.pdf"), "wb") as f:
+            w.write(f)
+
+
+def run_one(mode, src_dir, out):
+    """Child process: merge every PDF in src_dir and print a JSON result line."""
+    files = sorted(glob.glob(os.path.join(src_dir, "*.pdf")))
+    t0 = time.perf_counter()
+    if mode == "streaming":
+        merger = StreamingMerger(out)
+        for path in files:
+            merger.add(path)
+        merger.close()
+    else:
+        merger = PdfMerger()
+        for path in files:
+            merger.append(path)
+        merger.write(out)
+        merger.close()
+    secs = time.perf_counter() - t0
+    print(json.dumps({"seconds": secs, "rss_mb": peak_rss_mb(), "bytes": os.path.getsize(out)}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=1000)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--skip-pypdf2", action="store_true", help="only time the streaming merger")
+    ap.add_argument("--run", nargs=3, metavar=("MODE", "SRC", "OUT"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.run:
+        run_one(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = os.path.join(tmp, "src")
+        os.makedirs(src_dir)
+        t0 = time.perf_counter()
+        make_pdfs(src_dir, args.count, args.pages)
+        print(f"generated {args.count} PDFs in {time.perf_counter() - t0:.1f}s")
+        total_pages = args.count * args.pages
+        modes = ["streaming"] if args.skip_pypdf2 else ["streaming", "PdfMerger"]
+        for mode in modes:
+            out = os.path.join(tmp, f"{mode}.pdf")
+            line = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", mode, src_dir, out],
+                                  check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1]
+            r = json.loads(line)
+            pages = len(PdfReader(out).pages)
+            assert pages == total_pages, f"{mode}: {pages} pages, expected {total_pages}"
+            rss = f"{r['rss_mb']:6.0f} MB" if r["rss_mb"] is not None else "     n/a"
+            print(f"{mode:<10} {r['seconds']:7.2f}s  {total_pages / r['seconds']:7.0f} pages/s  "
+                  f"peak RSS {rss}  output {r['bytes'] / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
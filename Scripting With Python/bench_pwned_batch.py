@@ -0,0 +1,74 @@
+"""
+Benchmark: batch auditing vs one range request per password.
+
+Builds an input of --count entries drawn from --distinct passwords with a
+skewed (Zipf-like) frequency, as a real user table has, and checks it
+against pwned_stub_server: the original one-request-per-password loop on
+a sample, then audit_hashes() with a cold and a warm range cache.
+
+    python bench_pwned_batch.py --count 100000 --distinct 20000 --latency 0.01
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import requests
+
+from pwned_batch import RangeCache, audit_hashes, make_session, to_sha1
+from pwned_stub_server import StubServer
+
+
+def naive_check(session, base_url, password):
+    """What password_checker.pwned_api_check() does, pointed at the stub."""
+    h = to_sha1(password, "password")
+    res = session.get(base_url + h[:5])
+    for line in res.text.splitlines():
+        suffix, count = line.split(":")
+        if suffix == h[5:]:
+            return int(count)
+    return 0
+
+
+def make_entries(count, distinct, seed=0):
+    rnd = random.Random(seed)
+    pool = [f"pw{i}-{rnd.randint(0, 10 ** 6)}" for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return pool, rnd.choices(pool, weights, k=count)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=100_000)
+    ap.add_argument("--distinct", type=int, default=20_000)
+    ap.add_argument("--latency", type=float, default=0.01)
+    ap.add_argument("--workers", type=int, default=32)
+    ap.add_argument("--naive-sample", type=int, default=300)
+    args = ap.parse_args()
+
+    pool, entries = make_entries(args.count, args.distinct)
+    known = pool[:500]  # the most common passwords are the breached ones
+    with StubServer(latency=args.latency, known=known) as stub, tempfile.TemporaryDirectory() as tmp:
+        session = requests.Session()
+        sample = entries[:args.naive_sample]
+        t0 = time.perf_counter()
+        found = sum(1 for p in sample if naive_check(session, stub.base_url, p))
+        secs = time.perf_counter() - t0
+        print(f"{'per-password':<14} {len(sample):7d} entries  {secs:7.2f}s  {len(sample) / secs:9,.0f} entries/s  "
+              f"{stub.requests} requests, {found} found")
+
+        hashes = [to_sha1(p, "password") for p in entries]
+        cache = RangeCache(tmp, ttl=3600)
+        for name in ("batch cold", "batch warm"):
+            before = stub.requests
+            t0 = time.perf_counter()
+            counts, stats = audit_hashes(hashes, stub.base_url, args.workers, cache, make_session(args.workers))
+            secs = time.perf_counter() - t0
+            found = sum(1 for c in counts if c > 0)
+            print(f"{name:<14} {len(hashes):7d} entries  {secs:7.2f}s  {len(hashes) / secs:9,.0f} entries/s  "
+                  f"{stub.requests - before} requests for {stats['ranges']} ranges, {found} found")
+
+
+if __name__ == "__main__":
+    main()
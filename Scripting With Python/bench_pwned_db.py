@@ -0,0 +1,64 @@
+"""
+Benchmark: offline Pwned Passwords lookups.
+
+Writes a synthetic dump of --count random SHA-1 hashes in the official
+'HASH:COUNT' format, imports it with pwned_db (plus a bloom filter), then
+times --lookups hits and misses with and without the bloom filter.
+
+    python bench_pwned_db.py --count 2000000 --lookups 200000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from pwned_db import PwnedDB, build_bloom, build_db
+
+
+def make_dump(path, count, sort=True):
+    rnd = random.Random(0)
+    digests = [rnd.randbytes(20) for _ in range(count)]
+    if sort:
+        digests.sort()
+    with open(path, "w", encoding="ascii") as f:
+        for d in digests:
+            f.write(f"{d.hex().upper()}:{rnd.randint(1, 100000)}\n")
+    return digests
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=2_000_000)
+    ap.add_argument("--lookups", type=int, default=200_000)
+    ap.add_argument("--unsorted", action="store_true", help="shuffle the dump to exercise the on-disk sort")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump, db_path = os.path.join(tmp, "dump.txt"), os.path.join(tmp, "pwned.db")
+        digests = make_dump(dump, args.count, sort=not args.unsorted)
+        t0 = time.perf_counter()
+        build_db(dump, db_path, tmp)
+        t1 = time.perf_counter()
+        build_bloom(db_path)
+        t2 = time.perf_counter()
+        print(f"import {args.count:,} hashes: {t1 - t0:.1f}s ({args.count / (t1 - t0):,.0f}/s), "
+              f"db {os.path.getsize(db_path) / 1e6:.1f} MB (dump {os.path.getsize(dump) / 1e6:.1f} MB); "
+              f"bloom {t2 - t1:.1f}s")
+
+        rnd = random.Random(1)
+        hits = rnd.sample(digests, min(args.lookups, len(digests)))
+        misses = [rnd.randbytes(20) for _ in range(args.lookups)]
+        for bloom in (False, True):
+            with PwnedDB(db_path, bloom=bloom) as db:
+                for name, queries in (("hits", hits), ("misses", misses)):
+                    t0 = time.perf_counter()
+                    found = sum(1 for d in queries if db.count_digest(d))
+                    secs = time.perf_counter() - t0
+                    print(f"{'bloom' if bloom else 'no bloom':<9} {name:<7} {len(queries) / secs:12,.0f} lookups/s  "
+                          f"({found:,} found)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: compiled RuleMatcher vs calling contains_any() per rule.
+
+Builds rule sets of growing size (random keywords and short phrases,
+with SimpleBot's four rules last so most tweets have to consider every
+rule), then picks the first matching rule for --tweets synthetic tweets
+both ways. The two must agree on every tweet, and the word-boundary mode
+is checked against an equivalent regex per keyword.
+
+    python bench_rule_matcher.py --tweets 20000 --rules 4 64 1024 4096
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+import main_single
+from main_single import WORDS, RuleMatcher, contains_any, synthetic_timeline
+
+
+def first_rule_scan(text, rules):
+    """What auto_replies() did before: contains_any() for each rule in turn."""
+    for r, rule in enumerate(rules):
+        if contains_any(text, rule["keywords"]):
+            return r
+    return None
+
+
+def first_rule_regex(text, patterns):
+    t = (text or "").lower()
+    for r, pats in enumerate(patterns):
+        if any(p.search(t) for p in pats):
+            return r
+    return None
+
+
+def make_rules(count, base, rnd):
+    rules = []
+    for i in range(max(0, count - len(base))):
+        kws = []
+        for _ in range(rnd.randint(1, 4)):
+            if rnd.random() < 0.2:
+                kws.append(" ".join(rnd.sample(WORDS, 2)))
+            else:
+                kws.append("".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 7))))
+        rules.append({"keywords": kws, "reply": f"reply {i}"})
+    return rules + base
+
+
+def tricky_cases(rnd, n):
+    """Overlapping keywords, keywords inside other keywords, odd case and non-ASCII."""
+    alphabet = "abhi hiİßé_ -"
+    rules = [{"keywords": ["".join(rnd.choices(alphabet, k=rnd.randint(1, 4))) for _ in range(rnd.randint(1, 3))],
+              "reply": str(i)} for i in range(rnd.randint(1, 40))]
+    texts = ["".join(rnd.choices(alphabet + "XYZ", k=rnd.randint(0, 30))) for _ in range(n)]
+    return rules, texts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--tweets", type=int, default=20000)
+    ap.add_argument("--rules", type=int, nargs="+", default=[4, 16, 64, 256, 1024, 4096])
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    texts = [t["text"] for t in synthetic_timeline(args.tweets)]
+    base_rules = [  # SimpleBot's rules
+        {"keywords": ["hello", "salam", "hi"], "reply": "hi"},
+        {"keywords": ["help", "guide", "madad"], "reply": "help"},
+        {"keywords": ["python", "code"], "reply": "python"},
+        {"keywords": ["thanks", "shukriya"], "reply": "thanks"},
+    ]
+
+    default_small = main_single.SMALL_RULESET
+    # correctness on adversarial inputs, both matcher strategies
+    for small in (10 ** 9, 0):
+        main_single.SMALL_RULESET = small
+        for _ in range(300):
+            rules, cases = tricky_cases(rnd, 50)
+            m = RuleMatcher(rules)
+            wb = RuleMatcher(rules, word_boundary=True)
+            pats = [[re.compile(r"(?<!\w)" + re.escape(k.lower()) + r"(?!\w)") for k in r["keywords"]] for r in rules]
+            for text in cases:
+                if m.match(text) != first_rule_scan(text, rules):
+                    raise SystemExit(f"mismatch: {text!r} {rules}")
+                if all(k for r in rules for k in r["keywords"]) and wb.match(text) != first_rule_regex(text, pats):
+                    raise SystemExit(f"word-boundary mismatch: {text!r} {rules}")
+    main_single.SMALL_RULESET = default_small
+    print("equivalence checks passed")
+
+    print(f"{'rules':>6} {'keywords':>9} {'scan tw/s':>11} {'small tw/s':>11} {'automaton tw/s':>15} "
+          f"{'build ms':>9}  matched")
+    for count in args.rules:
+        rules = make_rules(count, base_rules, random.Random(count))
+        nkw = sum(len(r["keywords"]) for r in rules)
+        sample = texts[:max(200, args.tweets * 4 // max(count, 4))]  # keep the slow scan bounded
+        t0 = time.perf_counter()
+        expected = [first_rule_scan(t, rules) for t in sample]
+        scan = len(sample) / (time.perf_counter() - t0)
+
+        row = []
+        for small in (10 ** 9, 0):
+            main_single.SMALL_RULESET = small
+            t0 = time.perf_counter()
+            m = RuleMatcher(rules)
+            build = time.perf_counter() - t0
+            if [m.match(t) for t in sample] != expected:
+                raise SystemExit(f"{count} rules: results differ from contains_any()")
+            t0 = time.perf_counter()
+            got = [m.match(t) for t in texts]
+            row.append(len(texts) / (time.perf_counter() - t0))
+        main_single.SMALL_RULESET = default_small
+        matched = sum(1 for g in got if g is not None) / len(got)
+        print(f"{count:6d} {nkw:9d} {scan:11,.0f} {row[0]:11,.0f} {row[1]:15,.0f} {build * 1e3:9.1f}  {matched:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: heap Scheduler vs the old 30-second polling loop.
+
+Writes a schedule with --jobs entries (daily HH:MM posts plus cron
+expressions), then:
+
+  * simulates one day on a fake clock, comparing the old loop (re-read
+    and scan schedule.json every tick) with Scheduler.run_pending() at
+    every due time, including a --pause minute stall mid-day;
+  * runs the real Scheduler.run() loop for --idle seconds with nothing
+    due and reports the CPU it used;
+  * edits the schedule while the loop sleeps and times how long a job
+    added "for now" takes to fire.
+
+    python bench_scheduler.py --jobs 5000 --pause 20 --idle 5
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from main_single import FileWatch, Scheduler
+
+
+def make_schedule(path, jobs, rnd):
+    entries = []
+    for i in range(jobs):
+        r = rnd.random()
+        if r < 0.6:
+            entries.append({"at": f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}", "text": f"daily {i}"})
+        elif r < 0.8:
+            entries.append({"cron": f"{rnd.randrange(60)} */{rnd.choice([2, 3, 4, 6])} * * *", "text": f"cron {i}"})
+        elif r < 0.95:
+            entries.append({"cron": f"{rnd.randrange(60)} 9-17 * * mon-fri", "text": f"office {i}"})
+        else:
+            entries.append({"cron": f"*/{rnd.choice([5, 10, 15, 30])} * * * *", "text": f"often {i}"})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"scheduled": entries}, f)
+
+
+def legacy_day(path, start, tick, pause_at, pause):
+    """The old scheduler_loop() on a fake clock; returns (posts, seconds spent in ticks)."""
+    posts, busy = 0, 0.0
+    now, end, last_day = start, start + timedelta(days=1), start.date()
+    while now < end:
+        t0 = time.perf_counter()
+        if now.date() != last_day:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for s in data["scheduled"]:
+                s["posted_today"] = False
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            last_day = now.date()
+        hhmm = now.strftime("%H:%M")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        changed = False
+        for s in data["scheduled"]:
+            if s.get("at") == hhmm and not s.get("posted_today", False):
+                posts += 1
+                s["posted_today"] = True
+                changed = True
+        if changed:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        busy += time.perf_counter() - t0
+        now += timedelta(seconds=tick)
+        if pause_at <= now < pause_at + timedelta(seconds=tick):
+            now += timedelta(minutes=pause)  # the process was suspended
+    return posts, busy
+
+
+def heap_day(path, start, pause_at, pause, catchup):
+    clock = [start]
+    posts = Counter()
+
+    def fire(batch):
+        for entry, _ in batch:
+            posts[entry["text"].split()[0]] += 1
+
+    t0 = time.perf_counter()
+    sched = Scheduler(path, fire, catchup=catchup, now=lambda: clock[0])
+    load = time.perf_counter() - t0
+    end, paused = start + timedelta(days=1), False
+    t0 = time.perf_counter()
+    while sched.next_due() < end:
+        clock[0] = sched.next_due()
+        if not paused and clock[0] >= pause_at:
+            clock[0] = pause_at + timedelta(minutes=pause)
+            paused = True
+        sched.run_pending()
+    return posts, load, time.perf_counter() - t0, sched
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--jobs", type=int, default=5000)
+    ap.add_argument("--pause", type=int, default=20, help="minutes the process is stalled mid-day")
+    ap.add_argument("--catchup", type=float, default=3600)
+    ap.add_argument("--idle", type=float, default=5.0, help="seconds to run the real loop idle")
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    start = datetime(2025, 9, 1, 0, 0)  # a Monday
+    pause_at = start + timedelta(hours=12)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.json")
+        make_schedule(path, args.jobs, rnd)
+
+        with open(path, "r", encoding="utf-8") as f:
+            daily = sum(1 for s in json.load(f)["scheduled"] if "at" in s)
+        posts, busy = legacy_day(path, start, 30, pause_at, args.pause)
+        print(f"old loop   {posts:6d}/{daily} daily posts, cron entries unsupported; "
+              f"{busy:.2f}s in 2880 ticks ({busy / 2880 * 1e3:.1f} ms/tick)")
+
+        make_schedule(path, args.jobs, random.Random(0))
+        posts, load, secs, sched = heap_day(path, start, pause_at, args.pause, args.catchup)
+        total = sum(posts.values())
+        print(f"scheduler  {posts['daily']:6d}/{daily} daily posts, {total - posts['daily']} cron posts; "
+              f"{secs:.2f}s for the day ({total / secs:,.0f} fires/s), load {load * 1e3:.0f} ms, "
+              f"{sched.skipped} skipped as more than {args.catchup:.0f}s late")
+
+        # idle: the nearest job is hours away
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"scheduled": [{"at": (datetime.now() + timedelta(hours=3)).strftime("%H:%M"),
+                                      "text": "later"}]}, f)
+        posted, edited = [], []
+        sched = Scheduler(path, lambda batch: posted.append(time.perf_counter()))
+        watch = FileWatch(path)
+        mode = "inotify" if watch._fd is not None else "mtime polling"
+        watch.close()
+
+        def edit():
+            time.sleep(args.idle)
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["scheduled"].append({"cron": "* * * * *", "text": "now"})
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            edited.append(time.perf_counter())
+            os.replace(path + ".tmp", path)
+
+        threading.Thread(target=edit, daemon=True).start()
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        sched.run(until=datetime.now() + timedelta(seconds=args.idle + 2))
+        cpu, wall = time.process_time() - cpu0, time.perf_counter() - t0
+        latency = (posted[0] - edited[0]) * 1e3 if posted and edited else float("nan")
+        print(f"idle loop  {cpu * 1e3:.1f} ms CPU over {wall:.1f}s wall; "
+              f"edit-to-post latency {latency:.1f} ms ({mode})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: indexed TimelineStore vs scanning the timeline list.
+
+Generates --count synthetic tweets, ingests them into main_single's
+TimelineStore, then times mention, hashtag, user and time-range queries
+against the list scans MockTwitter used to do on every call.
+
+    python bench_timeline.py --count 1000000 --queries 200
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from main_single import TimelineStore, extract_hashtags, parse_ts, synthetic_timeline
+
+
+def scan_mentions(timeline, handle):
+    """The old MockTwitter.get_mentions_for()."""
+    handle = handle.lower().lstrip("@")
+    results = []
+    for t in timeline:
+        mentions = [m.lower().lstrip("@") for m in (t.get("mentions") or [])]
+        if handle in mentions:
+            results.append(t)
+    return results
+
+
+def scan_hashtag(timeline, tag):
+    return [t for t in timeline if tag in extract_hashtags(t.get("text", ""))]
+
+
+def scan_user(timeline, user):
+    return [t for t in timeline if t.get("user") == user]
+
+
+def scan_between(timeline, start, end):
+    return sorted((t for t in timeline if start <= parse_ts(t["timestamp"]) < end),
+                  key=lambda t: parse_ts(t["timestamp"]))
+
+
+def timed(fn, args_list):
+    t0 = time.perf_counter()
+    n = sum(len(fn(*a)) for a in args_list)
+    return (time.perf_counter() - t0) / len(args_list), n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=1_000_000)
+    ap.add_argument("--queries", type=int, default=200, help="indexed queries per kind")
+    ap.add_argument("--scans", type=int, default=3, help="list scans per kind (they are slow)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    tweets = list(synthetic_timeline(args.count))
+    t1 = time.perf_counter()
+    store = TimelineStore(tweets)
+    t2 = time.perf_counter()
+    print(f"generate {args.count:,} tweets {t1 - t0:.1f}s; ingest {t2 - t1:.1f}s "
+          f"({args.count / (t2 - t1):,.0f} tweets/s)")
+
+    rnd = random.Random(1)
+    users = Counter(t["user"] for t in tweets[:10000])
+    handles = ["@SimpleBot"] + [f"@user{rnd.randrange(5000)}" for _ in range(args.queries - 1)]
+    tags = ["python"] + [f"tag{rnd.randrange(2000)}" for _ in range(args.queries - 1)]
+    names = [rnd.choice(list(users)) for _ in range(args.queries)]
+    t_start = parse_ts(tweets[0]["timestamp"])
+    span = parse_ts(tweets[-1]["timestamp"]) - t_start
+    ranges = []
+    for _ in range(args.queries):
+        a = t_start + rnd.random() * span
+        ranges.append((a, a + 300))  # five-minute windows
+
+    kinds = [
+        ("mentions", store.mentioning, scan_mentions, [(h,) for h in handles]),
+        ("hashtag", store.tagged, scan_hashtag, [(h,) for h in tags]),
+        ("user", store.by_user, scan_user, [(u,) for u in names]),
+        ("5-min range", store.between, scan_between, ranges),
+    ]
+    print(f"{'query':<12} {'scan ms':>10} {'index ms':>10} {'speedup':>9}  results/query")
+    for name, indexed, scan, qargs in kinds:
+        scan_s, _ = timed(lambda *a: scan(tweets, *a), qargs[:args.scans])
+        for a in qargs[:args.scans]:
+            if [t["id"] for t in indexed(*a)] != [t["id"] for t in scan(tweets, *a)]:
+                raise SystemExit(f"{name}{a}: index and scan disagree")
+        idx_all, idx_n = timed(indexed, qargs)
+        print(f"{name:<12} {scan_s * 1e3:10.1f} {idx_all * 1e3:10.3f} {scan_s / idx_all:8.0f}x  "
+              f"{idx_n / len(qargs):,.0f}")
+
+    t0 = time.perf_counter()
+    for _ in range(args.queries):
+        list(tweets)[:50]
+    old = (time.perf_counter() - t0) / args.queries
+    t0 = time.perf_counter()
+    for _ in range(args.queries):
+        store.head(50)
+    new = (time.perf_counter() - t0) / args.queries
+    print(f"{'timeline[:50]':<12} {old * 1e3:10.1f} {new * 1e3:10.3f} {old / new:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
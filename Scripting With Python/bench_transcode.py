@@ -0,0 +1,72 @@
+"""
+Benchmark: decode-once transcoding vs decoding the source again for every output.
+
+Generates --count JPEGs (or uses --images), then writes the same outputs
+(every format at full size plus each thumbnail size) both ways on one core.
+
+    python bench_transcode.py --count 40 --formats png webp --thumbs 1024 512 128
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+from JPGtoPNGconverter import available_formats, convert_one, encode, plan_outputs, scan
+
+
+def naive_one(src, dst_base, opts):
+    """What one script per output would do: open + decode + resize from scratch each time."""
+    for path, fmt, side in plan_outputs(dst_base, opts["formats"], opts["thumbs"]):
+        with Image.open(src) as img:
+            img = img.convert("RGB")
+            if side:
+                img.thumbnail((side, side), Image.LANCZOS)
+            encode(img, path, fmt, opts, None)
+
+
+def make_images(folder, count, size=(3000, 2000)):
+    rnd = random.Random(0)
+    for i in range(count):
+        img = Image.linear_gradient("L").resize(size).convert("RGB")
+        img = Image.blend(img, Image.effect_noise(size, rnd.randint(10, 40)).convert("RGB"), 0.3)
+        img.save(os.path.join(folder, f"img_{i:04d}.jpg"), quality=90)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--images", help="folder of JPGs (default: generate)")
+    ap.add_argument("--count", type=int, default=20)
+    ap.add_argument("--formats", nargs="+", default=["png", "webp"])
+    ap.add_argument("--thumbs", nargs="+", type=int, default=[1024, 512, 128])
+    args = ap.parse_args()
+
+    opts = {"skip": "none", "max_size": None, "compress_level": 3, "optimize": False,
+            "formats": available_formats(args.formats), "thumbs": args.thumbs, "quality": 80}
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = args.images or os.path.join(tmp, "src")
+        if not args.images:
+            os.makedirs(src_dir)
+            make_images(src_dir, args.count)
+        results = {}
+        for name, fn in (("naive", naive_one), ("decode-once", convert_one)):
+            out = os.path.join(tmp, name)
+            os.makedirs(out)
+            pairs = list(scan(src_dir, out, False))
+            t0 = time.perf_counter()
+            for src, dst_base in pairs:
+                fn(src, dst_base, opts)
+            results[name] = time.perf_counter() - t0
+            outputs = len(os.listdir(out))
+            print(f"{name:<12} {results[name]:7.2f}s  {len(pairs) / results[name]:6.2f} images/s  "
+                  f"{outputs} outputs")
+            shutil.rmtree(out)
+        print(f"speedup: {results['naive'] / results['decode-once']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: streaming TrendingWindow vs recounting hashtags per query.
+
+Streams --count synthetic tweets (one every --step seconds) through the
+exact and the Count-Min TrendingWindow. At --checks evenly spaced points
+it compares top(--top) with trending_hashtags() over exactly the tweets
+in the live window. The exact mode must match; for the sketch mode
+recall and over-estimation are reported. It also times updates, top-K
+queries and the old full recount.
+
+    python bench_trends.py --count 1000000 --window 15m --tags 2000 500000
+"""
+
+import argparse
+import time
+from bisect import bisect_left
+
+from main_single import TrendingWindow, extract_hashtags, parse_duration, parse_ts, synthetic_timeline, \
+    trending_hashtags
+
+
+def check_exact(got, expected_counter, k):
+    """Same counts in the same order, and every tag really has that count (ties may differ)."""
+    want = expected_counter.most_common(k)
+    return [c for _, c in got] == [c for _, c in want] and all(expected_counter[t] == c for t, c in got)
+
+
+def run(tweets, times, tags_per_tweet, window, k, checks, sketch):
+    from collections import Counter
+
+    engine = TrendingWindow(window, sketch=sketch)
+    every = max(1, len(tweets) // checks)
+    update = query = recount = 0.0
+    ok, recall, over = 0, 0.0, 0.0
+    for i, (tags, ts) in enumerate(zip(tags_per_tweet, times)):
+        t0 = time.perf_counter()
+        engine.add(tags, ts)
+        update += time.perf_counter() - t0
+        if (i + 1) % every:
+            continue
+        t0 = time.perf_counter()
+        got = engine.top(k)
+        query += time.perf_counter() - t0
+        lo = bisect_left(times, engine.since(), 0, i + 1)
+        t0 = time.perf_counter()
+        trending_hashtags(tweets[lo:i + 1], k)  # what Bot.trends() used to do per call
+        recount += time.perf_counter() - t0
+        exact = Counter()
+        for tags_ in tags_per_tweet[lo:i + 1]:
+            exact.update(tags_)
+        if sketch:
+            want = {t for t, _ in exact.most_common(k)}
+            recall += len(want & {t for t, _ in got}) / max(1, len(want))
+            over = max([over] + [(c - exact[t]) / max(1, exact[t]) for t, c in got])
+        elif check_exact(got, exact, k):
+            ok += 1
+        else:
+            raise SystemExit(f"exact mode disagrees at tweet {i}: {got} vs {exact.most_common(k)}")
+    n_checks = len(tweets) // every
+    return {"updates/s": len(tweets) / update, "query_us": query / n_checks * 1e6,
+            "recount_ms": recount / n_checks * 1e3, "checks": n_checks, "ok": ok,
+            "recall": recall / n_checks, "over": over, "tracked": len(engine.ranked), "late": engine.late}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=1_000_000)
+    ap.add_argument("--step", type=float, default=0.01, help="seconds between tweets")
+    ap.add_argument("--window", type=parse_duration, default="15m")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--checks", type=int, default=20)
+    ap.add_argument("--tags", type=int, nargs="+", default=[2000, 500000], help="distinct hashtag pools")
+    args = ap.parse_args()
+
+    for pool in args.tags:
+        tweets = list(synthetic_timeline(args.count, tags=pool, step=args.step))
+        times = [parse_ts(t["timestamp"]) for t in tweets]
+        tags_per_tweet = [extract_hashtags(t["text"]) for t in tweets]
+        print(f"{args.count:,} tweets, {pool:,} hashtag pool, {args.window:.0f}s window "
+              f"(~{args.window / args.step:,.0f} tweets live)")
+        for sketch in (False, True):
+            r = run(tweets, times, tags_per_tweet, args.window, args.top, args.checks, sketch)
+            name = "sketch" if sketch else "exact"
+            quality = (f"recall@{args.top} {r['recall']:.0%}, max over-count {r['over']:.1%}" if sketch
+                       else f"{r['ok']}/{r['checks']} checks identical")
+            print(f"  {name:<6} {r['updates/s']:>10,.0f} tweets/s  top-{args.top} {r['query_us']:7.1f} µs  "
+                  f"(recount {r['recount_ms']:7.1f} ms)  tracks {r['tracked']:,} tags  {quality}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: shared-XObject watermarking vs per-page merge_page().
+
+Generates --count input PDFs and a watermark page drawn from --strokes
+vector lines, then stamps every page three ways: the old merge_page()
+loop, watermark_file() on one core, and watermark_file() on a process pool.
+
+    python bench_watermark.py --count 50 --pages 20 --strokes 2000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, NameObject
+
+from PDFWATERMARK import watermark_file
+from bench_pdf_merge import make_pdfs
+
+
+def make_watermark(path, strokes):
+    rnd = random.Random(0)
+    ops = [b"0.8 0.1 0.1 RG 0.5 w"]
+    for _ in range(strokes):
+        ops.append(b"%.1f %.1f m %.1f %.1f l S" % tuple(rnd.uniform(0, 600) for _ in range(4)))
+    w = PdfWriter()
+    w.add_blank_page(612, 792)
+    content = DecodedStreamObject()
+    content.set_data(b"\n".join(ops))
+    w.pages[0][NameObject("/Contents")] = w._add_object(content)
+    with open(path, "wb") as f:
+        w.write(f)
+
+
+def merge_page_one(src, dst, watermark):
+    """The original PDFWATERMARK.py loop."""
+    reader = PdfReader(src)
+    wm = PdfReader(watermark).pages[0]
+    writer = PdfWriter()
+    for page in reader.pages:
+        page.merge_page(wm)
+        writer.add_page(page)
+    with open(dst, "wb") as f:
+        writer.write(f)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--count", type=int, default=50)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--strokes", type=int, default=2000, help="watermark complexity")
+    ap.add_argument("-j", "--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = os.path.join(tmp, "src")
+        os.makedirs(src_dir)
+        make_pdfs(src_dir, args.count, args.pages)
+        watermark = os.path.join(tmp, "wm.pdf")
+        make_watermark(watermark, args.strokes)
+        sources = sorted(os.path.join(src_dir, n) for n in os.listdir(src_dir))
+        total_pages = args.count * args.pages
+
+        def run(name, fn):
+            out = os.path.join(tmp, name)
+            os.makedirs(out)
+            jobs = [(src, os.path.join(out, os.path.basename(src))) for src in sources]
+            t0 = time.perf_counter()
+            fn(jobs)
+            secs = time.perf_counter() - t0
+            size = sum(os.path.getsize(dst) for _, dst in jobs)
+            print(f"{name:<14} {secs:7.2f}s  {total_pages / secs:7.0f} pages/s  output {size / 1e6:8.1f} MB")
+
+        run("merge_page", lambda jobs: [merge_page_one(s, d, watermark) for s, d in jobs])
+        run("xobject", lambda jobs: [watermark_file(s, d, watermark) for s, d in jobs])
+        with ProcessPoolExecutor(args.workers) as pool:
+            run("xobject-pool", lambda jobs: list(pool.map(watermark_file, *zip(*jobs),
+                                                           [watermark] * len(jobs))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Bulk email sender.
+
+Keeps a pool of logged-in SMTP connections and sends many messages over
+each one, instead of paying for connect + STARTTLS + login on every email.
+A connection that drops is thrown away and replaced, and the message is
+retried. Sends to the same domain (or address) are spaced out, and every
+result goes to a JSON-lines journal so an interrupted run can be resumed
+without resending what was already sent (bar the messages in flight at
+the crash; see SendJournal).
+
+Credentials come from the environment, never from source code:
+
+    SMTP_HOST (smtp.gmail.com)   SMTP_PORT (587)   SMTP_TLS (starttls | ssl | none)
+    SMTP_USER                    SMTP_PASSWORD     (e.g. a Gmail app password)
+
+    python bulk_mailer.py recipients.txt --from "Abdul Wassay <me@example.com>" \\
+        --subject "Hello" --html index.html --journal sent.jsonl --connections 4
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import queue
+import smtplib
+import sys
+import threading
+import time
+from collections import namedtuple
+from email.message import EmailMessage
+from email.utils import getaddresses
+
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+_STOP = object()
+
+# an already-serialized message plus its envelope, sent as-is with sendmail()
+RawMessage = namedtuple("RawMessage", "sender recipients data")
+
+
+def smtp_settings_from_env(env=os.environ):
+    return {
+        "host": env.get("SMTP_HOST", "smtp.gmail.com"),
+        "port": int(env.get("SMTP_PORT", "587")),
+        "tls": env.get("SMTP_TLS", "starttls").lower(),
+        "user": env.get("SMTP_USER", ""),
+        "password": env.get("SMTP_PASSWORD", ""),
+    }
+
+
+def connect(settings, timeout=30):
+    """One logged-in SMTP connection (login is skipped when SMTP_USER is empty)."""
+    if settings["tls"] == "ssl":
+        smtp = smtplib.SMTP_SSL(settings["host"], settings["port"], timeout=timeout)
+    else:
+        smtp = smtplib.SMTP(settings["host"], settings["port"], timeout=timeout)
+    try:
+        smtp.ehlo()
+        if settings["tls"] == "starttls":
+            smtp.starttls()
+            smtp.ehlo()
+        if settings["user"]:
+            smtp.login(settings["user"], settings["password"])
+    except BaseException:
+        smtp.close()
+        raise
+    return smtp
+
+
+def is_transient(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+class SMTPConnectionPool:
+    """Up to `size` live connections, each retired after `max_messages` sends."""
+
+    def __init__(self, settings, size=4, max_messages=100, timeout=30):
+        self.settings = settings
+        self.size = size
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.discarded = 0
+
+    @contextlib.contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                smtp, used = self._idle.get_nowait()
+            except queue.Empty:
+                smtp, used = connect(self.settings, self.timeout), 0
+                with self._lock:
+                    self.opened += 1
+            try:
+                yield smtp
+            except BaseException as e:
+                # a rejected message leaves the session usable (smtplib sends RSET);
+                # anything else, or 421 "closing channel", leaves it in an unknown state
+                if (isinstance(e, smtplib.SMTPRecipientsRefused) or
+                        (isinstance(e, smtplib.SMTPResponseException) and e.smtp_code != 421)):
+                    self._idle.put((smtp, used + 1))
+                else:
+                    self._close(smtp, quit=False)
+                    with self._lock:
+                        self.discarded += 1
+                raise
+            if used + 1 >= self.max_messages:
+                self._close(smtp)
+            else:
+                self._idle.put((smtp, used + 1))
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _close(smtp, quit=True):
+        try:
+            smtp.quit() if quit else smtp.close()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def close(self):
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(smtp)
+
+
+class RecipientThrottle:
+    """Spaces out sends so each recipient domain (or address) gets at most `rate` per second."""
+
+    def __init__(self, rate, by="domain"):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.by = by
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def wait(self, addresses):
+        if not self.interval:
+            return
+        keys = {a.lower() if self.by == "address" else a.rpartition("@")[2].lower() for a in addresses}
+        with self._lock:
+            now = time.monotonic()
+            start = max([now] + [self._next.get(k, now) for k in keys])
+            for k in keys:
+                self._next[k] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class SendJournal:
+    """
+    Append-only JSON-lines log of send results, one line per message key.
+    Keys recorded as "sent" are skipped when the same journal is reused.
+    Every record is flushed to the OS as it is written, and every "sent"
+    record is fsynced before record() returns. It is written only after the
+    server has accepted the message, so a crash in between means a resumed
+    run sends that message again: at most one duplicate per message in
+    flight (one per connection). Other statuses are fsynced in batches.
+    """
+
+    def __init__(self, path, fsync_every=32):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.sent = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if rec.get("status") == "sent":
+                        self.sent.add(rec["key"])
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def record(self, key, status, **fields):
+        line = json.dumps({"key": key, "status": status, "ts": time.time(), **fields}) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self._pending += 1
+            if status == "sent":
+                self.sent.add(key)
+                self._sync()
+            elif self._pending >= self.fsync_every:
+                self._sync()
+
+    def _sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._f.close()
+
+
+def message_recipients(msg):
+    return [addr for _, addr in getaddresses(msg.get_all("To", []) + msg.get_all("Cc", []) +
+                                             msg.get_all("Bcc", [])) if addr]
+
+
+class BulkSender:
+    """
+    Sends (key, EmailMessage or RawMessage) pairs from any iterable on `pool.size` threads.
+    The iterable is consumed lazily through a bounded queue, so it can
+    generate messages on the fly.
+    """
+
+    def __init__(self, pool, journal=None, throttle=None, retries=3, backoff=0.5, quiet=False):
+        self.pool = pool
+        self.journal = journal
+        self.throttle = throttle
+        self.retries = retries
+        self.backoff = backoff
+        self.quiet = quiet
+        self._lock = threading.Lock()
+
+    def _send_one(self, key, msg, stats):
+        raw = isinstance(msg, RawMessage)
+        to = msg.recipients if raw else message_recipients(msg)
+        for attempt in range(self.retries + 1):
+            if self.throttle:
+                self.throttle.wait(to)
+            t0 = time.perf_counter()
+            try:
+                with self.pool.connection() as smtp:
+                    if raw:
+                        refused = smtp.sendmail(msg.sender, msg.recipients, msg.data)
+                    else:
+                        refused = smtp.send_message(msg)
+            except Exception as e:
+                if is_transient(e) and attempt < self.retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+                    continue
+                error = f"{type(e).__name__}: {e}"
+                if self.journal:
+                    self.journal.record(key, "failed", to=to, error=error)
+                with self._lock:
+                    stats["failed"] += 1
+                    stats["send_seconds"] += time.perf_counter() - t0
+                print(f"FAILED: {key}: {error}", file=sys.stderr)
+                return
+            secs = time.perf_counter() - t0
+            if self.journal:
+                self.journal.record(key, "sent", to=to,
+                                    refused={a: r[0] for a, r in refused.items()} if refused else None)
+            with self._lock:
+                stats["sent"] += 1
+                stats["retries"] += attempt
+                stats["send_seconds"] += secs
+            if not self.quiet:
+                print(f"Sent: {key} ({secs * 1000:.0f} ms)")
+            return
+
+    def _worker(self, q, stats):
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            try:
+                self._send_one(*item, stats)
+            except Exception as e:  # outside the send itself (bad header, throttle, journal I/O): fail this message only
+                self._fail(item[0], f"{type(e).__name__}: {e}", stats)
+
+    def _fail(self, key, error, stats):
+        with self._lock:
+            stats["failed"] += 1
+        print(f"FAILED: {key}: {error}", file=sys.stderr)
+        if self.journal:
+            with contextlib.suppress(Exception):  # the journal itself may be what failed
+                self.journal.record(key, "failed", error=error)
+
+    def send_all(self, messages):
+        stats = {"sent": 0, "skipped": 0, "failed": 0, "retries": 0, "send_seconds": 0.0}
+        q = queue.Queue(maxsize=self.pool.size * 4)
+        workers = [threading.Thread(target=self._worker, args=(q, stats), daemon=True)
+                   for _ in range(self.pool.size)]
+        for t in workers:
+            t.start()
+        t0 = time.perf_counter()
+        try:
+            for key, msg in messages:
+                if self.journal and key in self.journal.sent:
+                    stats["skipped"] += 1
+                    continue
+                q.put((key, msg))
+        finally:
+            for _ in workers:
+                q.put(_STOP)
+            for t in workers:
+                t.join()
+        stats["seconds"] = time.perf_counter() - t0
+        stats["connections_opened"] = self.pool.opened
+        return stats
+
+
+def read_recipients(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Send one message to many recipients over pooled SMTP connections")
+    ap.add_argument("recipients", help="file with one email address per line")
+    ap.add_argument("--from", dest="sender", required=True)
+    ap.add_argument("--subject", required=True)
+    body = ap.add_mutually_exclusive_group(required=True)
+    body.add_argument("--text", help="plain-text body file")
+    body.add_argument("--html", help="HTML body file")
+    ap.add_argument("--journal", default="send_journal.jsonl", help="resume log (default: send_journal.jsonl)")
+    ap.add_argument("--connections", type=int, default=4)
+    ap.add_argument("--max-per-connection", type=int, default=100, help="reconnect after this many messages")
+    ap.add_argument("--rate", type=float, default=0, help="max messages/sec per recipient domain (0 = no limit)")
+    ap.add_argument("--throttle-by", choices=["domain", "address"], default="domain")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args()
+
+    settings = smtp_settings_from_env()
+    if settings["user"] and not settings["password"]:
+        sys.exit("ERROR: set SMTP_PASSWORD (and SMTP_USER) in the environment")
+    with open(args.text or args.html, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    def messages():
+        for addr in read_recipients(args.recipients):
+            msg = EmailMessage()
+            msg["From"] = args.sender
+            msg["To"] = addr
+            msg["Subject"] = args.subject
+            if args.html:
+                msg.add_alternative(content, subtype="html")
+            else:
+                msg.set_content(content)
+            yield addr, msg
+
+    pool = SMTPConnectionPool(settings, args.connections, args.max_per_connection)
+    journal = SendJournal(args.journal)
+    sender = BulkSender(pool, journal, RecipientThrottle(args.rate, args.throttle_by), quiet=args.quiet)
+    try:
+        s = sender.send_all(messages())
+    finally:
+        pool.close()
+        journal.close()
+    secs = s["seconds"] or 1e-9
+    print(f"✅ {s['sent']} sent, {s['skipped']} already sent, {s['failed']} failed in {secs:.1f}s "
+          f"({s['sent'] / secs:.1f} msg/s over {s['connections_opened']} connections)")
+
+
+if __name__ == "__main__":
+    main()
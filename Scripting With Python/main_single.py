@@ -1,9 +1,12 @@
 # FILE: main_single.py  (pure standard library, no external deps)
 from __future__ import annotations
 
-import argparse, os, json, time, re
-from datetime import datetime, timezone
-from collections import Counter
+import argparse, os, json, time, re, random, heapq, select, sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone, timedelta
+from collections import Counter, defaultdict
+from itertools import accumulate
 
 # ---------- small helpers ----------
 MENTION_RE = re.compile(r'@(\w+)', re.I)
@@ -37,11 +40,8 @@ def ensure_paths(root: str):
         with open(seed_path, "w", encoding="utf-8") as f:
             json.dump(seed_timeline, f, indent=2)
 
-    # outbox
-    outbox_path = os.path.join(root, "bot", "outbox.json")
-    if not os.path.exists(outbox_path):
-        with open(outbox_path, "w", encoding="utf-8") as f:
-            json.dump({"posts": []}, f, indent=2)
+    # outbox (segments are created on first post; an old bot/outbox.json is still read)
+    os.makedirs(os.path.join(root, "bot", "outbox"), exist_ok=True)
 
     # schedule
     schedule_path = os.path.join(root, "bot", "schedule.json")
@@ -49,49 +49,508 @@ def ensure_paths(root: str):
         with open(schedule_path, "w", encoding="utf-8") as f:
             json.dump({"scheduled": []}, f, indent=2)
 
+# ---------- timeline store ----------
+def parse_ts(value) -> float:
+    """ISO string / datetime / epoch -> epoch seconds (naive times are taken as UTC)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+class TimelineStore:
+    """
+    Tweets in arrival order plus secondary indexes kept up to date on ingest:
+    mention -> positions, hashtag -> positions, user -> positions and a
+    time-sorted (epoch, position) index. Lookups cost O(result), not O(timeline).
+    """
+
+    def __init__(self, tweets=(), on_add=None):
+        self.on_add = on_add  # on_add(hashtags, epoch) for every new tweet with a timestamp
+        self.tweets = []
+        self._ids = {}
+        self._mentions = defaultdict(list)
+        self._hashtags = defaultdict(list)
+        self._users = defaultdict(list)
+        self._times = []      # sorted epoch seconds
+        self._time_pos = []   # tweet position for each entry of _times
+        self.extend(tweets)
+
+    def __len__(self):
+        return len(self.tweets)
+
+    def add(self, t: dict) -> bool:
+        tid = t.get("id")
+        if tid is not None and tid in self._ids:
+            return False
+        pos = len(self.tweets)
+        self.tweets.append(t)
+        if tid is not None:
+            self._ids[tid] = pos
+        # dict.fromkeys: a tweet is listed once per key even if it repeats a tag
+        for m in dict.fromkeys(m.lower().lstrip("@") for m in (t.get("mentions") or [])):
+            self._mentions[m].append(pos)
+        tags = extract_hashtags(t.get("text", ""))
+        for tag in dict.fromkeys(tags):
+            self._hashtags[tag].append(pos)
+        self._users[(t.get("user") or "").lower()].append(pos)
+        if t.get("timestamp"):
+            ts = parse_ts(t["timestamp"])
+            if not self._times or ts >= self._times[-1]:  # the usual case: arrivals are in time order
+                self._times.append(ts)
+                self._time_pos.append(pos)
+            else:
+                i = bisect_right(self._times, ts)
+                self._times.insert(i, ts)
+                self._time_pos.insert(i, pos)
+            if self.on_add is not None:
+                self.on_add(tags, ts)
+        return True
+
+    def extend(self, tweets) -> int:
+        return sum(1 for t in tweets if self.add(t))
+
+    def _pick(self, positions, limit=None):
+        tw = self.tweets
+        return [tw[i] for i in (positions[:limit] if limit else positions)]
+
+    def get(self, tweet_id):
+        pos = self._ids.get(tweet_id)
+        return None if pos is None else self.tweets[pos]
+
+    def head(self, limit=None):
+        return self.tweets[:limit] if limit else list(self.tweets)
+
+    def mentioning(self, handle: str, limit=None):
+        return self._pick(self._mentions.get(handle.lower().lstrip("@"), []), limit)
+
+    def tagged(self, tag: str, limit=None):
+        return self._pick(self._hashtags.get(tag.lower().lstrip("#"), []), limit)
+
+    def by_user(self, user: str, limit=None):
+        return self._pick(self._users.get(user.lower(), []), limit)
+
+    def between(self, start=None, end=None):
+        """Tweets with start <= timestamp < end, oldest first."""
+        lo = 0 if start is None else bisect_left(self._times, parse_ts(start))
+        hi = len(self._times) if end is None else bisect_left(self._times, parse_ts(end))
+        return self._pick(self._time_pos[lo:hi])
+
+    def latest(self, n: int):
+        """The n most recent tweets by timestamp, newest first."""
+        return self._pick(self._time_pos[-n:][::-1]) if n > 0 else []
+
+    def hashtag_counts(self):
+        return {tag: len(p) for tag, p in self._hashtags.items()}
+
+WORDS = ("hello hi salam help guide madad python code thanks shukriya today learning study routine "
+         "coding tips folks world first day vs extensions please anyone know how to fix this bug "
+         "great job nice weekend coffee project deadline exam results music football cricket").split()
+
+def synthetic_timeline(count: int, users=5000, tags=2000, seed=0, start="2025-09-01T00:00:00", step=1.0):
+    """Yield `count` fake tweets, one every `step` seconds, with Zipf-ish users and hashtags."""
+    rnd = random.Random(seed)
+    names = [f"user{i}" for i in range(users)]
+    hashtags = ["python", "help", "students", "learning", "gratitude"] + [f"tag{i}" for i in range(tags)]
+    user_w = list(accumulate(1 / (i + 1) for i in range(len(names))))
+    tag_w = list(accumulate(1 / (i + 1) for i in range(len(hashtags))))
+    t0 = parse_ts(start)
+    for i in range(count):
+        words = rnd.choices(WORDS, k=rnd.randint(4, 12))
+        mentions = []
+        if rnd.random() < 0.05:
+            mentions.append("@SimpleBot")
+        if rnd.random() < 0.2:
+            mentions.append("@" + rnd.choices(names, cum_weights=user_w)[0])
+        text = " ".join(words + ["#" + h for h in rnd.choices(hashtags, cum_weights=tag_w, k=rnd.randint(0, 3))])
+        yield {"id": f"s{i}", "user": rnd.choices(names, cum_weights=user_w)[0], "text": text,
+               "mentions": mentions,
+               "timestamp": datetime.fromtimestamp(t0 + i * step, tz=timezone.utc).isoformat(timespec="seconds")}
+
+def load_timeline(path: str):
+    """A JSON list of tweets, or JSON Lines (one tweet per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+# ---------- outbox ----------
+SEGMENT_RE = re.compile(r"^outbox-(\d{6,})\.jsonl$")
+
+def _tail_lines(path: str, n: int):
+    """Last n complete lines of a file (bytes), reading backwards in blocks."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, 2)
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= n:
+            step = min(1 << 16, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.split(b"\n")
+    lines.pop()  # b"" after the final newline, or a torn last line
+    if pos > 0:
+        lines.pop(0)  # cut off by the block boundary
+    return lines[-n:] if n > 0 else []
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return True
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+class Outbox:
+    """
+    Posts as JSON Lines in numbered segments (outbox-000001.jsonl, ...).
+
+    append() writes a whole batch with one write(). Nothing is rewritten, so
+    posting costs O(batch) however large the outbox is. The active segment
+    is sealed and a new one started once it passes `max_bytes`. A legacy
+    outbox.json ({"posts": [...]}) is read as if it came first.
+
+    Ids are "p" + a 64-bit number: milliseconds << 22 | pid % 1024 << 12 | counter.
+    They are unique across processes and increase within one process,
+    even across restarts or when the clock steps back.
+    """
+
+    def __init__(self, folder: str, max_bytes=64 << 20, fsync=False, legacy: str | None = None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.legacy = legacy
+        os.makedirs(folder, exist_ok=True)
+        self._finish_compaction()
+        self._f = None
+        self._worker = os.getpid() & 0x3FF
+        last = self._last_id()
+        self._ms, self._seq = last >> 22, last & 0xFFF
+
+    def _last_id(self) -> int:
+        for path in self.segments()[::-1]:
+            for line in _tail_lines(path, 2)[::-1]:
+                try:
+                    return int(json.loads(line)["id"][1:])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return 0
+
+    def _segment_path(self, n: int):
+        return os.path.join(self.folder, f"outbox-{n:06d}.jsonl")
+
+    @staticmethod
+    def _number(path: str) -> int:
+        return int(SEGMENT_RE.match(os.path.basename(path)).group(1))
+
+    def segments(self):
+        paths = [os.path.join(self.folder, n) for n in os.listdir(self.folder) if SEGMENT_RE.match(n)]
+        return sorted(paths, key=self._number)
+
+    def new_id(self) -> str:
+        ms = time.time_ns() // 1_000_000
+        if ms > self._ms:
+            self._ms, self._seq = ms, 0
+        else:
+            self._seq += 1
+            if self._seq > 0xFFF:  # 4096 ids in one millisecond: borrow the next one
+                self._ms, self._seq = self._ms + 1, 0
+        return f"p{self._ms << 22 | self._worker << 12 | self._seq}"
+
+    def _active(self, incoming: int):
+        f = self._f
+        if f is not None and (f.tell() == 0 or f.tell() + incoming <= self.max_bytes):
+            return f
+        if f is not None:
+            f.close()  # sealed from now on
+            n = self._number(f.name) + 1
+        else:
+            segs = self.segments()
+            n = self._number(segs[-1]) if segs else 1
+            if segs:
+                size = os.path.getsize(segs[-1])
+                if not _ends_with_newline(segs[-1]) or (size and size + incoming > self.max_bytes):
+                    n += 1  # never append after a torn line left by a crash
+        self._f = open(self._segment_path(n), "ab")
+        return self._f
+
+    def append(self, items) -> int:
+        data = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+        if data:
+            f = self._active(len(data))
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return len(data)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __iter__(self):
+        if self.legacy and os.path.exists(self.legacy):
+            with open(self.legacy, "r", encoding="utf-8") as f:
+                yield from json.load(f).get("posts", [])
+        for path in self.segments():
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):  # a line without one is a torn write
+                        yield json.loads(line)
+
+    def tail(self, n=20):
+        """The last n posts, oldest first, without reading the whole outbox."""
+        out = []
+        for path in self.segments()[::-1]:
+            if len(out) >= n:
+                return out
+            out = [json.loads(x) for x in _tail_lines(path, n - len(out))] + out
+        if len(out) < n and self.legacy and os.path.exists(self.legacy):
+            with open(self.legacy, "r", encoding="utf-8") as f:
+                out = json.load(f).get("posts", [])[-(n - len(out)):] + out
+        return out
+
+    def stats(self):
+        segs = self.segments()
+        posts = 0
+        for path in segs:
+            with open(path, "rb") as f:
+                posts += sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+        if self.legacy and os.path.exists(self.legacy):
+            with open(self.legacy, "r", encoding="utf-8") as f:
+                posts += len(json.load(f).get("posts", []))
+        return {"segments": len(segs), "posts": posts, "bytes": sum(os.path.getsize(p) for p in segs)}
+
+    # compaction: rewrite sealed segments into full ones, then swap them in through an
+    # intent file, so a crash half-way is finished on the next open instead of duplicating posts
+    def _finish_compaction(self):
+        intent = os.path.join(self.folder, "compact.intent")
+        if os.path.exists(intent):
+            with open(intent, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+            for tmp, final in plan["replace"]:
+                if os.path.exists(tmp):
+                    os.replace(tmp, final)
+            for path in plan["delete"]:
+                if os.path.exists(path):
+                    os.remove(path)
+            os.remove(intent)
+        for name in os.listdir(self.folder):
+            if name.endswith(".compacting"):  # crashed before the intent was written
+                os.remove(os.path.join(self.folder, name))
+
+    def compact(self, keep_after=None):
+        """
+        Merge sealed segments (all but the newest) into as few `max_bytes`
+        segments as possible and drop torn lines, plus posts older than
+        `keep_after` (datetime or epoch) when given. Returns a summary dict.
+        """
+        sealed = self.segments()[:-1]
+        cutoff = None if keep_after is None else parse_ts(keep_after)
+        summary = {"segments_in": len(sealed), "segments_out": 0, "posts": 0, "dropped": 0}
+        if len(sealed) < 2 and cutoff is None:
+            summary["segments_out"] = len(sealed)
+            return summary
+        outputs, out, size = [], None, 0
+        for path in sealed:
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n") or (
+                            cutoff is not None and parse_ts(json.loads(line)["timestamp"]) < cutoff):
+                        summary["dropped"] += 1
+                        continue
+                    # never more outputs than inputs: the last one grows past max_bytes instead
+                    if out is None or (size + len(line) > self.max_bytes and len(outputs) < len(sealed)):
+                        if out is not None:
+                            out.close()
+                        out = open(os.path.join(self.folder, f"compact-{len(outputs)}.compacting"), "wb")
+                        outputs.append(out.name)
+                        size = 0
+                    out.write(line)
+                    size += len(line)
+                    summary["posts"] += 1
+        if out is not None:
+            out.close()
+        # outputs take the highest input numbers so they still sort before the active segment
+        finals = sealed[len(sealed) - len(outputs):]
+        plan = {"replace": list(zip(outputs, finals)), "delete": [p for p in sealed if p not in finals]}
+        intent = os.path.join(self.folder, "compact.intent")
+        with open(intent + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(plan, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(intent + ".tmp", intent)
+        self._finish_compaction()
+        summary["segments_out"] = len(outputs)
+        return summary
+
+    def export_json(self, path: str):
+        """Write everything in the old {"posts": [...]} format."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{\n  "posts": [')
+            for i, item in enumerate(self):
+                f.write(("," if i else "") + "\n    " + json.dumps(item, ensure_ascii=False))
+            f.write("\n  ]\n}\n")
+
 class MockTwitter:
-    def __init__(self, root: str):
+    def __init__(self, root: str, timeline_path: str | None = None, trends: TrendingWindow | None = None):
         self.root = root
-        self.timeline_path = os.path.join(root, "data", "seed_timeline.json")
-        self.outbox_path = os.path.join(root, "bot", "outbox.json")
-        with open(self.timeline_path, "r", encoding="utf-8") as f:
-            self.timeline = json.load(f)
+        self.trends = trends or TrendingWindow()
+        self.timeline_path = timeline_path or os.path.join(root, "data", "seed_timeline.json")
+        self.outbox_path = os.path.join(root, "bot", "outbox.json")  # pre-segment outbox, read-only now
+        self.outbox = Outbox(os.path.join(root, "bot", "outbox"), legacy=self.outbox_path)
+        self.store = TimelineStore(load_timeline(self.timeline_path), on_add=self.trends.add)
+        self.timeline = self.store.tweets  # read-only view; add tweets through ingest()
+
+    def ingest(self, tweets):
+        return self.store.extend(tweets)
 
     def get_timeline(self, limit=None):
-        tl = list(self.timeline)
-        return tl[:limit] if limit else tl
+        return self.store.head(limit)
 
     def get_mentions_for(self, handle: str):
-        handle = handle.lower().lstrip("@")
-        results = []
-        for t in self.timeline:
-            mentions = [m.lower().lstrip("@") for m in (t.get("mentions") or [])]
-            if handle in mentions:
-                results.append(t)
-        return results
+        return self.store.mentioning(handle)
+
+    def get_hashtag(self, tag: str, limit=None):
+        return self.store.tagged(tag, limit)
 
     def post(self, text: str, meta=None):
-        item = {
-            "id": f"p{int(datetime.now(tz=timezone.utc).timestamp())}",
-            "user": "SimpleBot",
-            "text": text,
-            "timestamp": datetime.now(tz=timezone.utc).isoformat(),
-            "meta": meta or {},
-        }
-        with open(self.outbox_path, "r+", encoding="utf-8") as f:
-            box = json.load(f)
-            box["posts"].append(item)
-            f.seek(0); json.dump(box, f, indent=2); f.truncate()
-        return item
+        return self.post_many([(text, meta)])[0]
+
+    def post_many(self, posts):
+        """Post a batch of (text, meta) pairs with a single outbox write."""
+        now = datetime.now(tz=timezone.utc).isoformat()
+        items = [{"id": self.outbox.new_id(), "user": "SimpleBot", "text": text, "timestamp": now,
+                  "meta": meta or {}} for text, meta in posts]
+        self.outbox.append(items)
+        return items
+
+# ---------- rule matching ----------
+SMALL_RULESET = 48  # up to this many keywords, plain `in` checks beat walking the automaton
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class RuleMatcher:
+    """
+    All rule keywords compiled once; match() returns the index of the first
+    rule (in list order) with a keyword in the text, same as looping over
+    contains_any(). Large rule sets use an Aho-Corasick automaton, so each
+    text is scanned once however many keywords there are. With
+    word_boundary=True a keyword only counts when it isn't glued to a letter,
+    digit or underscore on either side ("hi" no longer matches "this").
+    """
+
+    def __init__(self, rules, word_boundary=False):
+        self.rules = list(rules)
+        self.word_boundary = word_boundary
+        self._always = None  # an empty keyword matches every text
+        best = {}            # keyword -> first rule that lists it
+        for r, rule in enumerate(self.rules):
+            for k in rule["keywords"]:
+                k = k.lower()
+                if not k:
+                    self._always = r if self._always is None else self._always
+                else:
+                    best.setdefault(k, r)
+        self._keywords = sorted(best.items(), key=lambda kv: kv[1])
+        self.automaton = len(self._keywords) > SMALL_RULESET
+        if self.automaton:
+            self._build(self._keywords)
+
+    def _build(self, keywords):
+        goto, fail, out = [{}], [0], [[]]
+        for k, r in keywords:
+            node = 0
+            for ch in k:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({}); fail.append(0); out.append([])
+                node = nxt
+            out[node].append((r, len(k)))
+        queue = list(goto[0].values())
+        for node in queue:  # breadth-first: a node's fail target is always finished first
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+                queue.append(nxt)
+        self._goto, self._fail = goto, fail
+        self._out = [tuple(sorted(o)) for o in out]
+        self._first = [o[0][0] if o else len(self.rules) for o in self._out]
+
+    def _step(self, node, ch):
+        # transitions that need fail links are resolved once and cached on the node
+        goto, fail = self._goto, self._fail
+        n = node
+        while True:
+            nxt = goto[n].get(ch)
+            if nxt is not None or n == 0:
+                nxt = nxt or 0
+                break
+            n = fail[n]
+        goto[node][ch] = nxt
+        return nxt
+
+    def _bounded(self, text, start, end):
+        return (start == 0 or not _is_word(text[start - 1])) and (end == len(text) or not _is_word(text[end]))
+
+    def match(self, text: str):
+        t = (text or "").lower()
+        limit = len(self.rules) if self._always is None else self._always
+        if limit == 0:
+            return 0
+        if not self.automaton:
+            for k, r in self._keywords:
+                if r >= limit:
+                    break
+                if not self.word_boundary:
+                    if k in t:
+                        return r
+                    continue
+                i = t.find(k)
+                while i >= 0:
+                    if self._bounded(t, i, i + len(k)):
+                        return r
+                    i = t.find(k, i + 1)
+            return None if limit == len(self.rules) else limit
+        goto, first, out, step = self._goto, self._first, self._out, self._step
+        best, node = limit, 0
+        for i, ch in enumerate(t):
+            nxt = goto[node].get(ch)
+            node = step(node, ch) if nxt is None else nxt
+            if first[node] < best:
+                if not self.word_boundary:
+                    best = first[node]
+                else:
+                    for r, n in out[node]:
+                        if r >= best:
+                            break
+                        if self._bounded(t, i + 1 - n, i + 1):
+                            best = r
+                            break
+                if best == 0:
+                    break
+        return None if best == len(self.rules) else best
+
+    def rule_for(self, text: str):
+        r = self.match(text)
+        return None if r is None else self.rules[r]
 
 def auto_replies(items, reply_rules, max_replies=5):
+    """`reply_rules` is a list of rules or a RuleMatcher compiled from one."""
+    matcher = reply_rules if isinstance(reply_rules, RuleMatcher) else RuleMatcher(reply_rules)
     replies = []
     for t in items:
-        txt = (t.get("text") or "").strip()
-        for rule in reply_rules:
-            if contains_any(txt, rule["keywords"]):
-                replies.append({"to": t["user"], "text": rule["reply"]})
-                break
+        rule = matcher.rule_for((t.get("text") or "").strip())
+        if rule is not None:
+            replies.append({"to": t["user"], "text": rule["reply"]})
         if len(replies) >= max_replies:
             break
     return replies
@@ -103,10 +562,455 @@ def trending_hashtags(items, top_k=10):
             c[tag] += 1
     return c.most_common(top_k)
 
+# ---------- streaming trends ----------
+class RankedCounts:
+    """tag -> count, with tags grouped by count so the highest counts are found without a full sort."""
+
+    def __init__(self):
+        self.count = {}
+        self._by_count = {}  # count -> set of tags
+        self._levels = []    # distinct counts, ascending
+        self._seen = {}      # tag -> order it (last) went from 0 to a positive count
+        self._seq = 0
+
+    def __len__(self):
+        return len(self.count)
+
+    def set(self, tag, n: int):
+        c = self.count.get(tag, 0)
+        if c == n:
+            return
+        if c:
+            group = self._by_count[c]
+            group.discard(tag)
+            if not group:
+                del self._by_count[c]
+                del self._levels[bisect_left(self._levels, c)]
+        elif n > 0:
+            self._seen[tag] = self._seq
+            self._seq += 1
+        if n > 0:
+            self.count[tag] = n
+            group = self._by_count.get(n)
+            if group is None:
+                self._by_count[n] = {tag}
+                insort(self._levels, n)
+            else:
+                group.add(tag)
+        else:
+            self.count.pop(tag, None)
+            self._seen.pop(tag, None)
+
+    def add(self, tag, d: int):
+        self.set(tag, self.count.get(tag, 0) + d)
+
+    def lowest(self):
+        """(tag, count) with the smallest count, or None."""
+        if not self._levels:
+            return None
+        c = self._levels[0]
+        return next(iter(self._by_count[c])), c
+
+    def top(self, k: int):
+        """
+        Like Counter.most_common(k), with ties in the order the tags went from
+        zero to a positive count. A tag keeps that place while any of its hits
+        remain, so once its earliest hits expire from a window it can rank
+        ahead of a tag that a recount of the remaining tweets would put first.
+        """
+        out, seen = [], self._seen.__getitem__
+        for c in reversed(self._levels):
+            group, need = self._by_count[c], k - len(out)
+            pick = sorted(group, key=seen) if len(group) <= need else heapq.nsmallest(need, group, key=seen)
+            out.extend((tag, c) for tag in pick)
+            if len(out) >= k:
+                break
+        return out
+
+class TrendingWindow:
+    """
+    Hashtag counts over a sliding time window, in stream time: the newest
+    timestamp seen so far is "now".
+
+    The window is a ring of `buckets` time slices. When time moves past a
+    slice, its counts are subtracted and the slot is reused, so each
+    hashtag is added once and expired once (O(1) amortized per tweet).
+    Expiry happens a whole slice at a time, so the live span is
+    [since(), now]: between window - window/buckets and window long.
+
+    sketch=True keeps Count-Min sketches (depth x width counters) per slice
+    instead of Counters, and tracks only `capacity` heavy-hitter candidates.
+    Memory stays fixed however many distinct tags there are. Counts can
+    then be over-estimates, and a tag that rises slowly past the candidates
+    may be missed.
+    """
+
+    def __init__(self, window=24 * 3600, buckets=60, sketch=False, width=8192, depth=4, capacity=1000):
+        self.window = float(window)
+        self.buckets = buckets
+        self.span = self.window / buckets
+        self.head = None         # absolute slice number of the newest slice
+        self.late = 0            # events that arrived after their slice had expired
+        self.ranked = RankedCounts()
+        self.sketch = sketch
+        if sketch:
+            self._w, self._d, self.capacity = width, depth, capacity
+            self._slices = [array("i", bytes(4 * width * depth)) for _ in range(buckets)]
+            self._total = array("q", bytes(8 * width * depth))
+        else:
+            self._slices = [Counter() for _ in range(buckets)]
+
+    def since(self) -> float:
+        """Epoch seconds where the live window starts."""
+        return 0.0 if self.head is None else (self.head - self.buckets + 1) * self.span
+
+    def advance(self, ts: float):
+        """Move "now" forward to `ts` (epoch seconds), expiring slices that fall out."""
+        idx = int(ts // self.span)
+        if self.head is None:
+            self.head = idx
+            return
+        if idx <= self.head:
+            return
+        for j in range(max(self.head + 1, idx - self.buckets + 1), idx + 1):
+            self._expire(j % self.buckets)
+        self.head = idx
+
+    def _expire(self, slot: int):
+        if not self.sketch:
+            for tag, c in self._slices[slot].items():
+                self.ranked.add(tag, -c)
+            self._slices[slot].clear()
+            return
+        old, total = self._slices[slot], self._total
+        for i, v in enumerate(old):
+            if v:
+                total[i] -= v
+        self._slices[slot] = array("i", bytes(4 * len(old)))
+        for tag in list(self.ranked.count):  # candidates lose what just expired
+            self.ranked.set(tag, self.estimate(tag))
+
+    def _cells(self, tag):
+        h = hash(tag) & 0xFFFFFFFFFFFFFFFF
+        h1, h2, w = h & 0xFFFFFFFF, (h >> 32) | 1, self._w
+        return [i * w + (h1 + i * h2) % w for i in range(self._d)]
+
+    def estimate(self, tag) -> int:
+        """Count of `tag` in the window (exact, or a Count-Min upper bound in sketch mode)."""
+        if not self.sketch:
+            return self.ranked.count.get(tag, 0)
+        total = self._total
+        return min(total[i] for i in self._cells(tag))
+
+    def add(self, tags, ts: float):
+        """Count one tweet's hashtags at epoch time `ts`."""
+        idx = int(ts // self.span)
+        if self.head is None or idx > self.head:
+            self.advance(ts)
+        elif idx <= self.head - self.buckets:
+            self.late += 1
+            return
+        slot = idx % self.buckets
+        if not self.sketch:
+            counter, ranked = self._slices[slot], self.ranked
+            for tag in tags:
+                counter[tag] += 1
+                ranked.add(tag, 1)
+            return
+        cells, total, ranked = self._slices[slot], self._total, self.ranked
+        for tag in tags:
+            est = None
+            for i in self._cells(tag):
+                cells[i] += 1
+                total[i] += 1
+                est = total[i] if est is None or total[i] < est else est
+            if tag in ranked.count or len(ranked) < self.capacity:
+                ranked.set(tag, est)
+            else:
+                low = ranked.lowest()
+                if est > low[1]:  # displaces the weakest candidate
+                    ranked.set(low[0], 0)
+                    ranked.set(tag, est)
+
+    def add_tweet(self, t: dict):
+        if t.get("timestamp"):
+            self.add(extract_hashtags(t.get("text", "")), parse_ts(t["timestamp"]))
+
+    def top(self, k=10, now=None):
+        """[(tag, count), ...] for the k most used hashtags in the window (as of `now` if given)."""
+        if now is not None:
+            self.advance(parse_ts(now))
+        return self.ranked.top(k)
+
+def parse_duration(text: str) -> float:
+    """'900', '90s', '15m', '24h' or '7d' -> seconds."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(text).lower())
+    if not m:
+        raise ValueError(f"bad duration {text!r} (use e.g. 90s, 15m, 24h, 7d)")
+    return float(m.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+
+# ---------- scheduler ----------
+CRON_ALIASES = {"@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *", "@monthly": "0 0 1 * *",
+                "@weekly": "0 0 * * 0", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@hourly": "0 * * * *"}
+MONTH_NAMES = {m: i + 1 for i, m in enumerate("jan feb mar apr may jun jul aug sep oct nov dec".split())}
+DAY_NAMES = {d: i for i, d in enumerate("sun mon tue wed thu fri sat".split())}
+
+class CronSpec:
+    """
+    "HH:MM" (daily), a 5-field cron expression "min hour day-of-month month
+    day-of-week" with * , - / and jan..dec / sun..sat, or an @daily-style alias.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        e = expr.strip()
+        if re.fullmatch(r"\d{1,2}:\d{2}", e):
+            h, m = e.split(":")
+            e = f"{int(m)} {int(h)} * * *"
+        e = CRON_ALIASES.get(e.lower(), e)
+        parts = e.split()
+        if len(parts) != 5:
+            raise ValueError(f"bad schedule {expr!r}: expected HH:MM or 5 cron fields")
+        self.minutes = self._field(parts[0], 0, 59)
+        self.hours = self._field(parts[1], 0, 23)
+        self.days = set(self._field(parts[2], 1, 31))
+        self.months = set(self._field(parts[3], 1, 12, MONTH_NAMES))
+        self.dows = {d % 7 for d in self._field(parts[4], 0, 7, DAY_NAMES)}
+        # cron rule: when both day fields are restricted, either one may match
+        self.either_day = parts[2] != "*" and parts[4] != "*"
+
+    def _field(self, text, lo, hi, names=None):
+        values = set()
+        for item in text.lower().split(","):
+            rng, _, step = item.partition("/")
+            if rng == "*":
+                a, b = lo, hi
+            else:
+                a_s, _, b_s = rng.partition("-")
+                a = names[a_s] if names and a_s in names else int(a_s)
+                b = (names[b_s] if names and b_s in names else int(b_s)) if b_s else (hi if step else a)
+            if not (lo <= a <= b <= hi):
+                raise ValueError(f"bad schedule {self.expr!r}: {item!r} outside {lo}-{hi}")
+            n = int(step) if step else 1
+            if n < 1:
+                raise ValueError(f"bad schedule {self.expr!r}: {item!r} needs a step of at least 1")
+            values.update(range(a, b + 1, n))
+        return sorted(values)
+
+    def _day_ok(self, d) -> bool:
+        dom, dow = d.day in self.days, (d.weekday() + 1) % 7 in self.dows
+        return (dom or dow) if self.either_day else (dom and dow)
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First fire time strictly after `dt` (same tzinfo as `dt`)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day, hh, mm = t.date(), t.hour, t.minute
+        for _ in range(5 * 366):  # Feb 29 fires at least once every 4 years
+            if day.month in self.months and self._day_ok(day):
+                for h in self.hours[bisect_left(self.hours, hh):]:
+                    i = bisect_left(self.minutes, mm) if h == hh else 0
+                    if i < len(self.minutes):
+                        return datetime(day.year, day.month, day.day, h, self.minutes[i], tzinfo=dt.tzinfo)
+            day += timedelta(days=1)
+            hh = mm = 0
+        raise ValueError(f"schedule {self.expr!r} never fires")
+
+class FileWatch:
+    """
+    Tells when one file changes. Uses inotify on its directory where the
+    platform has it (no polling at all), otherwise compares mtime/size
+    every `interval` seconds.
+    """
+    IN_EVENTS = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # modify, close_write, moved_from/to, create, delete
+
+    def __init__(self, path: str, interval=30.0):
+        self.path = path
+        self.interval = interval
+        self._sig = self._stat()
+        self._fd = None
+        try:
+            import ctypes, ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                folder = os.fsencode(os.path.dirname(os.path.abspath(path)))
+                if libc.inotify_add_watch(fd, folder, self.IN_EVENTS) >= 0:
+                    self._fd = fd
+                else:
+                    os.close(fd)
+        except (OSError, AttributeError):
+            pass  # not Linux: fall back to mtime checks
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; True as soon as the file has changed."""
+        if self._fd is None:
+            time.sleep(max(0.0, min(timeout, self.interval)))
+        else:
+            deadline = time.monotonic() + max(0.0, timeout)
+            name = os.fsencode(os.path.basename(self.path))
+            while True:
+                ready, _, _ = select.select([self._fd], [], [], max(0.0, deadline - time.monotonic()))
+                if not ready:
+                    break
+                try:
+                    buf, names = os.read(self._fd, 65536), set()
+                except BlockingIOError:
+                    continue
+                off = 0
+                while off + 16 <= len(buf):  # struct inotify_event: wd, mask, cookie, len, name[len]
+                    n = int.from_bytes(buf[off + 12:off + 16], sys.byteorder)
+                    names.add(buf[off + 16:off + 16 + n].rstrip(b"\0"))
+                    off += 16 + n
+                if name in names:
+                    break
+        sig = self._stat()
+        changed, self._sig = sig != self._sig, sig
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class Scheduler:
+    """
+    Scheduled posts from schedule.json in a min-heap of next fire times.
+
+    The file is parsed when it changes, not on every tick, and the loop
+    sleeps until the earliest job is due. Fire times already handled are
+    appended to a small log next to the schedule. After a pause or restart,
+    a job that was due within the last `catchup` seconds fires once, late.
+    Older missed fires are skipped and reported.
+    """
+
+    def __init__(self, path: str, fire, catchup=3600.0, watch_interval=30.0, now=datetime.now):
+        self.path = path
+        self.fire = fire                  # fire([(entry, due), ...]) posts one batch
+        self.catchup = timedelta(seconds=catchup)
+        self.watch_interval = watch_interval
+        self.now = now
+        self.log_path = os.path.splitext(path)[0] + "_fired.jsonl"
+        self.jobs = {}                    # key -> (CronSpec, entry)
+        self.heap = []                    # (due, key)
+        self.last = self._read_log()      # key -> last due that fired or was skipped
+        self.fired = self.skipped = 0
+        self.load()
+
+    def _read_log(self):
+        last = {}
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        last[rec["key"]] = max(last.get(rec["key"], ""), rec["due"])
+                    except (ValueError, KeyError):
+                        continue  # half-written last line after a crash
+        except FileNotFoundError:
+            pass
+        return last
+
+    def _log(self, records):
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"key": k, "due": d.isoformat()}) + "\n" for k, d in records))
+
+    def load(self):
+        """(Re)read the schedule file and rebuild the heap; O(jobs)."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("scheduled", [])
+        jobs, seen, heap = {}, Counter(), []
+        start = self.now() - timedelta(minutes=1)  # a job added for this very minute still fires
+        for s in entries:
+            expr = s.get("cron") or s.get("at")
+            try:
+                spec = CronSpec(expr or "")
+                base = f"{spec.expr}|{s.get('text', '')}"
+                key = f"{base}#{seen[base] + 1}"  # identical entries stay separate jobs
+                last = self.last.get(key)
+                due = spec.next_after(datetime.fromisoformat(last) if last else start)
+            except ValueError as e:  # one bad entry (e.g. Feb 30) must not take the others down
+                print(f"[WARN] skipping scheduled post: {e}")
+                continue
+            seen[base] += 1
+            jobs[key] = (spec, s)
+            heap.append((due, key))
+        heapq.heapify(heap)
+        self.jobs, self.heap = jobs, heap
+        if len(self.last) > 2 * len(jobs) + 1000:
+            self._compact()
+
+    def _compact(self):
+        self.last = {k: d for k, d in self.last.items() if k in self.jobs}
+        tmp = self.log_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"key": k, "due": d}) + "\n" for k, d in self.last.items()))
+        os.replace(tmp, self.log_path)
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def run_pending(self, now=None):
+        """Fire every job due at or before `now`; returns the fired (entry, due) pairs."""
+        now = now or self.now()
+        batch, done = [], []
+        while self.heap and self.heap[0][0] <= now:
+            due, key = heapq.heappop(self.heap)
+            spec, entry = self.jobs[key]
+            if now - due > self.catchup:
+                self.skipped += 1
+                print(f"[WARN] {spec.expr!r}: skipping fires since {due:%Y-%m-%d %H:%M} "
+                      f"(more than {self.catchup} late)")
+                due = spec.next_after(now - self.catchup - timedelta(microseconds=1))
+            nxt = spec.next_after(due)
+            while nxt <= now:  # several fires missed while paused: post once, for the latest
+                due, nxt = nxt, spec.next_after(nxt)
+            if due > now:  # nothing recent enough to post; remember we got this far
+                done.append((key, now.replace(second=0, microsecond=0)))
+                heapq.heappush(self.heap, (due, key))
+                continue
+            batch.append((entry, due))
+            self.fired += 1
+            done.append((key, due))
+            heapq.heappush(self.heap, (nxt, key))
+        for key, due in done:
+            self.last[key] = due.isoformat()
+        if batch:
+            self.fire(batch)
+        if done:
+            self._log(done)
+        return batch
+
+    def run(self, until=None):
+        """Loop until Ctrl+C (or until the `until` datetime, for tests and benchmarks)."""
+        watch = FileWatch(self.path, self.watch_interval)
+        try:
+            while True:
+                self.run_pending()
+                now = self.now()
+                if until is not None and now >= until:
+                    return
+                due = self.next_due()
+                wake = min(d for d in (due, until) if d is not None) if (due or until) else None
+                timeout = 86400.0 if wake is None else (wake - now).total_seconds()
+                if watch.wait(timeout):
+                    try:
+                        self.load()
+                    except (OSError, ValueError) as e:  # mid-edit or broken file: keep the old jobs
+                        print(f"[WARN] schedule not reloaded: {e}")
+        finally:
+            watch.close()
+
 class Bot:
-    def __init__(self, root: str):
+    def __init__(self, root: str, timeline_path: str | None = None, trends: TrendingWindow | None = None):
         self.root = root
-        self.driver = MockTwitter(root)
+        self.driver = MockTwitter(root, timeline_path, trends)
         # Hard-coded rules (no YAML needed)
         self.name = "SimpleBot"
         self.rules = [
@@ -115,75 +1019,76 @@ class Bot:
             {"keywords": ["python", "code"], "reply": "Python is love 🐍 — keep coding!"},
             {"keywords": ["thanks", "shukriya"], "reply": "You're welcome! ✨"},
         ]
+        self.word_boundary = False
+        self.compile_rules()
         self.max_auto = 5
-        self.trend_window = 50
+
+    def compile_rules(self):
+        # call again after changing self.rules or self.word_boundary
+        self.matcher = RuleMatcher(self.rules, self.word_boundary)
 
     def process_timeline(self, limit=None):
         items = self.driver.get_timeline(limit)
-        replies = auto_replies(items, self.rules, self.max_auto)
-        for r in replies:
-            self.driver.post(f"@{r['to']} {r['text']}", meta={"type": "auto-reply"})
+        replies = auto_replies(items, self.matcher, self.max_auto)
+        self.driver.post_many([(f"@{r['to']} {r['text']}", {"type": "auto-reply"}) for r in replies])
         return replies
 
     def process_mentions(self):
         mentions = self.driver.get_mentions_for(self.name)
-        replies = auto_replies(mentions, self.rules, self.max_auto)
-        for r in replies:
-            self.driver.post(f"@{r['to']} {r['text']}", meta={"type": "mention-reply"})
+        replies = auto_replies(mentions, self.matcher, self.max_auto)
+        self.driver.post_many([(f"@{r['to']} {r['text']}", {"type": "mention-reply"}) for r in replies])
         return replies
 
-    def trends(self, top_k=10):
-        items = self.driver.get_timeline(limit=self.trend_window)
-        return trending_hashtags(items, top_k)
+    def trends(self, top_k=10, now=None):
+        """
+        Top hashtags over the trends window: by default the last 24h of stream
+        time, ending at the newest tweet ingested. (This used to recount the
+        first 50 timeline tweets on every call.) Maintained on ingest, so this
+        only reads the top of the window; see RankedCounts.top for tie order.
+        """
+        return self.driver.trends.top(top_k, now)
 
     def post(self, text: str):
         return self.driver.post(text, meta={"type": "manual"})
 
-    def schedule_add(self, at_hhmm: str, text: str):
+    def schedule_add(self, at_hhmm: str | None, text: str, cron: str | None = None):
+        # reject bad schedules, and ones that can never fire, before they reach the file
+        CronSpec(cron or at_hhmm or "").next_after(datetime.now())
         path = os.path.join(self.root, "bot", "schedule.json")
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        data["scheduled"].append({"at": at_hhmm, "text": text, "posted_today": False})
-        with open(path, "w", encoding="utf-8") as f:
+        data["scheduled"].append({"cron": cron, "text": text} if cron else {"at": at_hhmm, "text": text})
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
+        os.replace(tmp, path)  # a running scheduler never sees a half-written file
 
-    def scheduler_loop(self, tick_seconds=30):
-        path = os.path.join(self.root, "bot", "schedule.json")
-        last_day = datetime.now().date()
-        print("Scheduler running (Ctrl+C to stop)...")
-        while True:
-            now = datetime.now()
-            if now.date() != last_day:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                for s in data["scheduled"]:
-                    s["posted_today"] = False
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2)
-                last_day = now.date()
-
-            hhmm = now.strftime("%H:%M")
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            changed = False
-            for s in data["scheduled"]:
-                if s.get("at") == hhmm and not s.get("posted_today", False):
-                    self.post(s["text"])
-                    s["posted_today"] = True
-                    changed = True
-            if changed:
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2)
-            time.sleep(tick_seconds)
+    def fire_scheduled(self, batch):
+        self.driver.post_many([(entry["text"], {"type": "scheduled", "due": due.isoformat()})
+                               for entry, due in batch])
+
+    def scheduler_loop(self, tick_seconds=30, catchup=3600):
+        """`tick_seconds` is now only how often the file is re-checked where inotify is unavailable."""
+        sched = Scheduler(os.path.join(self.root, "bot", "schedule.json"), self.fire_scheduled,
+                          catchup=catchup, watch_interval=tick_seconds)
+        print(f"Scheduler running with {len(sched.jobs)} job(s) (Ctrl+C to stop)...")
+        sched.run()
 
 # ---------- CLI ----------
-def make_bot():
+def make_bot(args=None):
     root = os.path.dirname(os.path.abspath(__file__))
     ensure_paths(root)
-    return Bot(root)
+    trends = None
+    window, sketch = getattr(args, "window", None), getattr(args, "sketch", False)
+    if window or sketch:  # --sketch alone keeps the default 24h window
+        trends = TrendingWindow(window, sketch=sketch) if window else TrendingWindow(sketch=sketch)
+    return Bot(root, getattr(args, "timeline", None), trends)
 
 def cmd_run(args):
-    bot = make_bot()
+    bot = make_bot(args)
+    if args.word_boundary:
+        bot.word_boundary = True
+        bot.compile_rules()
     did = False
     if args.process_timeline:
         replies = bot.process_timeline()
@@ -197,51 +1102,110 @@ def cmd_run(args):
         print("Nothing to do. Add --process-timeline or --process-mentions")
 
 def cmd_trends(args):
-    bot = make_bot()
+    bot = make_bot(args)
     top = bot.trends(top_k=args.top)
     print("Top Hashtags")
     for tag, count in top:
         print(f"- #{tag}: {count}")
 
 def cmd_post(args):
-    bot = make_bot()
+    bot = make_bot(args)
     post = bot.post(args.text)
     print(f"Posted: {post['text']} at {post['timestamp']}")
 
 def cmd_schedule(args):
-    bot = make_bot()
-    bot.schedule_add(args.at, args.text)
-    print(f"Scheduled: '{args.text}' at {args.at} (daily)")
+    bot = make_bot(args)
+    if args.text:
+        if not (args.at or args.cron):
+            raise SystemExit("schedule: --text needs --at or --cron")
+        try:
+            bot.schedule_add(args.at, args.text, cron=args.cron)
+        except ValueError as e:
+            raise SystemExit(f"schedule: {e}")
+        print(f"Scheduled: '{args.text}' " + (f"on cron '{args.cron}'" if args.cron else f"at {args.at} (daily)"))
     if args.run_loop:
         try:
-            bot.scheduler_loop(tick_seconds=args.tick)
+            bot.scheduler_loop(tick_seconds=args.tick, catchup=args.catchup)
         except KeyboardInterrupt:
             print("\nScheduler stopped by user")
 
+def cmd_outbox(args):
+    root = os.path.dirname(os.path.abspath(__file__))
+    ensure_paths(root)
+    box = Outbox(os.path.join(root, "bot", "outbox"), legacy=os.path.join(root, "bot", "outbox.json"))
+    if args.action == "tail":
+        for p in box.tail(args.n):
+            print(f"{p['timestamp']}  {p['id']}  {p['text']}")
+    elif args.action == "stats":
+        s = box.stats()
+        print(f"{s['posts']} posts in {s['segments']} segment(s), {s['bytes'] / 1e6:.1f} MB")
+    elif args.action == "compact":
+        cutoff = None
+        if args.keep_days is not None:
+            cutoff = datetime.now(tz=timezone.utc) - timedelta(days=args.keep_days)
+        s = box.compact(keep_after=cutoff)
+        print(f"Compacted {s['segments_in']} sealed segment(s) into {s['segments_out']}: "
+              f"{s['posts']} posts kept, {s['dropped']} dropped")
+    elif args.action == "export":
+        if not args.out:
+            raise SystemExit("outbox export: --out FILE is required")
+        box.export_json(args.out)
+        print(f"Exported to {args.out}")
+
+def cmd_generate(args):
+    t0 = time.perf_counter()
+    with open(args.out, "w", encoding="utf-8") as f:
+        for t in synthetic_timeline(args.count, seed=args.seed):
+            f.write(json.dumps(t, ensure_ascii=False) + "\n")
+    print(f"Wrote {args.count} tweets to {args.out} in {time.perf_counter() - t0:.1f}s")
+
 def build_parser():
     p = argparse.ArgumentParser(description="Simple Twitter Bot (offline simulator, single-file)")
+    p.add_argument("--timeline", help="timeline file (.json list or .jsonl) instead of data/seed_timeline.json")
     sub = p.add_subparsers(dest="cmd")
 
     prun = sub.add_parser("run", help="Process timeline and/or mentions using auto-reply rules")
     prun.add_argument("--process-timeline", action="store_true")
     prun.add_argument("--process-mentions", action="store_true")
+    prun.add_argument("--word-boundary", action="store_true", help="match rule keywords as whole words only")
     prun.set_defaults(func=cmd_run)
 
     ptr = sub.add_parser("trends", help="Show trending hashtags from mock timeline")
     ptr.add_argument("--top", type=int, default=10)
+    ptr.add_argument("--window", type=parse_duration, default=None,
+                     help="sliding window ending at the newest tweet, e.g. 15m or 24h (default 24h)")
+    ptr.add_argument("--sketch", action="store_true",
+                     help="bounded-memory Count-Min mode for very many distinct hashtags")
     ptr.set_defaults(func=cmd_trends)
 
     ppost = sub.add_parser("post", help="Post a message immediately (to outbox)")
     ppost.add_argument("--text", required=True)
     ppost.set_defaults(func=cmd_post)
 
-    ps = sub.add_parser("schedule", help="Schedule a daily post at HH:MM")
-    ps.add_argument("--at", required=True, help="HH:MM (24h)")
-    ps.add_argument("--text", required=True)
+    ps = sub.add_parser("schedule", help="Schedule a daily post at HH:MM or on a cron expression")
+    ps.add_argument("--at", help="HH:MM (24h)")
+    ps.add_argument("--cron", help='cron expression, e.g. "*/15 9-17 * * mon-fri" or @hourly')
+    ps.add_argument("--text", help="post to schedule (omit to only run the loop)")
     ps.add_argument("--run-loop", action="store_true", help="Run the scheduler loop after adding")
-    ps.add_argument("--tick", type=int, default=30, help="Scheduler tick seconds")
+    ps.add_argument("--tick", type=int, default=30,
+                    help="seconds between schedule-file checks where inotify is unavailable")
+    ps.add_argument("--catchup", type=float, default=3600,
+                    help="post fires missed by up to this many seconds (e.g. after sleep); skip older ones")
     ps.set_defaults(func=cmd_schedule)
 
+    po = sub.add_parser("outbox", help="Read back or compact the outbox log")
+    po.add_argument("action", choices=["tail", "stats", "compact", "export"])
+    po.add_argument("-n", type=int, default=20, help="posts to show with tail")
+    po.add_argument("--keep-days", type=float, help="compact: also drop posts older than this")
+    po.add_argument("--out", help="export: write the old {\"posts\": [...]} JSON here")
+    po.set_defaults(func=cmd_outbox)
+
+    pg = sub.add_parser("generate", help="Write a synthetic timeline (JSON Lines) for load testing")
+    pg.add_argument("--count", type=int, default=100_000)
+    pg.add_argument("--out", default=os.path.join("data", "synthetic_timeline.jsonl"))
+    pg.add_argument("--seed", type=int, default=0)
+    pg.set_defaults(func=cmd_generate)
+
     return p
 
 def main():
@@ -1,5 +1,8 @@
-import requests
+import argparse
 import hashlib
+import sys
+
+import requests
 
 def request_api_data(query_char):
     url = 'https://api.pwnedpasswords.com/range/' + query_char
@@ -22,12 +25,28 @@ def pwned_api_check(password):
     return get_password_leaks_count(response, tail)
 
 def main():
+    parser = argparse.ArgumentParser(description="Check passwords against Have I Been Pwned")
+    parser.add_argument('--db', help="offline database built with 'pwned_db.py import' (no network)")
+    parser.add_argument('--batch', metavar='FILE', help="audit every password/SHA-1 in FILE (see pwned_batch.py)")
+    args = parser.parse_args()
+    if args.batch:
+        from pwned_batch import audit_file
+        counts, _ = audit_file(args.batch, db_path=args.db)
+        if any(c < 0 for c in counts):
+            sys.exit(1)
+        return
+    if args.db:
+        from pwned_db import PwnedDB
+        check = PwnedDB(args.db).count_password
+    else:
+        check = pwned_api_check
+
     while True:
         password = input("Enter a password to check (or type 'exit' to quit): ")
         if password.lower() == "exit":
             print("Goodbye!")
             break
-        count = pwned_api_check(password)
+        count = check(password)
         if count:
             print(f"⚠️ '{password}' was found {count} times in data breaches... you should change it!")
         else:
@@ -0,0 +1,223 @@
+"""
+Batch password auditing against the Pwned Passwords range API.
+
+Reads passwords (or SHA-1 hashes) from a file and groups them by
+5-character hash prefix, so each range is requested once no matter how
+many entries share it. The distinct ranges are fetched concurrently over
+a pooled keep-alive session. Each response is parsed into a dict once and
+cached on disk with a TTL, so re-running an audit mostly reads local files.
+
+    python pwned_batch.py users_passwords.txt --out report.csv
+    python pwned_batch.py hashes.txt --workers 32 --cache-dir .pwned_cache --ttl 86400
+    python pwned_batch.py passwords.txt --db pwned.db        # offline, see pwned_db.py
+
+Only the 5-character prefix of each hash ever leaves the machine
+(k-anonymity), exactly as with the single-password check.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api.pwnedpasswords.com/range/"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SHA1_RE = re.compile(r"^[0-9a-fA-F]{40}$")
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    session.headers["Add-Padding"] = "true"  # hides the real range size from on-path observers
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def to_sha1(entry, mode="auto"):
+    """Uppercase SHA-1 hex of a password, or the entry itself if it already is a hash."""
+    if mode == "hash" or (mode == "auto" and SHA1_RE.match(entry)):
+        return entry.upper()
+    return hashlib.sha1(entry.encode("utf-8")).hexdigest().upper()
+
+
+def parse_range(text):
+    """'SUFFIX:COUNT' lines -> {SUFFIX: 'COUNT'}; counts stay strings until looked up."""
+    try:
+        return dict(line.split(":", 1) for line in text.splitlines())
+    except ValueError:  # a malformed line; take the slow path
+        return dict(line.partition(":")[::2] for line in text.splitlines() if ":" in line)
+
+
+class RangeCache:
+    """Raw range responses in <folder>/<PREFIX>.txt, fresh for `ttl` seconds."""
+
+    def __init__(self, folder, ttl=7 * 86400):
+        self.folder = folder
+        self.ttl = ttl
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, prefix):
+        return os.path.join(self.folder, prefix + ".txt")
+
+    def get(self, prefix):
+        path = self._path(prefix)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="ascii") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, prefix, text):
+        path = self._path(prefix)
+        tmp = f"{path}.{os.getpid()}.part"
+        with open(tmp, "w", encoding="ascii") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+def fetch_range(session, prefix, base_url=API_URL, retries=3):
+    """GET one range with retries and full-jitter exponential backoff."""
+    url = base_url + prefix
+    for attempt in range(retries + 1):
+        try:
+            resp = session.get(url, timeout=15)
+            if resp.status_code not in RETRY_STATUS:
+                if resp.status_code != 200:
+                    raise RuntimeError(f"Error fetching {url}: {resp.status_code}")
+                return resp.text
+            error = RuntimeError(f"Error fetching {url}: {resp.status_code}")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == retries:
+            raise error
+        time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+
+def group_by_prefix(hashes):
+    """{prefix: [(position, suffix), ...]} for a list of SHA-1 hex strings."""
+    groups = defaultdict(list)
+    for i, h in enumerate(hashes):
+        groups[h[:5]].append((i, h[5:]))
+    return groups
+
+
+def audit_hashes(hashes, base_url=API_URL, workers=16, cache=None, session=None, db=None):
+    """
+    Breach count for every SHA-1 in `hashes` (same order). With `db` (a
+    pwned_db.PwnedDB) the lookups are local; otherwise each distinct prefix
+    is read from `cache` or fetched once. Returns (counts, stats).
+    """
+    counts = [0] * len(hashes)
+    stats = {"entries": len(hashes), "ranges": 0, "cache_hits": 0, "fetched": 0, "errors": 0}
+    if db is not None:
+        for i, h in enumerate(hashes):
+            counts[i] = db.count_hash(h)
+        return counts, stats
+
+    groups = group_by_prefix(hashes)
+    stats["ranges"] = len(groups)
+    session = session or make_session(workers)
+
+    def resolve(prefix):
+        text = cache.get(prefix) if cache else None
+        hit = text is not None
+        if not hit:
+            text = fetch_range(session, prefix, base_url)
+            if cache:
+                cache.put(prefix, text)
+        table = parse_range(text)  # parsed once per range, not once per hash
+        return hit, [(i, int(table.get(suffix, 0))) for i, suffix in groups[prefix]]  # padding rows are 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(resolve, prefix): prefix for prefix in groups}
+        for future in as_completed(futures):
+            try:
+                hit, results = future.result()
+            except Exception as e:
+                stats["errors"] += 1
+                for i, _ in groups[futures[future]]:
+                    counts[i] = -1
+                print(f"[WARN] range {futures[future]}: {e}", file=sys.stderr)
+                continue
+            stats["cache_hits" if hit else "fetched"] += 1
+            for i, count in results:
+                counts[i] = count
+    return counts, stats
+
+
+def read_entries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\r\n") for line in f if line.rstrip("\r\n")]
+
+
+def audit_file(path, mode="auto", out=None, workers=16, cache_dir=".pwned_cache", ttl=7 * 86400,
+               api_url=API_URL, db_path=None):
+    """
+    Audit every line of `path`, print a summary and optionally write a CSV report.
+    Entries whose range couldn't be fetched get count -1 and make the audit incomplete.
+    """
+    entries = read_entries(path)
+    t0 = time.perf_counter()
+    hashes = [to_sha1(e, mode) for e in entries]
+    db = None
+    if db_path:
+        from pwned_db import PwnedDB
+        db = PwnedDB(db_path)
+    cache = RangeCache(cache_dir, ttl) if cache_dir else None
+    counts, stats = audit_hashes(hashes, api_url, workers, cache, db=db)
+    secs = time.perf_counter() - t0
+
+    if out:
+        with open(out, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["line", "sha1_prefix", "count"])
+            for n, (h, c) in enumerate(zip(hashes, counts), 1):
+                w.writerow([n, h[:5], c])
+    pwned = sum(1 for c in counts if c > 0)
+    unchecked = sum(1 for c in counts if c < 0)
+    if unchecked:
+        print(f"❌ audit incomplete: {unchecked} of {len(entries)} entries could not be checked"
+              f" ({pwned} found in breaches among the rest)")
+    else:
+        print(f"⚠️ {pwned} of {len(entries)} entries found in breaches" if pwned
+              else f"✅ none of {len(entries)} entries found in breaches")
+    if db is None:
+        print(f"{stats['ranges']} ranges ({stats['cache_hits']} cached, {stats['fetched']} fetched, "
+              f"{stats['errors']} failed) in {secs:.1f}s ({len(entries) / (secs or 1e-9):,.0f} entries/s)")
+    else:
+        print(f"checked offline in {secs:.1f}s ({len(entries) / (secs or 1e-9):,.0f} entries/s)")
+    return counts, stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Audit a file of passwords or SHA-1 hashes against Pwned Passwords")
+    ap.add_argument("input", help="one password or SHA-1 hash per line")
+    ap.add_argument("--mode", choices=["auto", "password", "hash"], default="auto",
+                    help="how to read lines (auto: 40 hex chars = hash)")
+    ap.add_argument("--out", help="write line,sha1_prefix,count CSV here")
+    ap.add_argument("--workers", type=int, default=16, help="concurrent range requests")
+    ap.add_argument("--cache-dir", default=".pwned_cache", help="'' to disable the range cache")
+    ap.add_argument("--ttl", type=float, default=7 * 86400, help="seconds a cached range stays fresh")
+    ap.add_argument("--api-url", default=API_URL)
+    ap.add_argument("--db", help="offline database from pwned_db.py instead of the API")
+    args = ap.parse_args()
+    counts, _ = audit_file(args.input, args.mode, args.out, args.workers, args.cache_dir, args.ttl,
+                           args.api_url, args.db)
+    if any(c < 0 for c in counts):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
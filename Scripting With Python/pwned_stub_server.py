@@ -0,0 +1,103 @@
+"""
+Local stand-in for api.pwnedpasswords.com/range/ used by the benchmarks.
+
+Every 5-char prefix gets a deterministic synthetic range of --range-size
+'SUFFIX:COUNT' lines, plus any "known" hashes (for example the SHA-1 of
+passwords a test expects to be found) that fall in that prefix. An
+optional per-request delay imitates network latency. With an Add-Padding
+header a few count-0 entries are mixed in, like the real API.
+
+    python pwned_stub_server.py --port 8766 --latency 0.02 --known password 123456
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_SIZE = 800  # the real API averages roughly this many suffixes per prefix
+
+
+def make_range(prefix, range_size=RANGE_SIZE, known=None, padding=False):
+    rnd = random.Random(prefix)
+    lines = {rnd.randbytes(18).hex().upper()[:35]: rnd.randint(1, 5000) for _ in range(range_size)}
+    for suffix, count in (known or {}).items():
+        lines[suffix] = count
+    if padding:
+        for _ in range(rnd.randint(5, 20)):
+            lines.setdefault(rnd.randbytes(18).hex().upper()[:35], 0)
+    return "\r\n".join(f"{s}:{c}" for s, c in sorted(lines.items()))
+
+
+class StubServer:
+    """Threaded stub server; use as a context manager, ``base_url`` ends in /range/."""
+
+    def __init__(self, port=0, latency=0.0, range_size=RANGE_SIZE, known=()):
+        stub = self
+        self.latency = latency
+        self.range_size = range_size
+        self.known = defaultdict(dict)  # prefix -> {suffix: count}
+        for entry in known:
+            h = hashlib.sha1(entry.encode("utf-8")).hexdigest().upper()
+            self.known[h[:5]][h[5:]] = 1000 + len(entry)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def do_GET(self):
+                prefix = self.path.rsplit("/", 1)[-1].upper()
+                if not self.path.startswith("/range/") or len(prefix) != 5:
+                    self.send_error(400)
+                    return
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = make_range(prefix, stub.range_size, stub.known.get(prefix),
+                                  padding=self.headers.get("Add-Padding") == "true").encode("ascii")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/range/"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve synthetic Pwned Passwords ranges locally")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds of delay per request")
+    ap.add_argument("--range-size", type=int, default=RANGE_SIZE)
+    ap.add_argument("--known", nargs="*", default=[], help="passwords that should be reported as pwned")
+    args = ap.parse_args()
+    with StubServer(args.port, args.latency, args.range_size, args.known) as srv:
+        print(f"Serving on {srv.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Tests for JPGtoPNGconverter.py: manifest lines across partial reruns.
+
+    python -m pytest test_jpg_converter.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from JPGtoPNGconverter import convert_all
+
+
+class ManifestRerunTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = os.path.join(tmp.name, "photos")
+        self.dest = os.path.join(tmp.name, "out")
+        self.manifest = os.path.join(self.dest, "manifest.jsonl")
+        os.makedirs(self.src)
+        for name in ("a", "b"):
+            Image.new("RGB", (640, 480), (200, 100, 50)).save(os.path.join(self.src, name + ".jpg"))
+
+    def convert(self, **kw):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return convert_all(self.src, self.dest, workers=1, manifest=self.manifest, **kw)
+
+    def entries(self):
+        with open(self.manifest, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), len({e["source"] for e in lines}))
+        return {os.path.basename(e["source"]): sorted(os.path.basename(o["path"]) for o in e["outputs"])
+                for e in lines}
+
+    def test_new_thumbnail_size_keeps_existing_outputs(self):
+        self.convert(thumbs=[256])
+        self.assertEqual(self.entries()["a.jpg"], ["a.png", "a_256.png"])
+        c = self.convert(thumbs=[256, 64])
+        self.assertEqual(c["converted"], 2)
+        self.assertEqual(self.entries()["a.jpg"], ["a.png", "a_256.png", "a_64.png"])
+        with open(self.manifest, encoding="utf-8") as f:
+            a = next(e for e in map(json.loads, f) if e["source"].endswith("a.jpg"))
+        sizes = {os.path.basename(o["path"]): (o["width"], o["height"], o["bytes"]) for o in a["outputs"]}
+        self.assertEqual(sizes["a_256.png"][:2], (256, 192))
+        self.assertEqual(sizes["a_256.png"][2], os.path.getsize(os.path.join(self.dest, "a_256.png")))
+
+    def test_switching_skip_mode_keeps_every_output(self):
+        self.convert(formats=["png", "webp"])
+        self.convert(formats=["png", "webp"], skip="hash")  # PNGs rewritten with the hash, WebP kept
+        self.assertEqual(self.entries(), {"a.jpg": ["a.png", "a.webp"], "b.jpg": ["b.png", "b.webp"]})
+
+    def test_up_to_date_rerun_leaves_manifest_alone(self):
+        self.convert(thumbs=[128])
+        before = self.entries()
+        c = self.convert(thumbs=[128])
+        self.assertEqual((c["converted"], c["skipped"]), (0, 2))
+        self.assertEqual(self.entries(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
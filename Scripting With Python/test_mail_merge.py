@@ -0,0 +1,44 @@
+"""
+Tests for mail_merge.py: CSS inlining and inline images.
+
+    python -m pytest test_mail_merge.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from mail_merge import embed_images, inline_css
+
+
+class InlineCssTest(unittest.TestCase):
+    def test_simple_rules_become_style_attributes(self):
+        out = inline_css('<style>p { color: red } .big { font-size: 20px }</style><p class="big">x</p>')
+        self.assertEqual(out, '<p class="big" style="color: red; font-size: 20px">x</p>')
+
+    def test_inline_style_wins(self):
+        out = inline_css('<style>p { color: red }</style><p style="color: blue">x</p>')
+        self.assertEqual(out, '<p style="color: blue">x</p>')
+
+    def test_gt_inside_quoted_attribute(self):
+        out = inline_css("""<style>p { color: red }</style><p title="a>b">x</p><p data-x='1>2'/>""")
+        self.assertEqual(out, """<p title="a>b" style="color: red">x</p><p data-x='1>2' style="color: red"/>""")
+
+    def test_unsupported_selectors_stay_in_style_block(self):
+        out = inline_css("<style>p { color: red } a:hover { color: blue }</style><p>x</p>")
+        self.assertEqual(out, '<style>a:hover { color: blue }</style><p style="color: red">x</p>')
+
+
+class EmbedImagesTest(unittest.TestCase):
+    def test_src_after_quoted_gt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "logo.png"), "wb") as f:
+                f.write(b"\x89PNG\r\n\x1a\n")
+            html, parts = embed_images('<img alt="a>b" src="logo.png"><img src="logo.png">', tmp, "example.com")
+        self.assertEqual(len(parts), 1)
+        self.assertEqual(html.count('src="cid:'), 2)
+        self.assertIn('alt="a>b"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
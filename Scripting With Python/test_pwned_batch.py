@@ -0,0 +1,122 @@
+"""
+Tests for pwned_batch.py against the local stub API (pwned_stub_server.py).
+
+    python -m pytest test_pwned_batch.py
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pwned_batch
+from pwned_batch import RangeCache, audit_file, audit_hashes, make_session, to_sha1
+from pwned_stub_server import StubServer, make_range
+
+KNOWN = ["password", "123456", "hunter2"]
+
+
+def known_count(password):
+    return 1000 + len(password)  # what StubServer reports for --known entries
+
+
+class AuditHashesTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer(range_size=50, known=KNOWN).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def test_counts_match_the_range_api(self):
+        entries = KNOWN + ["not in any breach 8f2c"]
+        counts, stats = audit_hashes([to_sha1(e) for e in entries], self.server.base_url, workers=4)
+        self.assertEqual(counts, [known_count(p) for p in KNOWN] + [0])
+        self.assertEqual(stats["errors"], 0)
+
+    def test_each_prefix_is_requested_once(self):
+        h = to_sha1("password")
+        hashes = [h, h, h[:5] + "0" * 35, to_sha1("123456")]
+        counts, stats = audit_hashes(hashes, self.server.base_url, workers=4)
+        self.assertEqual(counts, [known_count("password")] * 2 + [0, known_count("123456")])
+        self.assertEqual(stats["ranges"], 2)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_padding_rows_count_as_not_found(self):
+        prefix = to_sha1("password")[:5]
+        padded = [line.split(":") for line in make_range(prefix, 50, padding=True).splitlines()]
+        zero = [suffix for suffix, count in padded if count == "0"]
+        self.assertTrue(zero)
+        with make_session(1) as session:
+            self.assertEqual(session.headers["Add-Padding"], "true")
+            counts, _ = audit_hashes([prefix + zero[0]], self.server.base_url, session=session)
+        self.assertEqual(counts, [0])
+
+    def test_sha1_entries_are_taken_as_is(self):
+        h = hashlib.sha1(b"hunter2").hexdigest()
+        self.assertEqual(to_sha1(h), h.upper())
+        self.assertEqual(to_sha1(h, mode="password"), hashlib.sha1(h.encode()).hexdigest().upper())
+
+    def test_cache_answers_repeat_audits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = RangeCache(tmp)
+            hashes = [to_sha1(p) for p in KNOWN]
+            first, stats = audit_hashes(hashes, self.server.base_url, cache=cache)
+            self.assertEqual(stats["fetched"], 3)
+            second, stats = audit_hashes(hashes, self.server.base_url, cache=cache)
+            self.assertEqual((second, stats["cache_hits"], stats["fetched"]), (first, 3, 0))
+            self.assertEqual(self.server.requests, 3)
+
+    def test_failed_ranges_are_marked_unchecked(self):
+        bad_url = self.server.base_url.replace("/range/", "/missing/")  # stub answers 400, not retried
+        counts, stats = audit_hashes([to_sha1("password"), to_sha1("123456")], bad_url, workers=2)
+        self.assertEqual(counts, [-1, -1])
+        self.assertEqual(stats["errors"], 2)
+
+
+class AuditFileTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer(range_size=50, known=KNOWN).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.input = os.path.join(tmp.name, "passwords.txt")
+        with open(self.input, "w", encoding="utf-8") as f:
+            f.write("correct horse battery staple\nanother unlisted one\n")
+
+    def run_main(self, api_url):
+        argv = ["pwned_batch.py", self.input, "--cache-dir", "", "--api-url", api_url]
+        out = io.StringIO()
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(out), \
+                contextlib.redirect_stderr(io.StringIO()):
+            try:
+                pwned_batch.main()
+                code = 0
+            except SystemExit as e:
+                code = e.code
+        return code, out.getvalue()
+
+    def test_clean_audit(self):
+        code, out = self.run_main(self.server.base_url)
+        self.assertEqual(code, 0)
+        self.assertIn("none of 2 entries found", out)
+
+    def test_errors_are_reported_as_incomplete(self):
+        code, out = self.run_main(self.server.base_url.replace("/range/", "/missing/"))
+        self.assertNotEqual(code, 0)
+        self.assertNotIn("none of", out)
+        self.assertIn("audit incomplete: 2 of 2 entries could not be checked", out)
+
+    def test_report_marks_unchecked_lines(self):
+        report = self.input + ".csv"
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            audit_file(self.input, out=report, cache_dir="",
+                       api_url=self.server.base_url.replace("/range/", "/missing/"))
+        with open(report, encoding="utf-8") as f:
+            rows = f.read().splitlines()
+        self.assertEqual([r.rsplit(",", 1)[1] for r in rows[1:]], ["-1", "-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for the streaming trends in main_single.py.
+
+    python -m pytest test_trends.py
+"""
+
+import random
+import unittest
+from collections import Counter
+from unittest import mock
+
+import main_single
+from main_single import TrendingWindow, build_parser, make_bot
+
+
+class TieOrderTest(unittest.TestCase):
+    def test_matches_counter_without_expiry(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            window, recount = TrendingWindow(10 ** 9), Counter()
+            for i in range(200):
+                tags = [f"t{rng.randrange(30)}" for _ in range(rng.randrange(3))]
+                window.add(tags, 1000 + i)
+                recount.update(tags)
+                self.assertEqual(window.top(5), recount.most_common(5))
+
+    def test_tie_across_expiry_keeps_first_entry_order(self):
+        window = TrendingWindow(60, buckets=6)  # 10 s slices
+        window.add(["a"], 0)
+        window.add(["b"], 1)
+        window.add(["b"], 10)
+        window.add(["a"], 11)
+        self.assertEqual(window.top(2), [("a", 2), ("b", 2)])
+        window.advance(60)  # the 0-10 s slice expires
+        recount = Counter(["b", "a"])  # the tweets still in the window
+        self.assertEqual(recount.most_common(2), [("b", 1), ("a", 1)])
+        self.assertEqual(window.top(2), [("a", 1), ("b", 1)])  # documented: a keeps its place
+
+    def test_tag_that_fully_expires_rejoins_at_the_back(self):
+        window = TrendingWindow(60, buckets=6)
+        window.add(["a"], 0)
+        window.add(["b"], 15)
+        window.add(["a"], 65)  # a's first hit expired with the 0-10 s slice, then a came back
+        self.assertEqual(window.top(2), [("b", 1), ("a", 1)])
+
+
+class TrendsCliTest(unittest.TestCase):
+    def window_for(self, *argv):
+        """The TrendingWindow make_bot hands to Bot (None means Bot's default), without touching the bot's files."""
+        args = build_parser().parse_args(["trends", *argv])
+        with mock.patch.object(main_single, "ensure_paths"), \
+                mock.patch.object(main_single, "Bot", lambda root, timeline, trends: trends):
+            return make_bot(args)
+
+    def test_sketch_alone_uses_default_window(self):
+        w = self.window_for("--sketch")
+        self.assertTrue(w.sketch)
+        self.assertEqual(w.window, 24 * 3600)
+
+    def test_window_and_sketch(self):
+        w = self.window_for("--window", "15m", "--sketch")
+        self.assertEqual((w.window, w.sketch), (900, True))
+        self.assertIsNone(self.window_for())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,19 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-import json, os
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort
+import atexit, hmac, os, queue
+import click
 from datetime import datetime
 
+from message_store import open_store, migrate_json, WriteBehindQueue, QueueClosed
+from page_cache import PageCache, freeze_site
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-change-me")
+# "jsonl" (append-only log) or "sqlite" (WAL database)
+app.config["MESSAGE_BACKEND"] = os.environ.get("MESSAGE_BACKEND", "jsonl")
+# max contact messages waiting for the background writer before POSTs get a 503
+app.config["MESSAGE_QUEUE_SIZE"] = int(os.environ.get("MESSAGE_QUEUE_SIZE", "10000"))
+# /metrics answers 404 unless this is set and sent as "Authorization: Bearer <token>"
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
 
 # -----------------------------
 # Site Content (Edit to update)
@@ -50,12 +60,29 @@ NAV = [
     {"title": "Contact", "endpoint": "contact"},
 ]
 
-# Ensure data directory exists for contact messages
+# Rendered pages are cached until this content or a template changes
+page_cache = PageCache(app, {"PROFILE": PROFILE, "PROJECTS": PROJECTS, "NAV": NAV})
+
+# Contact messages store (see message_store.py). Files, connections and the
+# writer thread are opened lazily in each process, so this is safe with gunicorn --preload.
 os.makedirs("data", exist_ok=True)
-MESSAGES_JSON = os.path.join("data", "messages.json")
-if not os.path.exists(MESSAGES_JSON):
-    with open(MESSAGES_JSON, "w", encoding="utf-8") as f:
-        json.dump([], f)
+MESSAGES_JSON = os.path.join("data", "messages.json")  # legacy format, see `flask migrate-messages`
+message_store = open_store(app.config["MESSAGE_BACKEND"], "data")
+message_queue = WriteBehindQueue(message_store, maxsize=app.config["MESSAGE_QUEUE_SIZE"])
+atexit.register(message_queue.close)  # drain pending messages on shutdown
+
+@app.cli.command("migrate-messages")
+def migrate_messages():
+    """Import data/messages.json into the configured message backend."""
+    n = migrate_json(MESSAGES_JSON, message_store)
+    print(f"Migrated {n} messages into the {app.config['MESSAGE_BACKEND']} store")
+
+@app.cli.command("freeze")
+@click.option("--out", default="build", show_default=True, help="Output folder")
+def freeze(out):
+    """Write the cached pages and static files to OUT for nginx."""
+    for path in freeze_site(app, page_cache, out):
+        print(f"Wrote {path}")
 
 # -----------------------------
 # Routes
@@ -65,14 +92,17 @@ def inject_globals():
     return {"PROFILE": PROFILE, "NAV": NAV}
 
 @app.route("/")
+@page_cache.cached
 def home():
     return render_template("index.html", projects=PROJECTS[:3])
 
 @app.route("/projects")
+@page_cache.cached
 def projects():
     return render_template("projects.html", projects=PROJECTS)
 
 @app.route("/about")
+@page_cache.cached
 def about():
     return render_template("about.html")
 
@@ -91,18 +121,26 @@ def contact():
             "message": message,
             "ts": datetime.utcnow().isoformat() + "Z"
         }
-        # Append to JSON file
         try:
-            with open(MESSAGES_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            data.append(entry)
-            with open(MESSAGES_JSON, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            message_queue.submit(entry)
             flash("Thanks! Your message was sent.", "success")
-        except Exception as e:
-            flash(f"Couldn't save your message: {e}", "danger")
+        except queue.Full:
+            flash("We're getting a lot of messages right now, please try again shortly.", "danger")
+            return render_template("contact.html"), 503
+        except QueueClosed:  # the server is shutting down
+            flash("The site is restarting, please try again in a moment.", "danger")
+            return render_template("contact.html"), 503
         return redirect(url_for("contact"))
     return render_template("contact.html")
 
+@app.route("/metrics")
+def metrics():
+    # internal only: hidden unless the operator configured a token and the caller sends it
+    token = app.config["METRICS_TOKEN"]
+    sent = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not token or not hmac.compare_digest(sent.encode(), token.encode()):
+        abort(404)
+    return jsonify(message_queue.stats())
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Benchmark: per-message cost of the contact store as the store grows.
+
+Pre-fills each backend to N messages, then times a run of single appends
+(what one POST /contact does). The per-append time should stay flat from
+1k up to 1M stored messages.
+
+With --burst, --threads request threads each hand in --appends messages
+at once, first straight to the store and then through WriteBehindQueue,
+and the p50/p99 time a "request" spends on it is printed for both.
+
+    python bench_message_store.py --sizes 1000 100000 1000000 --appends 2000
+    python bench_message_store.py --burst --threads 16 --appends 500
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from message_store import WriteBehindQueue, open_store
+
+SAMPLE = {
+    "name": "Bench User",
+    "email": "bench@example.com",
+    "message": "Hello! This is a benchmark message of typical length.",
+    "ts": "2025-01-01T00:00:00Z",
+}
+
+
+def prefill(backend, data_dir, n):
+    # Write the pre-existing messages directly; we only time the appends.
+    if backend == "jsonl":
+        line = (json.dumps(SAMPLE, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(os.path.join(data_dir, "messages.jsonl"), "wb") as f:
+            chunk = line * 10000
+            for _ in range(n // 10000):
+                f.write(chunk)
+            f.write(line * (n % 10000))
+    else:
+        open_store("sqlite", data_dir).close()
+        conn = sqlite3.connect(os.path.join(data_dir, "messages.db"))
+        row = (SAMPLE["name"], SAMPLE["email"], SAMPLE["message"], SAMPLE["ts"])
+        with conn:
+            conn.executemany(
+                "INSERT INTO messages (name, email, message, ts) VALUES (?, ?, ?, ?)",
+                (row for _ in range(n)),
+            )
+        conn.close()
+
+
+def bench(backend, n, appends):
+    data_dir = tempfile.mkdtemp(prefix="msgbench-")
+    try:
+        prefill(backend, data_dir, n)
+        store = open_store(backend, data_dir)
+        t0 = time.perf_counter()
+        for _ in range(appends):
+            store.append(SAMPLE)
+        store.flush()
+        elapsed = time.perf_counter() - t0
+        store.close()
+        return elapsed / appends
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def burst(backend, threads, appends):
+    """[(label, p50, p99, seconds)] for direct appends vs. queued submits under a burst."""
+    rows = []
+    for label in ("direct", "queued"):
+        data_dir = tempfile.mkdtemp(prefix="msgbench-")
+        try:
+            store = open_store(backend, data_dir)
+            wbq = WriteBehindQueue(store, maxsize=threads * appends) if label == "queued" else None
+            handle = wbq.submit if wbq else store.append
+            latencies = [[] for _ in range(threads)]
+            start = threading.Barrier(threads + 1)
+
+            def worker(out):
+                start.wait()
+                for _ in range(appends):
+                    t0 = time.perf_counter()
+                    handle(SAMPLE)
+                    out.append(time.perf_counter() - t0)
+
+            pool = [threading.Thread(target=worker, args=(lat,)) for lat in latencies]
+            for t in pool:
+                t.start()
+            start.wait()
+            t0 = time.perf_counter()
+            for t in pool:
+                t.join()
+            if wbq:
+                wbq.close(timeout=60)  # include the drain: every message is on disk at the end
+            else:
+                store.flush()
+            secs = time.perf_counter() - t0
+            assert store.count() == threads * appends
+            store.close()
+            lat = sorted(x for per in latencies for x in per)
+            rows.append((label, percentile(lat, 50), percentile(lat, 99), secs))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    ap.add_argument("--appends", type=int, default=2000)
+    ap.add_argument("--backends", nargs="+", default=["jsonl", "sqlite"])
+    ap.add_argument("--burst", action="store_true", help="compare request latency with and without the queue")
+    ap.add_argument("--threads", type=int, default=16, help="concurrent request threads for --burst")
+    args = ap.parse_args()
+
+    if args.burst:
+        print(f"{'backend':<8} {'path':<7} {'p50 us':>9} {'p99 us':>9} {'total s':>8}")
+        for backend in args.backends:
+            for label, p50, p99, secs in burst(backend, args.threads, args.appends):
+                print(f"{backend:<8} {label:<7} {p50 * 1e6:>9.1f} {p99 * 1e6:>9.1f} {secs:>8.2f}")
+        return
+
+    print(f"{'backend':<8} {'stored':>10} {'us/append':>10}")
+    for backend in args.backends:
+        for n in args.sizes:
+            per = bench(backend, n, args.appends)
+            print(f"{backend:<8} {n:>10} {per * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Storage backends for contact-form messages.
+
+Two append-only backends are available:
+
+- ``jsonl``  : one JSON object per line in ``data/messages.jsonl``. Writes are
+               a single O_APPEND ``write()`` under an exclusive file lock, and
+               ``fsync`` is batched (every N records, or T seconds after the
+               first unsynced write).
+- ``sqlite`` : ``data/messages.db`` in WAL mode, one INSERT per message.
+
+Both cost the same per message no matter how many messages are already
+stored, and both are safe to use from several gunicorn workers at once.
+File descriptors and connections are opened on first use in each process,
+so a store created before a fork (gunicorn ``--preload``) is never shared
+by the workers.
+
+``WriteBehindQueue`` sits in front of either store so a request only pays
+for an in-memory enqueue; a background thread does the disk I/O.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+_STOP = object()  # sentinel that tells the writer thread to exit
+
+
+def _after_fork_in_child(method):
+    """Call the bound `method` in every forked child, for as long as its object is alive."""
+    if hasattr(os, "register_at_fork"):
+        ref = weakref.WeakMethod(method)
+        os.register_at_fork(after_in_child=lambda: (m := ref()) is not None and m())
+
+
+class JsonlMessageStore:
+    """Append-only JSON-Lines log with file locking and batched fsync."""
+
+    def __init__(self, path, fsync_every=32, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = fsync_interval
+        os.close(os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644))
+        self._reset()
+        _after_fork_in_child(self._reset)
+
+    def _reset(self):
+        # Per-process state. After a fork the child must not share the parent's
+        # open file description (flock would no longer exclude the parent), so
+        # it drops the inherited fd and opens its own on first write.
+        inherited = getattr(self, "_fd", None)
+        if inherited is not None:
+            os.close(inherited)  # only the child's copy; the parent keeps its own
+        self._lock = threading.Lock()
+        self._fd = None
+        self._timer = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Write several entries with one write() call (a group commit)."""
+        if not entries:
+            return
+        payload = "".join(
+            json.dumps(e, ensure_ascii=False) + "\n" for e in entries
+        ).encode("utf-8")
+        with self._lock:
+            fd = self._open()
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                os.write(fd, payload)
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            self._unsynced += len(entries)
+            now = time.monotonic()
+            if (self._unsynced >= self.fsync_every
+                    or now - self._last_sync >= self.fsync_interval):
+                self._sync(now)
+            elif self._timer is None:
+                # an idle server still gets its last writes onto disk within fsync_interval
+                self._timer = threading.Timer(self.fsync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync(self, now=None):
+        # caller holds self._lock
+        if self._fd is not None:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic() if now is None else now
+
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            if self._unsynced:
+                self._sync()
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # torn last line after a crash: skip it
+                    continue
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def flush(self):
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+                self._fd = None
+
+
+class SqliteMessageStore:
+    """SQLite store in WAL mode; one connection per thread, opened on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        conn = sqlite3.connect(path, timeout=30)  # schema only; closed before anyone can fork
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY,"
+                " name TEXT NOT NULL,"
+                " email TEXT NOT NULL,"
+                " message TEXT NOT NULL,"
+                " ts TEXT NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self._reset()
+        _after_fork_in_child(self._reset)
+
+    def _reset(self):
+        # a connection must never be used on both sides of a fork: drop the
+        # inherited ones (without closing them, which would touch the parent's locks)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        if not entries:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO messages (name, email, message, ts) VALUES (?, ?, ?, ?)",
+                [(e["name"], e["email"], e["message"], e["ts"]) for e in entries],
+            )
+
+    def __iter__(self):
+        cur = self._conn().execute(
+            "SELECT name, email, message, ts FROM messages ORDER BY id"
+        )
+        for name, email, message, ts in cur:
+            yield {"name": name, "email": email, "message": message, "ts": ts}
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class QueueClosed(RuntimeError):
+    """Raised by ``WriteBehindQueue.submit()`` once the queue is shutting down."""
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-memory queue drained by one background writer thread.
+
+    ``submit()`` never touches the disk: it raises ``queue.Full`` when
+    ``maxsize`` entries are already waiting, so the caller can answer 503,
+    and ``QueueClosed`` after ``close()``. The writer takes whatever has
+    piled up (up to ``max_batch``) and hands it to ``store.append_many()``
+    as one group commit. The writer is started by the first ``submit()`` in
+    each process, so a queue created before a fork (gunicorn ``--preload``)
+    still gets a writer in every worker.
+    """
+
+    def __init__(self, store, maxsize=10000, max_batch=256, retries=3):
+        self.store = store
+        self.maxsize = maxsize
+        self.max_batch = max_batch
+        self.retries = retries
+        self._closed = False
+        self._reset()
+        _after_fork_in_child(self._reset)
+
+    def _reset(self):
+        # Per-process state: a forked child has no writer thread and must not
+        # write the entries its parent still had queued.
+        self._q = queue.Queue(self.maxsize)
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._committed = 0
+        self._batches = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._max_depth = 0
+        self._last_batch = 0
+        self._max_batch_seen = 0
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def submit(self, entry):
+        if self._closed:
+            raise QueueClosed("write-behind queue is shut down")
+        self._ensure_writer()
+        try:
+            self._q.put_nowait(entry)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise
+        depth = self._q.qsize()
+        with self._stats_lock:
+            if depth > self._max_depth:
+                self._max_depth = depth
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._q.get()
+            batch = []
+            if item is _STOP:
+                stop = True
+            else:
+                batch.append(item)
+            # Coalesce everything that arrived while the last commit ran.
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    continue
+                batch.append(item)
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        for attempt in range(self.retries):
+            try:
+                self.store.append_many(batch)
+                break
+            except Exception:
+                log.exception("Message commit failed (attempt %d/%d)", attempt + 1, self.retries)
+                time.sleep(0.1 * 2 ** attempt)
+        else:
+            with self._stats_lock:
+                self._dropped += len(batch)
+            return
+        with self._stats_lock:
+            self._committed += len(batch)
+            self._batches += 1
+            self._last_batch = len(batch)
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._q.qsize(),
+                "queue_max_depth": self._max_depth,
+                "queue_capacity": self._q.maxsize,
+                "committed": self._committed,
+                "batches": self._batches,
+                "batch_size_last": self._last_batch,
+                "batch_size_max": self._max_batch_seen,
+                "batch_size_avg": round(self._committed / self._batches, 2) if self._batches else 0.0,
+                "rejected": self._rejected,
+                "dropped": self._dropped,
+            }
+
+    def close(self, timeout=10.0):
+        """Stop accepting work, drain what is queued and flush the store."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:  # nothing was ever submitted in this process otherwise
+            self._q.put(_STOP)
+            self._thread.join(timeout)
+        self.store.flush()
+
+
+BACKENDS = {
+    "jsonl": ("messages.jsonl", JsonlMessageStore),
+    "sqlite": ("messages.db", SqliteMessageStore),
+}
+
+
+def open_store(backend, data_dir="data"):
+    """Create the store named by ``backend`` ("jsonl" or "sqlite")."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown message backend {backend!r} (use one of: {', '.join(BACKENDS)})")
+    filename, cls = BACKENDS[backend]
+    os.makedirs(data_dir, exist_ok=True)
+    return cls(os.path.join(data_dir, filename))
+
+
+def migrate_json(json_path, store, batch_size=1000):
+    """
+    Copy every message from the old ``messages.json`` array into ``store``.
+    The old file is renamed to ``<name>.migrated`` so it can't be imported twice.
+    Returns the number of messages copied.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for i in range(0, len(data), batch_size):
+        store.append_many(data[i:i + batch_size])
+    store.flush()
+    os.replace(json_path, json_path + ".migrated")
+    return len(data)
@@ -0,0 +1,145 @@
+"""
+Response cache for the static portfolio pages.
+
+Pages are rendered once per *content version*: a hash of the site content
+dicts (PROFILE, PROJECTS, NAV) plus the mtimes of every template file.
+Each cached page keeps its raw, gzip and (if the ``brotli`` package is
+installed) brotli bodies, and is served with a strong ETag so browsers can
+revalidate with ``If-None-Match`` and get a bodiless 304.
+
+``freeze_site()`` writes the same pages (and their precompressed bodies)
+to a folder so nginx can serve the whole site without Python.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from functools import wraps
+
+from flask import Response, request, session
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+class PageCache:
+    def __init__(self, app, content, recheck_seconds=1.0):
+        self.app = app
+        self.recheck_seconds = recheck_seconds
+        self.endpoints = []
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._content_hash = hashlib.sha256(
+            json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        self._version = None
+        self._checked_at = 0.0
+
+    def version(self):
+        """Content version; template mtimes are re-stat'ed at most once per recheck_seconds."""
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.recheck_seconds:
+            h = hashlib.sha256(self._content_hash.encode("ascii"))
+            folder = os.path.join(self.app.root_path, self.app.template_folder or "templates")
+            for dirpath, _, files in sorted(os.walk(folder)):
+                for name in sorted(files):
+                    path = os.path.join(dirpath, name)
+                    h.update(f"{path}:{os.stat(path).st_mtime_ns}".encode("utf-8"))
+            self._version = h.hexdigest()[:20]
+            self._checked_at = now
+        return self._version
+
+    def _build(self, view, args, kwargs, version):
+        rv = view(*args, **kwargs)
+        body = rv.encode("utf-8") if isinstance(rv, str) else rv.get_data()
+        page = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "etag": f"{version}-{hashlib.sha256(body).hexdigest()[:12]}",
+        }
+        if brotli:
+            page["br"] = brotli.compress(body, quality=11)
+        return page
+
+    def get(self, view, args, kwargs):
+        version = self.version()
+        key = (request.path, version)
+        page = self._pages.get(key)
+        if page is None:
+            page = self._build(view, args, kwargs, version)
+            with self._lock:
+                # drop pages rendered for an older version of this path
+                for old in [k for k in self._pages if k[0] == request.path]:
+                    del self._pages[old]
+                self._pages[key] = page
+        return page
+
+    def cached(self, view):
+        """Route decorator: serve ``view`` from the cache with ETag/304 support."""
+        self.endpoints.append(view.__name__)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # a pending flash message makes the page per-user
+            if session.get("_flashes"):
+                return view(*args, **kwargs)
+            page = self.get(view, args, kwargs)
+            encoding = "identity"
+            for enc in ENCODINGS:
+                if request.accept_encodings[enc] > 0:  # `in` ignores quality, so "gzip;q=0" would match
+                    encoding = enc
+                    break
+            etag = page["etag"] if encoding == "identity" else f"{page['etag']}-{encoding}"
+            headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            if request.if_none_match.contains(etag):
+                resp = Response(status=304, headers=headers)
+            else:
+                resp = Response(page[encoding], mimetype="text/html", headers=headers)
+            resp.set_etag(etag)
+            return resp
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+        self._version = None
+
+
+def freeze_site(app, cache, out_dir):
+    """
+    Render every cached route into ``out_dir`` as ``<path>/index.html`` with
+    ``.gz``/``.br`` siblings (for nginx ``gzip_static``/``brotli_static``)
+    and copy the static folder. Returns the list of written HTML files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    client = app.test_client()
+    with app.test_request_context():
+        from flask import url_for
+        urls = [url_for(endpoint) for endpoint in cache.endpoints]
+    for url in urls:
+        resp = client.get(url, headers={"Accept-Encoding": "identity"})
+        body = resp.get_data()
+        target = os.path.join(out_dir, url.strip("/"), "index.html")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(body)
+        with open(target + ".gz", "wb") as f:
+            f.write(gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli:
+            with open(target + ".br", "wb") as f:
+                f.write(brotli.compress(body, quality=11))
+        written.append(target)
+    if app.static_folder and os.path.isdir(app.static_folder):
+        shutil.copytree(app.static_folder, os.path.join(out_dir, "static"), dirs_exist_ok=True)
+    return written
@@ -0,0 +1,68 @@
+"""
+Tests for page_cache.py: content negotiation and revalidation.
+
+    python -m pytest test_page_cache.py
+"""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+
+import page_cache
+from page_cache import PageCache
+
+
+class CachedPageTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, "templates"))
+        app = Flask(__name__, root_path=tmp.name)
+        app.secret_key = "test"
+        cache = PageCache(app, {"PROFILE": {}})
+
+        @app.route("/")
+        @cache.cached
+        def home():
+            return "<p>hello</p>" * 50
+
+        self.client = app.test_client()
+
+    def get(self, accept_encoding=None, **headers):
+        if accept_encoding is not None:
+            headers["Accept-Encoding"] = accept_encoding
+        return self.client.get("/", headers=headers)
+
+    def test_gzip_when_accepted(self):
+        r = self.get("gzip, deflate")
+        self.assertEqual(r.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(r.data), b"<p>hello</p>" * 50)
+
+    def test_identity_without_accept_encoding(self):
+        r = self.get()
+        self.assertNotIn("Content-Encoding", r.headers)
+        self.assertEqual(r.data, b"<p>hello</p>" * 50)
+
+    def test_refused_encodings_are_not_served(self):
+        for header in ("gzip;q=0", "gzip;q=0, br;q=0", "*;q=0", "deflate, gzip;q=0.0"):
+            with self.subTest(header=header):
+                r = self.get(header)
+                self.assertNotIn("Content-Encoding", r.headers)
+                self.assertEqual(r.data, b"<p>hello</p>" * 50)
+
+    def test_wildcard_accepts_an_encoding(self):
+        r = self.get("*")
+        self.assertEqual(r.headers["Content-Encoding"], page_cache.ENCODINGS[0])
+
+    def test_etag_revalidation_per_encoding(self):
+        first = self.get("gzip")
+        again = self.get("gzip", **{"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.get(**{"If-None-Match": first.headers["ETag"]}).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()